@@ -0,0 +1,86 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, os, sys, json, fnmatch, platform, argparse, datetime
+from .fixtures import init_display, prepare_assets
+
+## python -m benchmarks [-k pattern] [--repeat N] [--warmup S] [--json out.json] [--baseline base.json]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the engine's hot paths")
+    parser.add_argument("-k", "--filter", default="*", help="only run benchmarks matching this glob pattern")
+    parser.add_argument("--repeat", type=int, default=20, help="timed samples per benchmark")
+    parser.add_argument("--warmup", type=float, default=0.2, help="warm-up time per benchmark in seconds")
+    parser.add_argument("--json", default=None, help="write the results to this file")
+    parser.add_argument("--baseline", default=None, help="compare against the results in this file")
+    parser.add_argument("--threshold", type=float, default=0.05, help="relative change which counts as faster/slower")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with 1 if anything got slower")
+    args = parser.parse_args()
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    json_file = os.path.abspath(args.json) if args.json else None
+    baseline_file = os.path.abspath(args.baseline) if args.baseline else None
+
+    init_display()
+    asset_mode = prepare_assets(repo_root)
+
+    ## the game modules are imported once the display and the assets are there
+    from .harness import BENCHMARKS, run_benchmark, compare
+    from . import cases  ## registers the benchmarks
+
+    results = {}
+    for bench in BENCHMARKS:
+        if not fnmatch.fnmatch(bench.name, args.filter):
+            continue
+        result = run_benchmark(bench, args.warmup, args.repeat)
+        results[bench.name] = result
+        print(f"{bench.name:<40} median {result['median_us']:10.1f} us   min {result['min_us']:10.1f} us   "
+              f"stdev {result['stdev_us']:8.1f} us   ({result['repeat']} x {result['number']})")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "sdl": ".".join(str(v) for v in pygame.get_sdl_version()),
+            "platform": platform.platform(),
+            "assets": asset_mode,
+            "repeat": args.repeat,
+            "warmup_s": args.warmup
+        },
+        "results": results
+    }
+    if json_file:
+        with open(json_file, "w") as f:
+            json.dump(report, f, indent=1)
+
+    regressions = 0
+    if baseline_file:
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("assets") != asset_mode:
+            print(f"warning: baseline was measured with {baseline['meta'].get('assets')} assets")
+        print(f"\ncompared with {args.baseline}:")
+        for row in compare(results, baseline["results"], args.threshold):
+            if row["ratio"] is None:
+                print(f"{row['name']:<40} {row['median_us']:10.1f} us   (new)")
+                continue
+            print(f"{row['name']:<40} {row['baseline_us']:10.1f} -> {row['median_us']:10.1f} us   x{row['ratio']:.2f}  {row['status']}")
+            regressions += row["status"] == "slower"
+
+    return 1 if args.fail_on_regression and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
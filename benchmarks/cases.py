@@ -0,0 +1,224 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, itertools, os, shutil, tempfile, atexit
+from game.utils.params import *
+from game.utils.assets import assets
+from game.utils.text_cache import text_cache
+from game.utils.spatial_hash import SpatialHash
+from game.utils.sprite_utils import load_sprite_with_sprite_size
+from game.utils.utils import drawText
+from game.utils.input import keyboard
+from game.utils.scheduler import Scheduler
+from game.entities.map_entity import BakedChunk, MapEntity, bake_map_chunks
+from game.utils.map_cache import load_map
+from game.entities.boxes_entity import CollisionBox, TrashBin, TrashBinView
+from game.entities.trash_bin_store import TrashBinStore
+from game.entities.npc_crowd import NpcCrowd, NPC_KIND
+from game.entities.bierdurstmann_entity import Bierdurstmann, BierdurstmannInventory
+from game.level.game_level import CameraGroup
+from game.level.game_level_stuff.info_boxes import InventoryMenu
+from .harness import benchmark
+from .fixtures import PLAYER_SHEET, synthetic_surface, write_synthetic_map
+
+## World used by most cases: a 4096px square map with a grid of small collision
+## boxes and trash bins, similar in density to the main world.
+WORLD_SIZE = 4096
+BOX_SPACING = 96
+BIN_SPACING = 128
+
+def _baked_chunks():
+    chunks = []
+    for y in range(0, WORLD_SIZE, MAP_CHUNK_SIZE):
+        for x in range(0, WORLD_SIZE, MAP_CHUNK_SIZE):
+            chunks.append(BakedChunk((x, y), synthetic_surface((MAP_CHUNK_SIZE, MAP_CHUNK_SIZE), x + y, False), True))
+    return chunks
+
+class _TileLayer:
+    ## stands in for a pytmx tile layer: bake_map_chunks only needs `data` and tiles()
+    def __init__(self, width, height, tiles, every = 1):
+        self.data = True
+        self.width = width
+        self.height = height
+        self.surfaces = tiles
+        self.every = every
+
+    def tiles(self):
+        for y in range(self.height):
+            for x in range(self.width):
+                if (x * y) % self.every == 0:
+                    yield x, y, self.surfaces[(x * 7 + y * 3) % len(self.surfaces)]
+
+## synthetic .tmx for the load_map cases, 2048px square like a mid sized level
+MAP_TILES = 128
+
+def _synthetic_map():
+    directory = tempfile.mkdtemp(prefix="winterchaos-map-")
+    atexit.register(shutil.rmtree, directory, True)
+    return directory, write_synthetic_map(directory, MAP_TILES, MAP_TILES)
+
+def _collision_boxes(group):
+    for y in range(BOX_SPACING // 2, WORLD_SIZE, BOX_SPACING):
+        for x in range(BOX_SPACING // 2, WORLD_SIZE, BOX_SPACING):
+            CollisionBox((x, y), (16, 16), group)
+    return group
+
+def _trash_bins(group, count = None, scheduler = None):
+    surf = synthetic_surface((32, 32), 7)
+    positions = ((x, y) for y in range(0, WORLD_SIZE, BIN_SPACING) for x in range(0, WORLD_SIZE, BIN_SPACING))
+    for pos in itertools.islice(positions, count):
+        TrashBin(pos, surf, group, scheduler)
+    return group
+
+def _player(pos = (WORLD_SIZE // 2, WORLD_SIZE // 2)):
+    return Bierdurstmann(pygame.Vector2(pos), None, lambda msg: None)
+
+
+@benchmark("camera.custom_drawing")
+def camera_custom_drawing():
+    screen = pygame.display.get_surface()
+    camera = CameraGroup()
+    map_group = pygame.sprite.Group()
+    MapEntity(_baked_chunks(), WORLD_SIZE, WORLD_SIZE, map_group)
+    objects = _trash_bins(pygame.sprite.Group())
+    player_group = pygame.sprite.GroupSingle(_player())
+    return lambda: camera.custom_drawing(player_group, screen, map_group, objects)
+
+@benchmark("map_entity.construct")
+def map_entity_construct():
+    chunks = _baked_chunks()
+    def run():
+        MapEntity(chunks, WORLD_SIZE, WORLD_SIZE, pygame.sprite.Group())
+    return run
+
+@benchmark("map.bake_chunks[128x128]")
+def map_bake_chunks():
+    ## a full opaque ground layer and a sparse decoration layer with alpha
+    ground = _TileLayer(MAP_TILES, MAP_TILES, [synthetic_surface((TILE_SIZE, TILE_SIZE), i, False) for i in range(8)])
+    decoration = _TileLayer(MAP_TILES, MAP_TILES, [synthetic_surface((TILE_SIZE, TILE_SIZE), i) for i in range(8)], 5)
+    return lambda: bake_map_chunks([ground, decoration], MAP_TILES, MAP_TILES)
+
+@benchmark("map.load_map[cold]")
+def map_load_cold():
+    ## cache miss: parse the tmx with pytmx, bake and write the cache entry
+    directory, map_file = _synthetic_map()
+    cache_dir = os.path.join(directory, "cache")
+    def run():
+        shutil.rmtree(cache_dir, True)
+        load_map(map_file, cache_dir, True)
+    return run
+
+@benchmark("map.load_map[warm]")
+def map_load_warm():
+    directory, map_file = _synthetic_map()
+    cache_dir = os.path.join(directory, "cache")
+    load_map(map_file, cache_dir, True)
+    assert os.listdir(cache_dir), "the warm case needs a cache entry"
+    return lambda: load_map(map_file, cache_dir, True)
+
+@benchmark("bierdurstmann.update")
+def bierdurstmann_update():
+    ## walks right through the box grid (sliding along the boxes) and is put back every second
+    collision_index = SpatialHash(COLLISION_CELL_SIZE)
+    collision_index.build(_collision_boxes(pygame.sprite.Group()))
+    interaction_index = SpatialHash(COLLISION_CELL_SIZE)
+    interaction_index.build(_trash_bins(pygame.sprite.Group()))
+    portal_index = SpatialHash(COLLISION_CELL_SIZE)
+
+    keys = keyboard.use_script()
+    keys.held = {pygame.K_d, pygame.K_LSHIFT}
+    player = _player()
+    start = pygame.Vector2(player.pos)
+    ticks = itertools.count()
+    def run():
+        if next(ticks) % SIMULATION_HZ == 0:
+            player.update_pos(pygame.Vector2(start))
+        player.update(SIMULATION_DT, [], [collision_index, interaction_index], interaction_index, portal_index)
+    return run
+
+@benchmark("interaction_box.check")
+def interaction_box_check():
+    index = SpatialHash(COLLISION_CELL_SIZE)
+    bins = _trash_bins(pygame.sprite.Group())
+    index.build(bins)
+    player = _player()
+    ## right on top of a bin, so the hit path (interact, message) is measured too
+    player.interaction_box.rect.topleft = next(iter(bins)).rect.topleft
+    return lambda: player.interaction_box.check(index)
+
+@benchmark("trash_bin.update[1000]")
+def trash_bin_update():
+    bins = list(_trash_bins(pygame.sprite.Group(), 1000))
+    def run():
+        for trash_bin in bins:
+            trash_bin.update(SIMULATION_DT)
+    return run
+
+@benchmark("trash_bin.scheduler[1000]")
+def trash_bin_scheduler():
+    scheduler = Scheduler()
+    _trash_bins(pygame.sprite.Group(), 1000, scheduler)
+    assert len(scheduler) == 1000, "every bin has to register its refill"
+    return lambda: scheduler.advance(SIMULATION_DT)
+
+@benchmark("trash_bin.store[1000]")
+def trash_bin_store():
+    store = TrashBinStore()
+    surf = synthetic_surface((32, 32), 7)
+    for i in range(1000):
+        TrashBinView((i % 32 * BIN_SPACING, i // 32 * BIN_SPACING), surf, pygame.sprite.Group(), store)
+    return lambda: store.update(SIMULATION_DT)
+
+@benchmark("npc_crowd.update[1000]")
+def npc_crowd_update():
+    ## a quarter of the crowd on screen, the rest at the reduced off screen rate
+    crowd = NpcCrowd()
+    crowd.build_grid(WORLD_SIZE, WORLD_SIZE, _collision_boxes(pygame.sprite.Group()))
+    crowd.spawn(750, NPC_KIND.PEDESTRIAN)
+    crowd.spawn(250, NPC_KIND.BOTTLE_COLLECTOR)
+    view = pygame.rect.Rect(0, 0, WORLD_SIZE // 2, WORLD_SIZE // 2)
+    return lambda: crowd.update(SIMULATION_DT, view)
+
+@benchmark("draw_text")
+def draw_text():
+    surface = pygame.Surface((600, 200), pygame.SRCALPHA)
+    font = text_cache.get_font(FONT_PATH, 18)
+    text = "Du hast folgende Gegenstände gefunden: 3 Pfandflaschen 2 Pfanddosen 1 Stücke Müll 0.42 € an Geld " * 3
+    return lambda: drawText(surface, text, "black", font, True)
+
+@benchmark("inventory_menu.update[unchanged]")
+def inventory_menu_update_unchanged():
+    menu = InventoryMenu(pygame.sprite.GroupSingle())
+    inventory = BierdurstmannInventory()
+    return lambda: menu.update(inventory)
+
+@benchmark("inventory_menu.update[changed]")
+def inventory_menu_update_changed():
+    menu = InventoryMenu(pygame.sprite.GroupSingle())
+    inventory = BierdurstmannInventory()
+    def run():
+        inventory.content["bottle"] += 1
+        menu.update(inventory)
+    return run
+
+@benchmark("load_sprite_with_sprite_size[cold]")
+def load_sprite_cold():
+    def run():
+        assets.clear()
+        load_sprite_with_sprite_size(PLAYER_SHEET, 0, 8, 9, 1, 64, 64, (PLAYER_SIZE, PLAYER_SIZE))
+    return run
+
+@benchmark("load_sprite_with_sprite_size[cached]")
+def load_sprite_cached():
+    return lambda: load_sprite_with_sprite_size(PLAYER_SHEET, 0, 8, 9, 1, 64, 64, (PLAYER_SIZE, PLAYER_SIZE))
@@ -0,0 +1,93 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, os, shutil, tempfile, atexit
+from game.utils.params import *
+
+## The game loads its assets from paths relative to the repository root. If the
+## assets aren't there (they are downloaded separately), a set of synthetic stand-ins
+## with the same paths and sizes is generated into a temporary directory instead.
+
+PLAYER_SHEET = os.path.join("game", "assets", "sprites", "player.png")
+
+def init_display():
+    ## headless: dummy video driver, no audio device (sounds become silent)
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.init()
+    pygame.mixer.quit()
+    return pygame.display.set_mode((WIDTH, HEIGHT))
+
+def prepare_assets(repo_root: str) -> str:
+    ## Changes into a directory with the assets, returns "real" or "synthetic"
+    if os.path.isdir(os.path.join(repo_root, "game", "assets")):
+        os.chdir(repo_root)
+        return "real"
+
+    directory = tempfile.mkdtemp(prefix="winterchaos-bench-")
+    atexit.register(shutil.rmtree, directory, True)
+    os.chdir(directory)
+
+    ## player sheet: 9 columns of 64px frames, the walk cycles are in rows 8 to 11
+    _write_image(PLAYER_SHEET, (9 * 64, 21 * 64))
+    for path in INVENTORY_IMAGES:
+        _write_image(path, (128, 128))
+    os.makedirs(os.path.dirname(FONT_PATH), exist_ok=True)
+    default_font = os.path.join(os.path.dirname(pygame.__file__), pygame.font.get_default_font())
+    shutil.copy(default_font, FONT_PATH)
+    return "synthetic"
+
+def synthetic_surface(size, seed: int = 0, alpha: bool = True) -> pygame.Surface:
+    surf = pygame.Surface(size, pygame.SRCALPHA if alpha else 0)
+    surf.fill(((seed * 53) % 256, (seed * 97) % 256, (seed * 29) % 256, 255))
+    ## some transparent pixels, like a real sprite
+    if alpha:
+        pygame.draw.rect(surf, (0, 0, 0, 0), (0, 0, size[0] // 4, size[1] // 4))
+    return surf
+
+def write_synthetic_map(directory: str, width: int, height: int) -> str:
+    ## A Tiled map (width x height tiles) with an embedded 4x4 tileset, a full ground
+    ## layer, a sparse decoration layer and a few objects, returns the path of the .tmx
+    os.makedirs(directory, exist_ok=True)
+    tileset = pygame.Surface((4 * TILE_SIZE, 4 * TILE_SIZE), pygame.SRCALPHA)
+    for i in range(16):
+        tile = synthetic_surface((TILE_SIZE, TILE_SIZE), i, alpha = i >= 8)
+        tileset.blit(tile, ((i % 4) * TILE_SIZE, (i // 4) * TILE_SIZE))
+    pygame.image.save(tileset, os.path.join(directory, "synthetic_tiles.png"))
+
+    ground = ",".join(str(1 + (x * 7 + y * 3) % 8) for y in range(height) for x in range(width))
+    decoration = ",".join(str(9 + (x + y) % 8 if (x * y) % 5 == 0 else 0) for y in range(height) for x in range(width))
+    boxes = "".join(f'<object id="{i + 1}" x="{(i * 97) % (width * TILE_SIZE)}" y="{(i * 61) % (height * TILE_SIZE)}" width="32" height="32"/>'
+                    for i in range(64))
+    path = os.path.join(directory, "synthetic_map.tmx")
+    with open(path, "w") as f:
+        f.write(f'''<?xml version="1.0" encoding="UTF-8"?>
+<map version="1.10" orientation="orthogonal" renderorder="right-down" width="{width}" height="{height}" tilewidth="{TILE_SIZE}" tileheight="{TILE_SIZE}" infinite="0" nextlayerid="4" nextobjectid="65">
+ <tileset firstgid="1" name="synthetic" tilewidth="{TILE_SIZE}" tileheight="{TILE_SIZE}" tilecount="16" columns="4">
+  <image source="synthetic_tiles.png" width="{4 * TILE_SIZE}" height="{4 * TILE_SIZE}"/>
+ </tileset>
+ <layer id="1" name="ground" width="{width}" height="{height}"><data encoding="csv">{ground}</data></layer>
+ <layer id="2" name="decoration" width="{width}" height="{height}"><data encoding="csv">{decoration}</data></layer>
+ <objectgroup id="3" name="collision_boxes">{boxes}</objectgroup>
+</map>
+''')
+    return path
+
+def _write_image(path: str, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    surf = pygame.Surface(size, pygame.SRCALPHA)
+    for y in range(0, size[1], 64):
+        for x in range(0, size[0], 64):
+            pygame.draw.circle(surf, ((x * 7) % 256, (y * 3) % 256, 128, 255), (x + 32, y + 32), 24)
+    pygame.image.save(surf, path)
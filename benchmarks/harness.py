@@ -0,0 +1,90 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import time, statistics
+from typing import Callable, Dict, List
+
+## Benchmarks register a setup function which builds the fixture and returns the
+## callable to time. Each benchmark is warmed up first, which also picks how many
+## calls go into one sample, then timed for a number of samples. All times are per
+## call, in microseconds.
+
+class Benchmark:
+    def __init__(self, name: str, setup: Callable[[], Callable[[], None]]):
+        self.name = name
+        self.setup = setup
+
+
+BENCHMARKS: List[Benchmark] = []
+
+def benchmark(name: str):
+    def register(setup):
+        BENCHMARKS.append(Benchmark(name, setup))
+        return setup
+    return register
+
+
+def run_benchmark(bench: Benchmark, warmup: float = 0.2, repeat: int = 20, sample_time: float = 0.01) -> dict:
+    func = bench.setup()
+
+    ## warm-up: caches, allocations and the calls per sample
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= warmup:
+            break
+    number = max(1, int(sample_time / (elapsed / calls)))
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+
+    return summarize(samples, number)
+
+def summarize(samples: List[float], number: int) -> dict:
+    ordered = sorted(samples)
+    return {
+        "number": number,
+        "repeat": len(samples),
+        "min_us": ordered[0],
+        "median_us": statistics.median(ordered),
+        "mean_us": statistics.fmean(ordered),
+        "stdev_us": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "p95_us": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        "samples_us": samples
+    }
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float = 0.05) -> List[dict]:
+    ## medians against the baseline, changes within the threshold count as unchanged
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append({"name": name, "median_us": result["median_us"], "baseline_us": None, "ratio": None, "status": "new"})
+            continue
+        ratio = result["median_us"] / base["median_us"] if base["median_us"] > 0 else float("inf")
+        if ratio > 1.0 + threshold:
+            status = "slower"
+        elif ratio < 1.0 - threshold:
+            status = "faster"
+        else:
+            status = "same"
+        rows.append({"name": name, "median_us": result["median_us"], "baseline_us": base["median_us"], "ratio": ratio, "status": status})
+    return rows
@@ -13,12 +13,18 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-import pygame, copy, math, os, enum, random
+import pygame, copy, math, os, enum
 from typing import List
 from .boxes_entity import TrashBin, Portal, Pfandautomat
 from ..utils.sprite_utils import load_sprite, load_sprite_with_sprite_size
 from ..utils.params import *
 from ..utils.utils import interpolate
+from ..utils.assets import assets
+from ..utils.input import keyboard
+from ..utils.rng import rng
+from ..utils.profiler import profiler
+from ..utils.spatial_hash import SpatialHash
+from ..utils.collision import move_and_slide, swept_bounds
 
 class INTERACTION_TYPES(enum.Enum):
     UNDEFINED = 0
@@ -28,6 +34,24 @@ class INTERACTION_TYPES(enum.Enum):
     PFAND_AUTOMAT_INTERACTION = 4
 
 
+_player_frames = None
+
+def load_player_frames() -> dict:
+    ## walk cycles per direction, built once and shared by the player and all NPCs
+    global _player_frames
+    if _player_frames is None:
+        total_path = os.path.join("game", "assets", "sprites", "player.png")
+        sprite_w = 64
+        sprite_h = 64
+        _player_frames = {
+            "up" :      load_sprite_with_sprite_size(total_path, 0, 8, 9, 1, sprite_w, sprite_h, (PLAYER_SIZE, PLAYER_SIZE)),
+            "left" :      load_sprite_with_sprite_size(total_path, 0, 9, 9, 1, sprite_w, sprite_h, (PLAYER_SIZE, PLAYER_SIZE)),
+            "down" :      load_sprite_with_sprite_size(total_path, 0, 10, 9, 1, sprite_w, sprite_h, (PLAYER_SIZE, PLAYER_SIZE)),
+            "right" :      load_sprite_with_sprite_size(total_path, 0, 11, 9, 1, sprite_w, sprite_h, (PLAYER_SIZE, PLAYER_SIZE))
+        }
+    return _player_frames
+
+
 class InteractionBox(pygame.sprite.Sprite):
     def __init__(self, pos, group: pygame.sprite.GroupSingle):
         super().__init__(group)
@@ -37,8 +61,8 @@ class InteractionBox(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
         self.rect.center = self.pos
 
-    def check(self, group: pygame.sprite.Group):
-        collisions = pygame.sprite.spritecollide(self, group, False)
+    def check(self, index: SpatialHash):
+        collisions = index.query(self.rect)
         if len(collisions) > 0:
             obj = collisions[0]
             if isinstance(obj, TrashBin):
@@ -53,6 +77,13 @@ class InteractionBox(pygame.sprite.Sprite):
                 return {"type": INTERACTION_TYPES.PFAND_AUTOMAT_INTERACTION, "msg": None, "content": None}
 
         return {"type": INTERACTION_TYPES.UNDEFINED, "msg": None, "content": None}
+
+    def check_npcs(self, npcs):
+        ## npcs is a NpcCrowd, its members aren't sprites and can't be in a SpatialHash
+        index = npcs.query(self.rect)
+        if index is not None:
+            return {"type": INTERACTION_TYPES.OTHER_PLAYER_INTERACTION, "msg": npcs.interact(index), "content": None}
+        return {"type": INTERACTION_TYPES.UNDEFINED, "msg": None, "content": None}
         
 
 class BierdurstmannInventory:
@@ -82,23 +113,19 @@ class BierdurstmannState:
 
         self.time = 0
 
-        self.sound_files = [
-            "game/assets/sounds/durscht_bierdurscht.mp3",
-            "game/assets/sounds/dann_sauf_i_mi_voll.mp3"
-        ]
+        self.sound_files = BEER_SOUND_FILES
+        ## decoded once, drinking a beer only replays them
+        self.sounds = [assets.sound(sound_file) for sound_file in self.sound_files]
 
         self.index = 1
-        self.sound = pygame.mixer.Sound(self.sound_files[self.index])
+        self.sound = self.sounds[self.index]
 
     def _play_beer_sound(self):
-        self.index = random.randint(0, (len(self.sound_files) - 1))
-        if pygame.mixer.get_busy():
+        self.index = rng.randint(0, (len(self.sound_files) - 1))
+        if pygame.mixer.get_init() and pygame.mixer.get_busy():
             self.sound.stop()
-            self.sound = pygame.mixer.Sound(self.sound_files[self.index])
-            self.sound.play()
-        else:
-            self.sound = pygame.mixer.Sound(self.sound_files[self.index])
-            self.sound.play()
+        self.sound = self.sounds[self.index]
+        self.sound.play()
 
 
     def drink_beer(self):
@@ -137,6 +164,8 @@ class Bierdurstmann(pygame.sprite.Sprite):
         # self.draw_group = draw_group
         
         self.pos = copy.deepcopy(pos)
+        ## position at the start of the current simulation step, for render interpolation
+        self.prev_pos = pygame.Vector2(self.pos)
         self.show_message = show_message
         self.interaction_box_group = pygame.sprite.GroupSingle()
         self.interaction_box = InteractionBox(self.pos, self.interaction_box_group)
@@ -151,8 +180,10 @@ class Bierdurstmann(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
         self.rect.center = self.pos
         self.direction = pygame.Vector2()
+        ## displacement of the current frame, applied by the swept collision
+        self.displacement = pygame.Vector2()
 
-        self.collision_box = pygame.rect.Rect(5, 5, PLAYER_SIZE - 20, PLAYER_SIZE - 20)
+        self.collision_box = pygame.rect.Rect(5, 5, 2 * COLLISION_HALF_SIZE, 2 * COLLISION_HALF_SIZE)
         self.collision_box.center = self.rect.center
         
         self.dir = "left"
@@ -166,16 +197,7 @@ class Bierdurstmann(pygame.sprite.Sprite):
         self._load_sprite()
                                  
     def _load_sprite(self):
-        filename = "player.png"
-        total_path = os.path.join("game", "assets", "sprites", filename)
-        sprite_w = 64
-        sprite_h = 64
-        self.sprites = {
-            "up" :      load_sprite_with_sprite_size(total_path, 0, 8, 9, 1, sprite_w, sprite_h, (PLAYER_SIZE, PLAYER_SIZE)),
-            "left" :      load_sprite_with_sprite_size(total_path, 0, 9, 9, 1, sprite_w, sprite_h, (PLAYER_SIZE, PLAYER_SIZE)),
-            "down" :      load_sprite_with_sprite_size(total_path, 0, 10, 9, 1, sprite_w, sprite_h, (PLAYER_SIZE, PLAYER_SIZE)),
-            "right" :      load_sprite_with_sprite_size(total_path, 0, 11, 9, 1, sprite_w, sprite_h, (PLAYER_SIZE, PLAYER_SIZE))
-        }               
+        self.sprites = load_player_frames()
 
         self.image = self.sprites[self.dir][self.default_frame]  
         self.rect = self.image.get_rect()
@@ -191,7 +213,7 @@ class Bierdurstmann(pygame.sprite.Sprite):
                     if self.inventory.content['beer'] > 0:
                         self.state.drink_beer()
                         self.inventory.content['beer'] -= 1
-                        if random.randint(0, 1) == 0:
+                        if rng.randint(0, 1) == 0:
                             self.inventory.content['bottle'] += 1
                         else:
                             self.inventory.content['can'] += 1
@@ -200,7 +222,7 @@ class Bierdurstmann(pygame.sprite.Sprite):
 
 
 
-        keys = pygame.key.get_pressed()
+        keys = keyboard.get_pressed()
         self.direction = pygame.Vector2()
         if keys[pygame.K_LSHIFT]:
             self.speed_factor = 2.0
@@ -231,14 +253,14 @@ class Bierdurstmann(pygame.sprite.Sprite):
             
     def _move(self, dt):
         self.reduce_speed_factor = interpolate(self.state.suff, 0, 10, 1.0, 0.4)
-        self.pos += self.direction * PLAYER_SPEED * dt * self.speed_factor * self.reduce_speed_factor
+        self.displacement = self.direction * PLAYER_SPEED * dt * self.speed_factor * self.reduce_speed_factor
         ## Handle Suff Level
         if self.state.suff > 0:
             sin_value = math.sin(self.timstamp * 1.0 * self.state.suff) * 1 + math.cos(self.timstamp * 1.0/self.state.suff) * 0.2
             amplitude = interpolate(self.state.suff, 0, 10, 0, 2)
             if self.direction.magnitude() > 0:
-                self.pos.y += sin_value * amplitude * self.reduce_speed_factor
-                self.pos.x += sin_value * amplitude * self.reduce_speed_factor
+                self.displacement.y += sin_value * amplitude * self.reduce_speed_factor
+                self.displacement.x += sin_value * amplitude * self.reduce_speed_factor
             # if abs(self.direction.x) > 0:
             #     self.pos.y += sin_value * amplitude * self.reduce_speed_factor
             #     self.pos.x += sin_value * amplitude * self.reduce_speed_factor
@@ -258,48 +280,15 @@ class Bierdurstmann(pygame.sprite.Sprite):
         self.rect.center = (int(self.pos.x), int(self.pos.y))
         self.collision_box.center = self.rect.center
 
-    def _custom_collisioncheck(self, collision):
-
-        if not self.collision_box.colliderect(collision):
-            return None
-
-        delta_links = self.collision_box.right - collision.rect.left
-        delta_rechts = collision.rect.right - self.collision_box.left
-        delta_oben = self.collision_box.bottom - collision.rect.top
-        delta_unten = collision.rect.bottom - self.collision_box.top
-
-        min_delta = min(delta_links, delta_rechts, delta_oben, delta_unten)
-
-        if min_delta == delta_links:
-            self.pos.x = collision.rect.left - (PLAYER_SIZE_H - 10)
-            return "rechts von ego"
-        elif min_delta == delta_rechts:
-            self.pos.x = collision.rect.right + (PLAYER_SIZE_H - 10)
-            return "links von ego"
-        elif min_delta == delta_oben:
-            self.pos.y = collision.rect.top - (PLAYER_SIZE_H - 10)
-            return "unten von ego"
-        else:
-            self.pos.y = collision.rect.bottom + (PLAYER_SIZE_H - 10)
-            return "oben von ego"
-
-
-    def _check_collision(self, collisionbox_groups: List[pygame.sprite.Group]):
-            for group in collisionbox_groups:
-                collisions = pygame.sprite.spritecollide(self, group, False)
-                for col in collisions:
-                    if self._custom_collisioncheck(col):
-                        self.rect.center = (int(self.pos.x), int(self.pos.y))
-                        self.collision_box.center = self.rect.center
-                        return
-
+    @profiler.profile("collision")
+    def _check_collision(self, collision_indices: List[SpatialHash]):
+        ## one broadphase query for the whole swept area, then move and slide along every contact
+        half_size = (COLLISION_HALF_SIZE, COLLISION_HALF_SIZE)
+        area = swept_bounds(self.pos, half_size, self.displacement)
+        rects = [box.rect for index in collision_indices for box in index.query(area)]
+        move_and_slide(self.pos, half_size, self.displacement, rects)
+        self.displacement.update(0, 0)
 
-
-
-
-                
-
-            
     def _move_interaction_box(self):
         new_rect = copy.deepcopy(self.interaction_box.rect)
         if self.direction.x > 0:
@@ -312,8 +301,8 @@ class Bierdurstmann(pygame.sprite.Sprite):
             new_rect.bottomleft = self.rect.topleft
         self.interaction_box.rect = new_rect
 
-    def _check_interaction(self, collisionbox_groups: pygame.sprite.Group):
-        data = self.interaction_box.check(collisionbox_groups)
+    def _check_interaction(self, index: SpatialHash):
+        data = self.interaction_box.check(index)
         return data
     
     def _handle_post_interaction(self, interaction_data: dict, portal_data:dict):
@@ -321,7 +310,7 @@ class Bierdurstmann(pygame.sprite.Sprite):
             self.inventory.add_trash_bin_content(interaction_data['content'])
             self.show_message(interaction_data['msg'])
         elif interaction_data['type'] == INTERACTION_TYPES.OTHER_PLAYER_INTERACTION:
-            pass
+            self.show_message(interaction_data['msg'])
         else:
             pass
 
@@ -330,17 +319,20 @@ class Bierdurstmann(pygame.sprite.Sprite):
         else:
             pass
 
-    def update(self, dt, events: List[pygame.event.Event], collisionbox_groups: List[pygame.sprite.Group], interaction_group: pygame.sprite.Group, portal_group: pygame.sprite.Group):
+    def update(self, dt, events: List[pygame.event.Event], collision_indices: List[SpatialHash], interaction_index: SpatialHash, portal_index: SpatialHash, npcs = None):
+        self.prev_pos.update(self.pos)
         self.timstamp += dt
         self._handle_inputs(events)
         self._move(dt)
+        self._check_collision(collision_indices)
         self._animate(dt)
-        self._check_collision(collisionbox_groups)
         self._move_interaction_box()
         self.state.update(dt)
         if self.interact:
-            interaction_data = self._check_interaction(interaction_group)
-            portal_data = self._check_interaction(portal_group)
+            interaction_data = self._check_interaction(interaction_index)
+            if interaction_data['type'] == INTERACTION_TYPES.UNDEFINED and npcs is not None:
+                interaction_data = self.interaction_box.check_npcs(npcs)
+            portal_data = self._check_interaction(portal_index)
             self._handle_post_interaction(interaction_data, portal_data)
 
     def get_portal_destination(self):
@@ -350,7 +342,16 @@ class Bierdurstmann(pygame.sprite.Sprite):
 
     def update_pos(self, pos: pygame.Vector2):
         self.pos = pos
+        self.prev_pos.update(pos)
         self.rect.center = self.pos
 
+    def hold_position(self):
+        ## for steps in which the player isn't updated (menus, message boxes, fades),
+        ## otherwise render_pos keeps swinging between the last two positions
+        self.prev_pos.update(self.pos)
+
+    def render_pos(self, alpha: float) -> pygame.Vector2:
+        return self.prev_pos.lerp(self.pos, alpha)
+
     def get_data(self):
         return self.inventory.content['money'],  self.state.bierdurst, self.state.suff
\ No newline at end of file
@@ -13,10 +13,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-import pygame, copy, math, os, enum, random
+import pygame, copy, math, os, enum
 from typing import List
 from ..utils.sprite_utils import load_sprite
 from ..utils.params import *
+from ..utils.rng import rng
+from ..utils.catch_up import sample_renewals, multinomial, binomial, sum_uniform
 
 
 
@@ -51,8 +53,27 @@ class CollisionBox(pygame.sprite.Sprite):
         self.rect.topleft = pos
 
 
+## chance of a refill adding cans, bottles, trash or money, see TrashBin._update_content
+TRASH_BIN_REFILL_PROBABILITIES = (0.95 * 0.4 * 0.5, 0.95 * 0.4 * 0.5, 0.95 * 0.6, 0.05)
+
+def add_refills(content: dict, count: int):
+    ## Adds the combined result of `count` refills to `content`. Refills only ever add,
+    ## so capping once at the end gives the same result as capping after every refill
+    cans, bottles, trash, money = multinomial(count, TRASH_BIN_REFILL_PROBABILITIES)
+    content["can"] = _add_bottles_cans(content["can"], cans)
+    content["bottle"] = _add_bottles_cans(content["bottle"], bottles)
+    content["trash"] = min(content["trash"] + binomial(trash, 0.5), 2)
+    content["money"] += sum_uniform(money, TRASH_BIN_MAX_MONEY)
+
+def _add_bottles_cans(value: int, refills: int) -> int:
+    ## stops drawing once the cap is reached
+    while refills > 0 and value < TRASH_BIN_MAX_CANS_BOTTLES:
+        value += rng.randint(0, TRASH_BIN_MAX_CANS_BOTTLES_RANDOM)
+        refills -= 1
+    return min(value, TRASH_BIN_MAX_CANS_BOTTLES)
+
 class TrashBin(pygame.sprite.Sprite):
-    def __init__(self, pos, surf, group):
+    def __init__(self, pos, surf, group, scheduler = None):
         super().__init__(group)
         self.image = surf
         self.rect = self.image.get_rect(topleft = pos)
@@ -66,7 +87,12 @@ class TrashBin(pygame.sprite.Sprite):
         }
 
         self.time = 0
-        self.renew_time = random.randint(TRASH_BIN_CONTENT_UPDATE_MIN, TRASH_BIN_CONTENT_UPDATE_MAX)
+        self.renew_time = rng.randint(TRASH_BIN_CONTENT_UPDATE_MIN, TRASH_BIN_CONTENT_UPDATE_MAX)
+        ## with a scheduler the bin is only touched when a refill is due, update() isn't needed then
+        self.scheduler = scheduler
+        self.refill_entry = None
+        if self.scheduler is not None:
+            self.refill_entry = self.scheduler.schedule(self.renew_time, self._refill)
     
     def _reset(self):
         self.content = {
@@ -77,21 +103,22 @@ class TrashBin(pygame.sprite.Sprite):
         }
 
     def _generate_msg(self):
-        if self.content['bottle'] == 0 and self.content['can'] == 0 and self.content['trash'] == 0 and self.content['money'] == 0:
+        content = self.content
+        if content['bottle'] == 0 and content['can'] == 0 and content['trash'] == 0 and content['money'] == 0:
             return "Der Mülleimer ist leer"
         else:
             bottle_msg = ""
             can_msg = ""
             trash_msg = ""
             money_msg = ""
-            if self.content['bottle'] > 0:
-                bottle_msg = f"{self.content['bottle']} Pfandflaschen"
-            if self.content['can'] > 0:
-                can_msg = f"{self.content['can']} Pfanddosen"
-            if self.content['trash'] > 0:
-                trash_msg = f"{self.content['trash']} Stücke Müll"
-            if self.content['money'] > 0:
-                money_msg = f"{self.content['money']:.2f} € an Geld"
+            if content['bottle'] > 0:
+                bottle_msg = f"{content['bottle']} Pfandflaschen"
+            if content['can'] > 0:
+                can_msg = f"{content['can']} Pfanddosen"
+            if content['trash'] > 0:
+                trash_msg = f"{content['trash']} Stücke Müll"
+            if content['money'] > 0:
+                money_msg = f"{content['money']:.2f} € an Geld"
 
 
             msg = f"Du hast folgende Gegenstände gefunden:        {bottle_msg} {can_msg} {trash_msg} {money_msg}"
@@ -107,13 +134,13 @@ class TrashBin(pygame.sprite.Sprite):
         print(f"content: {self.content}, time: {self.time}, renew_time: {self.renew_time}")
 
     def _update_content(self):
-        value = random.uniform(0, 1)
+        value = rng.uniform(0, 1)
         if value < 0.95:
             ## generate "Flaschen", "Dosen", Müll"
-            if random.uniform(0, 1) > 0.6:
+            if rng.uniform(0, 1) > 0.6:
                 ## generate Flaschen/Dosen
-                num_bottles_cans = random.randint(0, TRASH_BIN_MAX_CANS_BOTTLES_RANDOM)
-                foo = random.randint(0, 1)
+                num_bottles_cans = rng.randint(0, TRASH_BIN_MAX_CANS_BOTTLES_RANDOM)
+                foo = rng.randint(0, 1)
                 if foo == 0:
                     self.content["can"] += num_bottles_cans
                     self.content["can"] = min(self.content["can"], TRASH_BIN_MAX_CANS_BOTTLES)
@@ -121,21 +148,85 @@ class TrashBin(pygame.sprite.Sprite):
                     self.content["bottle"] += num_bottles_cans
                     self.content["bottle"] = min(self.content["bottle"], TRASH_BIN_MAX_CANS_BOTTLES)
             else:
-                num_trash = random.randint(0, 1)
+                num_trash = rng.randint(0, 1)
                 self.content["trash"] += num_trash
                 self.content["trash"] = min(self.content["trash"], 2)
 
         else:
-            money = random.uniform(0, TRASH_BIN_MAX_MONEY)
+            money = rng.uniform(0, TRASH_BIN_MAX_MONEY)
             self.content["money"] += money
 
     def update(self, dt):
         self.time += dt
         if self.time > self.renew_time:
             self.time = 0
-            self.renew_time = random.randint(TRASH_BIN_CONTENT_UPDATE_MIN, TRASH_BIN_CONTENT_UPDATE_MAX)
+            self.renew_time = rng.randint(TRASH_BIN_CONTENT_UPDATE_MIN, TRASH_BIN_CONTENT_UPDATE_MAX)
             self._update_content()
 
+    def _refill(self):
+        self.renew_time = rng.randint(TRASH_BIN_CONTENT_UPDATE_MIN, TRASH_BIN_CONTENT_UPDATE_MAX)
+        self._update_content()
+        self.refill_entry = self.scheduler.schedule(self.renew_time, self._refill)
+
+    def catch_up(self, elapsed: float):
+        ## Advances the bin by `elapsed` seconds in one step. With a scheduler the refill
+        ## is rescheduled relative to the scheduler's current time, which the scene
+        ## advances by `elapsed` afterwards.
+        if self.scheduler is not None:
+            first_due = self.refill_entry[0] - self.scheduler.now
+        else:
+            first_due = self.renew_time - self.time
+        count, interval, next_due = sample_renewals(elapsed, first_due, TRASH_BIN_CONTENT_UPDATE_MIN, TRASH_BIN_CONTENT_UPDATE_MAX)
+        if count:
+            content = self.content
+            add_refills(content, count)
+            self.content = content
+            self.renew_time = interval
+        if self.scheduler is not None:
+            self.scheduler.cancel(self.refill_entry)
+            self.refill_entry = self.scheduler.schedule(elapsed + next_due, self._refill)
+        else:
+            self.time = self.renew_time - next_due
+
+class TrashBinView(TrashBin):
+    ## TrashBin whose content and timers live in a row of a TrashBinStore, the store
+    ## refills all bins at once, so the sprite itself has nothing to update
+    def __init__(self, pos, surf, group, store):
+        pygame.sprite.Sprite.__init__(self, group)
+        self.image = surf
+        self.rect = self.image.get_rect(topleft = pos)
+        self.store = store
+        self.index = store.add()
+
+    @property
+    def content(self):
+        return self.store.content(self.index)
+
+    @content.setter
+    def content(self, content):
+        self.store.set_content(self.index, content)
+
+    @property
+    def time(self):
+        return float(self.store.time[self.index])
+
+    @property
+    def renew_time(self):
+        return float(self.store.renew_time[self.index])
+
+    def update(self, dt):
+        pass
+
+    ## the store owns the bin's state, everything which changes it goes through there
+    def catch_up(self, elapsed: float):
+        self.store.catch_up_bin(self.index, elapsed)
+
+    def _update_content(self):
+        self.store.update_content(self.index)
+
+    def _refill(self):
+        self.store.refill(self.index)
+
 class Portal(pygame.sprite.Sprite):
     def __init__(self, pos, size, group, destination: str):
         super().__init__(group)
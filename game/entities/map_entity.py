@@ -18,33 +18,70 @@ from typing import List
 from ..utils.sprite_utils import load_sprite
 from ..utils.params import *
 
-class Tile(pygame.sprite.Sprite):
+class MapChunk(pygame.sprite.Sprite):
     def __init__(self, pos, surf, group):
         super().__init__(group)
         self.image = surf
-        if not surf:
-            print(f"pos: {pos}")
-            print("FOOOOOO")
         self.rect = self.image.get_rect(topleft = pos)
 
-class MapEntity(pygame.sprite.Sprite):
-    def __init__(self, layers, map_w, map_h, group):
-        super().__init__(group)
+class BakedChunk:
+    ## Composited tile layers of one chunk, before conversion to the display format
+    def __init__(self, pos, surface: pygame.Surface, opaque: bool):
+        self.pos = pos
+        self.surface = surface
+        self.opaque = opaque
+
+def bake_map_chunks(layers, map_w, map_h) -> List[BakedChunk]:
+    ## Bake all tile layers into fixed size chunks, so the camera only has
+    ## to blit the few chunks which intersect the viewport
+    map_rect = pygame.rect.Rect(0, 0, map_w * TILE_SIZE, map_h * TILE_SIZE)
+    surfaces = {}
+    for layer in layers:
+        if hasattr(layer, 'data'):
+            for x, y, surf in layer.tiles():
+                _bake_tile(surfaces, map_rect, (x * TILE_SIZE, y * TILE_SIZE), surf)
+
+    chunks = []
+    for (chunk_x, chunk_y), surf in surfaces.items():
+        pos = (chunk_x * MAP_CHUNK_SIZE, chunk_y * MAP_CHUNK_SIZE)
+        ## chunks fully covered by opaque ground tiles don't need per pixel alpha
+        w, h = surf.get_size()
+        opaque = pygame.mask.from_surface(surf, 254).count() == w * h
+        chunks.append(BakedChunk(pos, surf, opaque))
+    return chunks
+
+def _bake_tile(surfaces: dict, map_rect: pygame.Rect, pos, surf: pygame.Surface):
+    tile_rect = surf.get_rect(topleft = pos).clip(map_rect)
+    if tile_rect.width == 0 or tile_rect.height == 0:
+        return
+    ## a tile can be bigger than the grid or sit on a chunk border
+    for chunk_y in range(tile_rect.top // MAP_CHUNK_SIZE, (tile_rect.bottom - 1) // MAP_CHUNK_SIZE + 1):
+        for chunk_x in range(tile_rect.left // MAP_CHUNK_SIZE, (tile_rect.right - 1) // MAP_CHUNK_SIZE + 1):
+            chunk = surfaces.get((chunk_x, chunk_y))
+            if chunk is None:
+                chunk_rect = pygame.rect.Rect(chunk_x * MAP_CHUNK_SIZE, chunk_y * MAP_CHUNK_SIZE, MAP_CHUNK_SIZE, MAP_CHUNK_SIZE).clip(map_rect)
+                chunk = pygame.Surface(chunk_rect.size, pygame.SRCALPHA)
+                surfaces[(chunk_x, chunk_y)] = chunk
+            chunk.blit(surf, (pos[0] - chunk_x * MAP_CHUNK_SIZE, pos[1] - chunk_y * MAP_CHUNK_SIZE))
 
-        self.tiles = pygame.sprite.Group()
-        self.layers = layers
-        self.width = map_w * 16
-        self.height = map_h * 16
-        for layer in self.layers:
-            if hasattr(layer, 'data'):
-                for x,y,surf in layer.tiles():
-                    pos = (x * 16, y * 16)
-                    Tile(pos, surf, self.tiles)
-
-        self.image = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        self.rect = self.image.get_rect()
-        self.rect.topleft = (0, 0)
-        self.tiles.draw(self.image)
+class MapEntity:
+    def __init__(self, chunks: List[BakedChunk], width, height, group):
+        self.width = width
+        self.height = height
+        self.rect = pygame.rect.Rect(0, 0, self.width, self.height)
+
+        self.chunks = [MapChunk(chunk.pos, self._convert_chunk(chunk), group) for chunk in chunks]
 
     def update(self):
-        pass
\ No newline at end of file
+        pass
+
+    # ------------------------- #
+    # 'Private Methods'         #
+    # ------------------------- #
+
+    def _convert_chunk(self, chunk: BakedChunk) -> pygame.Surface:
+        if pygame.display.get_surface() is None:
+            return chunk.surface
+        if chunk.opaque:
+            return chunk.surface.convert()
+        return chunk.surface.convert_alpha()
\ No newline at end of file
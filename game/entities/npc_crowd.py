@@ -0,0 +1,209 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, enum, hashlib
+import numpy as np
+from typing import List, Optional, Tuple
+from ..utils.params import *
+from ..utils.rng import rng
+from .bierdurstmann_entity import load_player_frames
+
+
+class NPC_KIND(enum.Enum):
+    PEDESTRIAN = 0
+    BOTTLE_COLLECTOR = 1
+
+NPC_MESSAGES = {
+    NPC_KIND.PEDESTRIAN: ("Passant: Schönen Tag noch!", "Passant: Keine Zeit, keine Zeit!", "Passant: Kalt heute, oder?"),
+    NPC_KIND.BOTTLE_COLLECTOR: ("Flaschensammler: Das ist mein Revier!", "Flaschensammler: Die Mülleimer hier sind leer, glaub mir.",
+                                "Flaschensammler: Am Bahnhof gibt's mehr Pfand.")
+}
+
+DIRECTIONS = ("up", "left", "down", "right")
+_DIRECTION_VECTORS = np.array([(0, -1), (-1, 0), (0, 1), (1, 0)], np.float64)
+
+
+## Pedestrians and other bottle collectors of a scene. Their state lives in arrays,
+## one row per NPC, and is updated in batches: they wander around, turn when the
+## occupancy grid (built from the collision boxes) blocks their way, and NPCs off
+## screen are only updated every NPC_OFFSCREEN_UPDATE_INTERVAL ticks with the time
+## they missed. They aren't sprites, the camera asks collect_visible() what to draw.
+class NpcCrowd:
+    def __init__(self, capacity: int = 64):
+        ## seeded from the gameplay rng, so recordings replay the same crowd
+        self.generator = np.random.default_rng(rng.getrandbits(64))
+        self.size = 0
+        self.tick = 0
+        self.frames = None
+        self.blocked = None
+        self._allocate(capacity)
+
+    def __len__(self):
+        return self.size
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def build_grid(self, width: int, height: int, *groups):
+        ## cells which overlap a sprite of the groups (collision boxes, trash bins...) are blocked
+        cell = NPC_GRID_CELL_SIZE
+        self.blocked = np.zeros((-(-height // cell), -(-width // cell)), bool)
+        for group in groups:
+            for sprite in group:
+                rect = sprite.rect
+                self.blocked[max(rect.top, 0) // cell:(rect.bottom - 1) // cell + 1,
+                             max(rect.left, 0) // cell:(rect.right - 1) // cell + 1] = True
+
+    def spawn(self, count: int, kind: NPC_KIND):
+        ## on random free cells of the grid
+        if count <= 0:
+            return
+        if self.frames is None:
+            self.frames = load_player_frames()
+        free = np.flatnonzero(~self.blocked)
+        cells = self.generator.choice(free, count)
+        rows, cols = np.divmod(cells, self.blocked.shape[1])
+
+        while self.size + count > len(self.kind):
+            self._allocate(2 * len(self.kind))
+        new = slice(self.size, self.size + count)
+        self.pos[new, 0] = (cols + 0.5) * NPC_GRID_CELL_SIZE
+        self.pos[new, 1] = (rows + 0.5) * NPC_GRID_CELL_SIZE
+        self.prev_pos[new] = self.pos[new]
+        self.direction[new] = self.generator.integers(0, 4, count)
+        self.walking[new] = False
+        self.walk_time[new] = 0.0
+        self.anim_time[new] = 0.0
+        self.frame[new] = 0
+        self.pending[new] = 0.0
+        self.kind[new] = kind.value
+        self.size += count
+
+    def update(self, dt: float, view: pygame.Rect):
+        ## view: the part of the world which is on screen
+        if self.size == 0:
+            return
+        self.tick += 1
+        n = self.size
+        self.prev_pos[:n] = self.pos[:n]
+        self.pending[:n] += dt
+        due = self._visible(view) | ((np.arange(n) + self.tick) % NPC_OFFSCREEN_UPDATE_INTERVAL == 0)
+        rows = np.flatnonzero(due)
+        step = self.pending[rows]
+        self.pending[rows] = 0.0
+
+        self._steer(rows, step)
+        self._move(rows, step)
+        self._animate(rows, step)
+
+    def hold_position(self):
+        ## for steps in which the scene isn't updated, like Bierdurstmann.hold_position
+        self.prev_pos[:self.size] = self.pos[:self.size]
+
+    def collect_visible(self, view: pygame.Rect, alpha: float = 1.0) -> List[Tuple[tuple, pygame.Surface, pygame.Rect]]:
+        ## (key, image, world rect) of everything in view, see CameraGroup. Positions are
+        ## interpolated between the last two steps like the player's, see render_pos
+        if self.size == 0:
+            return []
+        visible = []
+        rows = np.flatnonzero(self._visible(view))
+        positions = self.prev_pos[rows] + (self.pos[rows] - self.prev_pos[rows]) * alpha
+        for i, (x, y) in zip(rows, positions):
+            image = self.frames[DIRECTIONS[self.direction[i]]][self.frame[i]]
+            rect = pygame.rect.Rect(int(x) - PLAYER_SIZE_H, int(y) - PLAYER_SIZE_H, PLAYER_SIZE, PLAYER_SIZE)
+            visible.append(((self, i), image, rect))
+        return visible
+
+    def query(self, rect: pygame.Rect) -> Optional[int]:
+        ## first NPC overlapping rect
+        if self.size == 0:
+            return None
+        x, y = self.pos[:self.size, 0], self.pos[:self.size, 1]
+        hits = np.flatnonzero((x + PLAYER_SIZE_H > rect.left) & (x - PLAYER_SIZE_H < rect.right) &
+                              (y + PLAYER_SIZE_H > rect.top) & (y - PLAYER_SIZE_H < rect.bottom))
+        return int(hits[0]) if hits.size else None
+
+    def interact(self, index: int) -> str:
+        ## the NPC stops to talk
+        self.walking[index] = False
+        self.walk_time[index] = NPC_WALK_TIME_MAX
+        messages = NPC_MESSAGES[NPC_KIND(self.kind[index])]
+        return messages[rng.randint(0, len(messages) - 1)]
+
+    def digest(self) -> bytes:
+        n = self.size
+        state = b"".join(array[:n].tobytes() for array in (self.pos, self.direction, self.walking, self.walk_time, self.frame))
+        return hashlib.sha1(state).digest()
+
+    # ------------------------- #
+    # 'Private Methods'         #
+    # ------------------------- #
+
+    def _allocate(self, capacity: int):
+        def grow(name, shape, dtype):
+            array = np.zeros(shape, dtype)
+            if hasattr(self, name):
+                array[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, array)
+        grow("pos", (capacity, 2), np.float64)
+        ## position before the last update, for render interpolation
+        grow("prev_pos", (capacity, 2), np.float64)
+        grow("direction", capacity, np.int8)
+        grow("walking", capacity, bool)
+        grow("walk_time", capacity, np.float64)
+        grow("anim_time", capacity, np.float64)
+        grow("frame", capacity, np.int16)
+        grow("pending", capacity, np.float64)
+        grow("kind", capacity, np.int8)
+
+    def _visible(self, view: pygame.Rect) -> np.ndarray:
+        x, y = self.pos[:self.size, 0], self.pos[:self.size, 1]
+        return ((x > view.left - PLAYER_SIZE_H) & (x < view.right + PLAYER_SIZE_H) &
+                (y > view.top - PLAYER_SIZE_H) & (y < view.bottom + PLAYER_SIZE_H))
+
+    def _steer(self, rows: np.ndarray, step: np.ndarray):
+        ## NPCs whose walk is over pick a new direction, or stand still for a while
+        self.walk_time[rows] -= step
+        done = rows[self.walk_time[rows] <= 0]
+        if done.size:
+            count = done.size
+            self.direction[done] = self.generator.integers(0, 4, count)
+            self.walking[done] = self.generator.random(count) >= NPC_IDLE_CHANCE
+            self.walk_time[done] = self.generator.uniform(NPC_WALK_TIME_MIN, NPC_WALK_TIME_MAX, count)
+
+    def _move(self, rows: np.ndarray, step: np.ndarray):
+        walking = self.walking[rows]
+        rows, step = rows[walking], step[walking]
+        if not rows.size:
+            return
+        target = self.pos[rows] + _DIRECTION_VECTORS[self.direction[rows]] * (NPC_SPEED * step)[:, None]
+        cells = np.floor(target / NPC_GRID_CELL_SIZE).astype(np.intp)
+        rows_count, cols_count = self.blocked.shape
+        inside = (cells[:, 0] >= 0) & (cells[:, 0] < cols_count) & (cells[:, 1] >= 0) & (cells[:, 1] < rows_count)
+        free = inside.copy()
+        free[inside] = ~self.blocked[cells[inside, 1], cells[inside, 0]]
+
+        self.pos[rows[free]] = target[free]
+        ## blocked: stop and pick another direction on the next update
+        stopped = rows[~free]
+        self.walking[stopped] = False
+        self.walk_time[stopped] = 0.0
+
+    def _animate(self, rows: np.ndarray, step: np.ndarray):
+        ## same walk cycle speed as the player at the same speed
+        cycle = len(self.frames["up"])
+        walking = self.walking[rows]
+        self.anim_time[rows] = np.where(walking, self.anim_time[rows] + step * NPC_FRAME_FACTOR, 0.0) % cycle
+        self.frame[rows] = self.anim_time[rows].astype(np.int16)
@@ -0,0 +1,151 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import numpy as np
+from ..utils.params import *
+from ..utils.rng import rng
+from ..utils.catch_up import sample_renewals
+from .boxes_entity import add_refills
+
+## Struct of arrays for the state of many trash bins: content, time since the last
+## refill and renew time, one row per bin. update() advances all timers at once and
+## refills the due bins in one batch with vectorized random numbers, following the
+## same rules as TrashBin._update_content. TrashBinView sprites read and write their row.
+class TrashBinStore:
+    def __init__(self, capacity: int = 256):
+        ## seeded from the gameplay rng, so recordings replay the same refills
+        self.generator = np.random.default_rng(rng.getrandbits(64))
+        self.size = 0
+        self._allocate(capacity)
+
+    def __len__(self):
+        return self.size
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def add(self) -> int:
+        if self.size == len(self.time):
+            self._allocate(2 * len(self.time))
+        index = self.size
+        self.size += 1
+        self.bottle[index] = self.can[index] = self.trash[index] = 0
+        self.money[index] = 0.0
+        self.time[index] = 0.0
+        self.renew_time[index] = self._renew_times(1)[0]
+        return index
+
+    def update(self, dt: float) -> int:
+        ## returns the number of bins which were refilled
+        time = self.time[:self.size]
+        time += dt
+        due = np.flatnonzero(time > self.renew_time[:self.size])
+        if due.size:
+            time[due] = 0.0
+            self.renew_time[due] = self._renew_times(due.size)
+            self._refill(due)
+        return due.size
+
+    def catch_up(self, elapsed: float):
+        ## advances all bins by `elapsed` in one step, only bins with a refill in
+        ## between are sampled one by one
+        first_due = self.renew_time[:self.size] - self.time[:self.size]
+        quiet = first_due > elapsed
+        self.time[:self.size][quiet] += elapsed
+        for index in np.flatnonzero(~quiet):
+            self._catch_up_bin(index, elapsed)
+
+    def catch_up_bin(self, index: int, elapsed: float):
+        ## like catch_up, for a single bin
+        if self.renew_time[index] - self.time[index] > elapsed:
+            self.time[index] += elapsed
+        else:
+            self._catch_up_bin(index, elapsed)
+
+    def refill(self, index: int):
+        ## refills one bin now and restarts its timer, like TrashBin._refill
+        self.time[index] = 0.0
+        self.renew_time[index] = self._renew_times(1)[0]
+        self._refill(np.array([index]))
+
+    def update_content(self, index: int):
+        ## one refill of the content only, like TrashBin._update_content
+        self._refill(np.array([index]))
+
+    def content(self, index: int) -> dict:
+        return {
+            "bottle": int(self.bottle[index]),
+            "can": int(self.can[index]),
+            "trash": int(self.trash[index]),
+            "money": float(self.money[index])
+        }
+
+    def set_content(self, index: int, content: dict):
+        self.bottle[index] = content["bottle"]
+        self.can[index] = content["can"]
+        self.trash[index] = content["trash"]
+        self.money[index] = content["money"]
+
+    # ------------------------- #
+    # 'Private Methods'         #
+    # ------------------------- #
+
+    def _allocate(self, capacity: int):
+        def grow(name, dtype):
+            array = np.zeros(capacity, dtype)
+            if hasattr(self, name):
+                array[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, array)
+        grow("bottle", np.int32)
+        grow("can", np.int32)
+        grow("trash", np.int32)
+        grow("money", np.float64)
+        grow("time", np.float64)
+        grow("renew_time", np.float64)
+
+    def _catch_up_bin(self, index: int, elapsed: float):
+        first_due = float(self.renew_time[index] - self.time[index])
+        count, interval, next_due = sample_renewals(elapsed, first_due, TRASH_BIN_CONTENT_UPDATE_MIN, TRASH_BIN_CONTENT_UPDATE_MAX)
+        content = self.content(index)
+        add_refills(content, count)
+        self.set_content(index, content)
+        self.renew_time[index] = interval
+        self.time[index] = interval - next_due
+
+    def _renew_times(self, count: int) -> np.ndarray:
+        return self.generator.integers(TRASH_BIN_CONTENT_UPDATE_MIN, TRASH_BIN_CONTENT_UPDATE_MAX + 1, count)
+
+    def _refill(self, bins: np.ndarray):
+        ## every draw is made for every bin, each rule then picks the rows it applies to
+        count = bins.size
+        gen = self.generator
+        found_items = gen.random(count) < 0.95
+        bottles_or_cans = gen.random(count) > 0.6
+        num_bottles_cans = gen.integers(0, TRASH_BIN_MAX_CANS_BOTTLES_RANDOM + 1, count)
+        is_can = gen.integers(0, 2, count) == 0
+        num_trash = gen.integers(0, 2, count)
+        money = gen.uniform(0, TRASH_BIN_MAX_MONEY, count)
+
+        ## 95%: items, of these 40% bottles or cans (half each) and 60% trash
+        containers = found_items & bottles_or_cans
+        rows = containers & is_can
+        self.can[bins[rows]] = np.minimum(self.can[bins[rows]] + num_bottles_cans[rows], TRASH_BIN_MAX_CANS_BOTTLES)
+        rows = containers & ~is_can
+        self.bottle[bins[rows]] = np.minimum(self.bottle[bins[rows]] + num_bottles_cans[rows], TRASH_BIN_MAX_CANS_BOTTLES)
+        rows = found_items & ~bottles_or_cans
+        self.trash[bins[rows]] = np.minimum(self.trash[bins[rows]] + num_trash[rows], 2)
+        ## 5%: money
+        rows = ~found_items
+        self.money[bins[rows]] += money[rows]
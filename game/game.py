@@ -13,58 +13,196 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-import pygame, sys, math, random, copy
+import pygame, os, sys, math, random, copy
 from .utils.params import *
 from .level.base_level import LEVELS
 from .level.main_menu import MainMenuLevel
-from .level.game_level import GameLevel
+from .utils.background import BackgroundTask
+from .utils.startup import startup
+from .utils.input import keyboard, InputScript
+from .utils.rng import seed_gameplay
+from .utils.profiler import profiler
+from .utils.replay_log import ReplayRecorder, ReplayReader
+## GameLevel (and with it the entities, scenes and pytmx) is imported once it is needed
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless: bool = False, render: bool = True, skip_menu: bool = False,
+                 input_source = None, record_file: str = None, seed: int = None):
+        self.headless = headless
+        self.render_enabled = render
+
+        ## input from a script or a replay instead of the keyboard, optionally recorded
+        self.tick = 0
+        self.input_source = input_source
+        self.scripted_keys = keyboard.use_script() if input_source else None
+        self.seed = seed_gameplay(seed)
+        self.recorder = ReplayRecorder(record_file, self.seed, SIMULATION_HZ) if record_file else None
+        ## recordings and replays need every load to finish on the same tick
+        self.deterministic = input_source is not None or record_file is not None
+
+        if headless:
+            ## no window and no audio device, e.g. for soak tests and bots on CI machines
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
         pygame.init()
 
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption("Winterchaos - Gut/Schlecht?")
+        startup.mark("display init")
 
         self.clock = pygame.time.Clock()
         self.dt = self.clock.tick(FPS) / 1000.0
 
         self.events = pygame.event.get()
+        ## simulation time which hasn't been stepped yet, and input waiting for the next step
+        self.accumulator = 0.0
+        self.pending_events = []
 
-        self.current_level = MainMenuLevel(self._start_game, self._stop_game)
         self.running = True
+        self.start_requested = False
+        if skip_menu:
+            self.current_level = self._create_game_level()
+            self.game_level_task = None
+        else:
+            self.current_level = MainMenuLevel(self._start_game, self._stop_game)
+            ## the game level is built on a worker thread while the menu is shown
+            use_background = FAST_STARTUP and not headless and not self.deterministic
+            self.game_level_task = BackgroundTask(self._create_game_level) if use_background else None
+
+    def _create_game_level(self):
+        from .level.game_level import GameLevel
+        level = GameLevel(blocking_loads=self.deterministic)
+        startup.mark("game ready")
+        return level
 
     def _start_game(self):
-        self.current_level = GameLevel()
+        if self.game_level_task is None:
+            self.current_level = self._create_game_level()
+        else:
+            ## switched over in _update as soon as the level is ready
+            self.start_requested = True
 
     def _stop_game(self):
         self.running = False
 
     def run(self):
         while self.running:
-            self.dt = self.clock.tick(FPS) / 1000.0
+            frame_time = self.clock.tick(FPS) / 1000.0
+            profiler.begin_frame()
+            with profiler.zone("events"):
+                self.events = pygame.event.get()
+                self._handle_events()
+            self.pending_events.extend(self.events)
+
+            ## fixed timestep: the simulation always advances by SIMULATION_DT
+            self.accumulator += min(frame_time, SIMULATION_DT * MAX_CATCHUP_STEPS)
+            self.dt = SIMULATION_DT
+            steps = 0
+            while self.accumulator >= SIMULATION_DT and steps < MAX_CATCHUP_STEPS:
+                self._update()
+                self.accumulator -= SIMULATION_DT
+                steps += 1
+            if steps == MAX_CATCHUP_STEPS:
+                self.accumulator = min(self.accumulator, SIMULATION_DT)
+
+            if self.render_enabled:
+                self.current_level.set_render_alpha(self.accumulator / SIMULATION_DT)
+                self._render()
+
+            if isinstance(self.input_source, ReplayReader) and self.tick >= self.input_source.length:
+                self.running = False
+            profiler.end_frame()
+
+        self._shutdown()
+
+    def simulate(self, ticks: int, script: InputScript = None) -> int:
+        ## Runs up to `ticks` simulation steps as fast as possible, without waiting for
+        ## the clock. With a script, held keys and key events only come from the script.
+        ## Returns the number of steps which were run.
+        if script:
+            self.input_source = script
+            self.scripted_keys = keyboard.use_script()
+            ## the level may already exist, it has to wait for its loads from now on
+            self.deterministic = True
+            if hasattr(self.current_level, "blocking_loads"):
+                self.current_level.blocking_loads = True
+        self.dt = SIMULATION_DT
+        for tick in range(ticks):
+            if not self.running:
+                return tick
             self.events = pygame.event.get()
             self._handle_events()
+            self.pending_events.extend(self.events)
             self._update()
-            self._render()
+            if self.render_enabled:
+                self.current_level.set_render_alpha(1.0)
+                self._render()
+        return ticks
 
-        self._shutdown()
-
-    # ------------------------- #
-    # 'Private Methods'         #
-    # ------------------------- #
     def _handle_events(self):
         for e in self.events:
             if e.type == pygame.QUIT:
                 self.running = False
+            elif e.type == pygame.KEYDOWN:
+                if e.key == pygame.K_F3:
+                    profiler.toggle_overlay()
+                    if profiler.overlay is None:
+                        ## its pixels are still on the screen, dirty rects wouldn't cover them
+                        self.current_level.request_full_redraw()
+                elif e.key == pygame.K_F4:
+                    profiler.dump_trace()
 
+    def finish(self) -> bytes:
+        ## Ends recording (or checks a replay) and returns the digest of the world state
+        digest = self.current_level.world_digest()
+        if self.recorder:
+            self.recorder.close(digest)
+            self.recorder = None
+        if isinstance(self.input_source, ReplayReader) and self.input_source.digest:
+            if digest == self.input_source.digest:
+                print(f"replay: {self.tick} ticks, world state matches the recording")
+            else:
+                print(f"replay: {self.tick} ticks, world state DIVERGED from the recording "
+                      f"({digest.hex()} != {self.input_source.digest.hex()})")
+        return digest
+
+    # ------------------------- #
+    # 'Private Methods'         #
+    # ------------------------- #
+    @profiler.profile("update")
     def _update(self):
-        self.current_level.update(self.dt, self.events)
+        ## queued input is handed to the first step, so no key press gets lost or repeated
+        events, self.pending_events = self.pending_events, []
+        if self.input_source is not None:
+            ## only quitting still comes from the real event queue
+            events = [e for e in events if e.type == pygame.QUIT]
+            events.extend(self.input_source.apply(self.tick, self.scripted_keys))
+            if isinstance(self.input_source, ReplayReader) and self.tick < self.input_source.length:
+                self.dt = self.input_source.dt(self.tick)
+        if self.recorder:
+            self.recorder.record(self.dt, keyboard.get_pressed(), events)
+        self.current_level.update(self.dt, events)
+        self.tick += 1
+        if self.start_requested and self.game_level_task.done:
+            self.current_level = self.game_level_task.result()
+            self.game_level_task = None
+            self.start_requested = False
 
     def _render(self):
-        self.current_level.render(self.screen)
-        pygame.display.flip()
+        with profiler.zone("render"):
+            dirty_rects = self.current_level.render(self.screen)
+        if profiler.overlay is not None:
+            ## the overlay changes every frame, it always needs a full flip
+            profiler.draw_overlay(self.screen)
+            dirty_rects = None
+        with profiler.zone("flip"):
+            if dirty_rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty_rects)
+        startup.mark("first frame")
 
     def _shutdown(self):
+        self.finish()
         pygame.quit()
         sys.exit()
\ No newline at end of file
@@ -0,0 +1,56 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, argparse, time
+from .utils.params import *
+from .utils.input import InputScript
+from .game import Game
+
+## Runs the game world without a display or audio device and as fast as the CPU
+## allows, driven by scripted input. Run it from the repository root:
+##     python -m game.headless --ticks 36000 --script soak.txt
+##     python -m game.headless --ticks 3600 --render    (also renders every step)
+
+def run_headless(ticks: int, script: InputScript = None, render: bool = False) -> dict:
+    ## with the script as input source from the start, the level is built with blocking loads
+    game = Game(headless=True, render=render, skip_menu=True, input_source=script)
+
+    start = time.perf_counter()
+    steps = game.simulate(ticks)
+    wall_time = time.perf_counter() - start
+
+    simulated_time = steps * SIMULATION_DT
+    return {
+        "ticks": steps,
+        "simulated_s": simulated_time,
+        "wall_s": wall_time,
+        "ticks_per_s": steps / wall_time if wall_time > 0 else 0.0,
+        "speedup": simulated_time / wall_time if wall_time > 0 else 0.0
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the game simulation headless and faster than real time")
+    parser.add_argument("--ticks", type=int, default=None, help=f"simulation steps at {SIMULATION_HZ} Hz, default: length of the script")
+    parser.add_argument("--script", default=None, help="input script, see game/utils/input.py")
+    parser.add_argument("--render", action="store_true", help="render every step (into a dummy display)")
+    args = parser.parse_args()
+
+    script = InputScript.load(args.script) if args.script else None
+    ticks = args.ticks if args.ticks is not None else (script.length if script else SIMULATION_HZ * 60)
+
+    stats = run_headless(ticks, script, args.render)
+    pygame.quit()
+    print(f"{stats['ticks']} ticks ({stats['simulated_s']:.1f} s simulated) in {stats['wall_s']:.2f} s: "
+          f"{stats['ticks_per_s']:.0f} ticks/s, {stats['speedup']:.1f}x real time")
@@ -13,7 +13,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 from abc import ABC, abstractmethod
-import enum, pygame
+import enum, pygame, hashlib
 from typing import List
 
 class LEVELS(enum.Enum):
@@ -29,10 +29,25 @@ class BaseLevel(ABC):
     def update(self, dt:float, events: List[pygame.event.Event]):
         pass
 
+    ## Fraction of a simulation step (0..1) which passed since the last update,
+    ## set before every render so moving things can be drawn in between two steps
+    def set_render_alpha(self, alpha: float):
+        pass
+
+    ## May return the list of screen rects which changed, None means the whole screen
     @abstractmethod
     def render(self, screen: pygame.Surface):
         pass
 
+    ## Something was drawn over the screen outside of the level (e.g. the profiler
+    ## overlay), the next render has to cover the whole screen again
+    def request_full_redraw(self):
+        pass
+
+    ## Hash of the simulated state, replays compare it against the recording
+    def world_digest(self) -> bytes:
+        return hashlib.sha1().digest()
+
     @abstractmethod
     def reset(self):
         pass
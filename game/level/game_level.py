@@ -12,14 +12,18 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
-import pygame, copy, os, enum, time
-from pytmx.util_pygame import load_pygame
+import pygame, os, enum, time, hashlib
 from typing import List
 from ..utils.params import *
 from .base_level import BaseLevel
 from ..entities.bierdurstmann_entity import Bierdurstmann
 from ..entities.boxes_entity import CollisionBox, TrashBin, PORTAL_DESTINATION
 from ..entities.map_entity import MapEntity
+from ..utils.spatial_hash import SpatialHash
+from ..utils.utils import merge_rects
+from ..utils.background import BackgroundTask
+from .transitions import create_transition
+from ..utils.profiler import profiler
 from .game_level_stuff.info_boxes import GameMenu, GameInfoPanel, InteractionTextBox, InventoryMenu
 from .game_level_stuff.main_world_scene import GAME_SCENE_STATE
 from .game_level_stuff.main_world_scene import MainWorldScene
@@ -38,36 +42,119 @@ class GAME_WORLDS(enum.Enum):
 class LEVEL_STATE(enum.Enum):
     RUNNING = 1
     TRANSITION = 2
+    TRANSITION_IN = 3
 
 class CameraGroup:
     def __init__(self):
         self.offset = pygame.Vector2()
+        ## one spatial index per static sprite group, rebuilt when the group changes in size
+        self.indices = {}
+        ## what was on screen last frame, sprite -> (image, screen rect), for dirty rect rendering
+        self.drawn = None
+        self.drawn_offset = None
+        ## render interpolation between the last two simulation steps, see set_render_alpha
+        self.alpha = 1.0
+        self.player_rect = pygame.rect.Rect(0, 0, 0, 0)
+
+    def invalidate(self, group: pygame.sprite.AbstractGroup = None):
+        if group is None:
+            self.indices.clear()
+        else:
+            self.indices.pop(group, None)
 
-    def custom_drawing(self, player_group: pygame.sprite.GroupSingle, screen: pygame.Surface, *sprite_groups):
-        self.offset.x = int(player_group.sprite.pos.x) - WIDTH_H
-        self.offset.y = int(player_group.sprite.pos.y) - HEIGHT_H
-        
+    def reset_tracking(self):
+        self.drawn = None
+        self.drawn_offset = None
+
+    def collect_dirty_rects(self, player_group: pygame.sprite.GroupSingle, screen_rect: pygame.Rect, *sprite_groups):
+        ## Returns the screen rects which changed since the last call, or None if the
+        ## camera scrolled (or nothing was tracked yet) and the whole screen is dirty
+        offset_x, offset_y = self._compute_offset(player_group.sprite)
+        view = screen_rect.move(offset_x, offset_y)
+
+        drawn = {}
         for group in sprite_groups:
-            for sprite in group:
-                offset_rect = copy.deepcopy(sprite.rect)
-                offset_rect.center -= self.offset
-                screen.blit(sprite.image, offset_rect)
+            if hasattr(group, "collect_visible"):
+                for key, image, rect in group.collect_visible(view, self.alpha):
+                    drawn[key] = (image, rect.move(-offset_x, -offset_y))
+                continue
+            for sprite in self._get_index(group).query(view):
+                drawn[sprite] = (sprite.image, sprite.rect.move(-offset_x, -offset_y))
+        player = player_group.sprite
+        drawn[player] = (player.image, self.player_rect.move(-offset_x, -offset_y))
+
+        previous, previous_offset = self.drawn, self.drawn_offset
+        self.drawn, self.drawn_offset = drawn, (offset_x, offset_y)
+        if previous is None or previous_offset != self.drawn_offset:
+            return None
+
+        dirty_rects = []
+        for sprite, (image, rect) in drawn.items():
+            old = previous.pop(sprite, None)
+            if old is None:
+                dirty_rects.append(rect)
+            elif old[0] is not image or old[1] != rect:
+                dirty_rects.append(rect)
+                dirty_rects.append(old[1])
+        ## sprites which left the screen or were removed
+        for image, rect in previous.values():
+            dirty_rects.append(rect)
+        return dirty_rects
+
+    @profiler.profile("camera.draw")
+    def custom_drawing(self, player_group: pygame.sprite.GroupSingle, screen: pygame.Surface, *sprite_groups):
+        offset_x, offset_y = self._compute_offset(player_group.sprite)
 
-        offset_rect = copy.deepcopy(player_group.sprite.rect)
-        offset_rect.center -= self.offset
-        screen.blit(player_group.sprite.image, offset_rect)
+        ## only what overlaps the (clipped) screen in world coordinates gets drawn
+        view = screen.get_clip().move(offset_x, offset_y)
 
+        blit_sequence = []
+        for group in sprite_groups:
+            if hasattr(group, "collect_visible"):
+                ## moving crowds (NpcCrowd) aren't sprites, they report what is in view themselves
+                for key, image, rect in group.collect_visible(view, self.alpha):
+                    blit_sequence.append((image, (rect.x - offset_x, rect.y - offset_y)))
+                continue
+            for sprite in self._get_index(group).query(view):
+                rect = sprite.rect
+                blit_sequence.append((sprite.image, (rect.x - offset_x, rect.y - offset_y)))
+
+        rect = self.player_rect
+        blit_sequence.append((player_group.sprite.image, (rect.x - offset_x, rect.y - offset_y)))
+
+        if hasattr(screen, "fblits"):
+            screen.fblits(blit_sequence)
+        else:
+            screen.blits(blit_sequence, False)
 
+    def _compute_offset(self, player):
+        ## the player (and with it the camera) is drawn in between its last two positions
+        pos = player.render_pos(self.alpha)
+        self.player_rect.size = player.image.get_size()
+        self.player_rect.center = (int(pos.x), int(pos.y))
+        self.offset.x = int(pos.x) - WIDTH_H
+        self.offset.y = int(pos.y) - HEIGHT_H
+        return int(self.offset.x), int(self.offset.y)
+
+    def _get_index(self, group: pygame.sprite.AbstractGroup) -> SpatialHash:
+        entry = self.indices.get(group)
+        if entry is None or entry[1] != len(group):
+            index = SpatialHash()
+            index.build(group)
+            entry = (index, len(group))
+            self.indices[group] = entry
+        return entry[0]
 
 
-class GameLevel(BaseLevel):
-    def __init__(self):
 
-        # start_time = time.time_ns()
 
+class GameLevel(BaseLevel):
+    def __init__(self, blocking_loads: bool = False):
         self.camera = CameraGroup()
         self.current_world = GAME_WORLDS.NORMAL_WORLD
         self.level_state = LEVEL_STATE.RUNNING
+        ## simulated time of the active scene, inactive scenes catch up to it when entered
+        self.world_time = 0.0
         self.scenes = {
             GAME_WORLDS.NORMAL_WORLD : None,
             GAME_WORLDS.REWE_WORLD : None
@@ -89,25 +176,43 @@ class GameLevel(BaseLevel):
         self.interaction_textbox = InteractionTextBox(self.interaction_text_group)
 
         
-        self.transition_alpha = 0
+        self.transition = create_transition(TRANSITION_EFFECT, (WIDTH, HEIGHT))
+        ## the destination scene is loaded on a worker thread while the old one fades out
+        self.next_world = None
+        self.preload_task = None
+        ## wait for the preload instead, so scene switches happen on the same tick in replays
+        self.blocking_loads = blocking_loads
+
+        ## Dirty rect rendering
+        self.full_redraw = True
+        self.hud_dirty = False
+        self.hud_data = None
+        self.overlay_state = None
         
         self._init()
 
-        # end_time = time.time_ns()
-        # duration = (end_time - start_time) / (1000**2)
-        # print(f"duration loading: {duration}")
-
     # ------------------------- #
     # 'Public Methods'          #
     # ------------------------- #
 
+    def set_render_alpha(self, alpha: float):
+        self.camera.alpha = alpha
+
+    def request_full_redraw(self):
+        self.full_redraw = True
+
     def show_interaction_box(self, msg):
         self.show_message = True
         self.interaction_textbox.set_msg(msg)
         self.interaction_textbox._draw_message()
+        self.full_redraw = True
 
     def update(self, dt:float, events: List[pygame.event.Event]):
         self._handle_events(events)
+        if self.show_message or self.show_menu or self.show_inventory or self.level_state == LEVEL_STATE.TRANSITION:
+            ## the scene isn't stepped, so there is nothing to interpolate
+            self.player.hold_position()
+            self.scenes[self.current_world].npc_group.hold_position()
         if self.show_message:
             pass
         elif self.show_menu:
@@ -116,21 +221,22 @@ class GameLevel(BaseLevel):
             self.inventory_menu_group.update(self.player.inventory)
         else:
             if self.level_state == LEVEL_STATE.RUNNING:
-                self.scenes[self.current_world].update(dt, events)           
+                with profiler.zone("scene.update"):
+                    self.scenes[self.current_world].update(dt, events)
+                self.world_time += dt
                 self._update_panel()
             elif self.level_state == LEVEL_STATE.TRANSITION:
-                self.transition_alpha += 10
+                self.transition.update(dt)
+            elif self.level_state == LEVEL_STATE.TRANSITION_IN:
+                ## the new scene is already running while it fades in
+                self.transition.update(dt)
+                with profiler.zone("scene.update"):
+                    self.scenes[self.current_world].update(dt, events)
+                self.world_time += dt
+                self._update_panel()
 
             self._run_state_machine()
 
-    def _draw_transition(self, screen):
-        color = (0, 0, 0, self.transition_alpha)
-        background = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-        background.fill(color)
-
-
-        screen.blit(background, (0, 0))
-
     def _foo_testing(self, screen):
 
         # Farben definieren
@@ -184,13 +290,31 @@ class GameLevel(BaseLevel):
         
 
     def render(self, screen: pygame.Surface):
+        if not DIRTY_RECT_RENDERING:
+            self._render_frame(screen)
+            return None
+
+        dirty_rects = self._collect_dirty_rects(screen)
+        if dirty_rects is None:
+            self._render_frame(screen)
+            return [screen.get_rect()]
+
+        ## redraw the full layer stack, but only inside the changed regions
+        for rect in dirty_rects:
+            screen.set_clip(rect)
+            self._render_frame(screen)
+        screen.set_clip(None)
+        return dirty_rects
+
+    def _render_frame(self, screen: pygame.Surface):
         ## Delete content
         screen.fill('black')
 
 
-        self.scenes[self.current_world].render(screen)
-        if self.level_state == LEVEL_STATE.TRANSITION:
-            self._draw_transition(screen)
+        with profiler.zone("scene.render"):
+            self.scenes[self.current_world].render(screen)
+        if self.level_state != LEVEL_STATE.RUNNING:
+            self.transition.draw(screen)
         
         ## Drawing Menus and Panels
         self.info_panel_group.draw(screen)
@@ -202,6 +326,18 @@ class GameLevel(BaseLevel):
             self.inventory_menu_group.draw(screen)
 
 
+    def world_digest(self) -> bytes:
+        ## everything the simulation changes, floats with their exact repr
+        state = [self.current_world.name, self.level_state.name, repr(self.world_time), repr(tuple(self.player.pos)),
+                 sorted(self.player.inventory.content.items()),
+                 (self.player.state.suff, self.player.state.bierdurst, repr(self.player.state.time))]
+        for world, scene in self.scenes.items():
+            state.append((world.name, repr(scene.scheduler.now), len(scene.scheduler), scene.npc_group.digest().hex()))
+            for sprite in scene.interaction_object_groups:
+                if isinstance(sprite, TrashBin):
+                    state.append((world.name, sprite.rect.topleft, sorted(sprite.content.items()), repr(sprite.time), sprite.renew_time))
+        return hashlib.sha1(repr(state).encode("utf-8")).digest()
+
     def reset(self):
         pass
 
@@ -214,6 +350,27 @@ class GameLevel(BaseLevel):
     def _update_panel(self):
         money, bierdurst, suff = self.player.get_data()
         self.info_panel_group.update(money, bierdurst, suff)
+        if self.hud_data != (money, bierdurst, suff):
+            self.hud_data = (money, bierdurst, suff)
+            self.hud_dirty = True
+
+    def _collect_dirty_rects(self, screen: pygame.Surface):
+        scene = self.scenes[self.current_world]
+        ## the camera has to see every frame to know what changed
+        camera_rects = self.camera.collect_dirty_rects(scene.player_group, screen.get_rect(), *scene.render_groups)
+
+        overlay_state = (self.current_world, self.level_state, self.show_menu, self.show_message, self.show_inventory)
+        full_redraw = self.full_redraw or camera_rects is None or overlay_state != self.overlay_state or self.level_state != LEVEL_STATE.RUNNING
+        self.overlay_state = overlay_state
+        self.full_redraw = False
+        if full_redraw:
+            self.hud_dirty = False
+            return None
+
+        if self.hud_dirty:
+            camera_rects.append(self.info_panel.rect)
+            self.hud_dirty = False
+        return merge_rects(camera_rects)
 
     def _handle_events(self, events: List[pygame.event.Event]):
         for e in events:
@@ -239,6 +396,9 @@ class GameLevel(BaseLevel):
 
         self.scenes[GAME_WORLDS.NORMAL_WORLD] = MainWorldScene(self.camera, None, MAIN_WORLD_MAP_FILE)
         self.scenes[GAME_WORLDS.REWE_WORLD] = GroceryWorldScene(self.camera, None, GROCERY_MAP_FILE)
+        for world, scene in self.scenes.items():
+            if world != self.current_world:
+                scene.suspend(self.world_time)
 
         self._init_state_machine()
 
@@ -249,9 +409,18 @@ class GameLevel(BaseLevel):
     def _init_state_machine(self):
         self.scenes[self.current_world].init_scene(self.player)
 
+    def _destination_world(self, destination: PORTAL_DESTINATION) -> GAME_WORLDS:
+        if destination == PORTAL_DESTINATION.TO_NORMAL_WORLD:
+            return GAME_WORLDS.NORMAL_WORLD
+        elif destination == PORTAL_DESTINATION.TO_REWE_WOLRD:
+            return GAME_WORLDS.REWE_WORLD
+        return None
+
     def _transition_to_new_state(self, new_state: GAME_WORLDS):
         self.scenes[self.current_world].teardown()
+        self.scenes[self.current_world].suspend(self.world_time)
         self.current_world = new_state
+        self.scenes[self.current_world].resume(self.world_time)
         self.scenes[self.current_world].init_scene(self.player)
 
     def _run_state_machine(self):
@@ -259,15 +428,24 @@ class GameLevel(BaseLevel):
         if self.level_state == LEVEL_STATE.RUNNING:
             if self.scenes[self.current_world].state == GAME_SCENE_STATE.TRANSITION_TO:
                 self.level_state = LEVEL_STATE.TRANSITION
+                self.transition.start()
+                self.next_world = self._destination_world(self.scenes[self.current_world].destination)
+                if self.next_world is not None:
+                    self.preload_task = BackgroundTask(self.scenes[self.next_world].prepare)
         elif self.level_state == LEVEL_STATE.TRANSITION:
-            if self.transition_alpha > 255:
+            ## the screen stays covered until the destination scene has finished loading
+            if self.transition.out_done and (self.preload_task is None or self.preload_task.done or self.blocking_loads):
+                self.level_state = LEVEL_STATE.TRANSITION_IN
+                self.transition.begin_in()
+                if self.preload_task is not None:
+                    self.preload_task.result()
+                    self.preload_task = None
+                if self.next_world is not None:
+                    self._transition_to_new_state(self.next_world)
+                    self.next_world = None
+        elif self.level_state == LEVEL_STATE.TRANSITION_IN:
+            if self.transition.in_done:
                 self.level_state = LEVEL_STATE.RUNNING
-                self.transition_alpha = 0
-                destination = self.scenes[self.current_world].destination
-                print(destination)
-                if destination == PORTAL_DESTINATION.TO_NORMAL_WORLD:
-                    self._transition_to_new_state(GAME_WORLDS.NORMAL_WORLD)
-                elif destination == PORTAL_DESTINATION.TO_REWE_WOLRD:
-                    self._transition_to_new_state(GAME_WORLDS.REWE_WORLD)
+                self.transition.stop()
                 
 
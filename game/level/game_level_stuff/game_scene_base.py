@@ -14,10 +14,12 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 import pygame, copy, os, enum
 from abc import ABC, abstractclassmethod
-from pytmx.util_pygame import load_pygame
 from typing import List
 from ...utils.params import *
+from ...utils.spatial_hash import SpatialHash
+from ...utils.scheduler import Scheduler
 from ...entities.bierdurstmann_entity import Bierdurstmann
+from ...entities.npc_crowd import NpcCrowd
 
 
 class GAME_SCENE_STATE(enum.Enum):
@@ -45,16 +47,58 @@ class GameScene(ABC):
 
         self.collision_box_group = pygame.sprite.Group()
         self.portals_group = pygame.sprite.Group()
-        self.npc_group = pygame.sprite.Group()
+        self.npc_group = NpcCrowd()
         self.interaction_object_groups = pygame.sprite.Group()
+        ## broadphase indices for the groups above, the player queries these instead of the groups
+        self.collision_index = SpatialHash(COLLISION_CELL_SIZE)
+        self.interaction_index = SpatialHash(COLLISION_CELL_SIZE)
+        self.portal_index = SpatialHash(COLLISION_CELL_SIZE)
+        ## timed events of the scene (trash bin refills), runs on scene time
+        self.scheduler = Scheduler()
+        ## world time at which the scene was left, it is caught up when entered again
+        self.suspended_at = None
 
-        self.map_group = pygame.sprite.GroupSingle()
+        self.map_group = pygame.sprite.Group()
+        ## groups drawn by the camera (besides the player), in draw order
+        self.render_groups = [self.map_group]
+
+    def build_indices(self):
+        ## boxes are static, they are indexed once after the scene has created them
+        self.collision_index.build(self.collision_box_group)
+        self.interaction_index.build(self.interaction_object_groups)
+        self.portal_index.build(self.portals_group)
+
+    def suspend(self, now: float):
+        self.suspended_at = now
+
+    def resume(self, now: float):
+        if self.suspended_at is not None and now > self.suspended_at:
+            self.catch_up(now - self.suspended_at)
+        self.suspended_at = None
+
+    def catch_up(self, elapsed: float):
+        ## Advances the scene by the time it wasn't active. Scenes with a lot of timed
+        ## state override this with something cheaper than running all of its events.
+        self.scheduler.advance(elapsed)
+
+    def view_rect(self) -> pygame.Rect:
+        ## the part of the world the camera shows, centered on the player
+        rect = pygame.rect.Rect(0, 0, WIDTH, HEIGHT)
+        rect.center = (int(self.player.pos.x), int(self.player.pos.y))
+        return rect
+
+    def prepare(self):
+        ## Loads what init_scene needs without touching sprite groups, so it can run
+        ## on a worker thread while the previous scene is still fading out
+        pass
 
     @abstractclassmethod
     def init_scene(self, player: Bierdurstmann):
         self.player = player
         self.player_group = pygame.sprite.GroupSingle()
         self.player_group.add(self.player)
+        ## static groups are (re)built on scene init, drop the camera's stale culling indices
+        self.camera.invalidate()
 
     @abstractclassmethod 
     def update(self, dt: float, events: List[pygame.event.Event]):
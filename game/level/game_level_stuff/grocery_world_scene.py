@@ -16,6 +16,7 @@ import pygame, copy, enum, random
 from typing import List
 from .game_scene_base import *
 from ...entities.map_entity import MapEntity
+from ...utils.map_cache import load_map
 from ...entities.boxes_entity import CollisionBox, Portal, Pfandautomat
 
 
@@ -24,18 +25,20 @@ from ...entities.boxes_entity import CollisionBox, Portal, Pfandautomat
 class GroceryWorldScene(GameScene):
     def __init__(self, camera, bg_music_file: str, map_file: str):
         super().__init__(camera, bg_music_file, map_file)
+        self.baked_map = None
+
+    def prepare(self):
+        if self.baked_map is None:
+            self.baked_map = load_map(self.map_file)
 
     def init_scene(self, player: Bierdurstmann):
         super().init_scene(player)
-        self.tmx_data = load_pygame(self.map_file)
-        self.tmx_layers = self.tmx_data.layers
-        self.tmx_objectgroups = self.tmx_data.objectgroups
-        self.tmx_w = self.tmx_data.width
-        self.tmx_h = self.tmx_data.height
-
-        self.map = MapEntity(self.tmx_layers, self.tmx_w, self.tmx_h, self.map_group)
+        ## usually done already, while the portal transition was fading out
+        self.prepare()
+        baked_map = self.baked_map
+        self.map = MapEntity(baked_map.chunks, baked_map.width, baked_map.height, self.map_group)
 
-        for group in self.tmx_objectgroups:
+        for group in baked_map.object_groups:
             if group.name == "collision_boxes":
                 for obj in group:
                     pos = (obj.x, obj.y)
@@ -62,21 +65,24 @@ class GroceryWorldScene(GameScene):
 
             self.state = GAME_SCENE_STATE.RUNNING
 
+        self.build_indices()
+
     def update(self, dt: float, events: List[pygame.event.Event]):
         # self.map_group.update()
-        self.player.update(dt, events, [self.collision_box_group, self.interaction_object_groups], self.interaction_object_groups, self.portals_group)
+        self.player.update(dt, events, [self.collision_index, self.interaction_index], self.interaction_index, self.portal_index)
         destination = self.player.get_portal_destination()
         if destination:
             self.state = GAME_SCENE_STATE.TRANSITION_TO
             self.destination = destination
 
     def render(self, screen: pygame.Surface):
-        self.camera.custom_drawing(self.player_group, screen, self.map_group)
+        self.camera.custom_drawing(self.player_group, screen, *self.render_groups)
 
 
     def teardown(self):
         super().teardown()
         self.collision_box_group.empty()
         self.portals_group.empty()
+        self.map_group.empty()
         self.destination = None
         self.state = GAME_SCENE_STATE.SHUTDOWN
\ No newline at end of file
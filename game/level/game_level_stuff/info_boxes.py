@@ -14,78 +14,65 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 import pygame, copy, os
 from ...utils.params import *
-from ...utils.utils import drawText
+from ...utils.utils import text_area
+from ...utils.text_cache import text_cache
+from ...utils.assets import assets
+from ...utils.widgets import Widget, Panel, Label, TextBlock, ImageWidget
 from ..base_level import BaseLevel
 from ...entities.bierdurstmann_entity import Bierdurstmann, BierdurstmannInventory
 from ...entities.boxes_entity import CollisionBox, TrashBin
 from ...entities.map_entity import MapEntity
 
+## All panels below are widget trees, their surfaces are only redrawn
+## when the state they are bound to changes.
+
 class GameMenu(pygame.sprite.Sprite):
     def __init__(self, group):
         super().__init__(group)
 
-        self.image = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        self.rect = self.image.get_rect()
-        self.rect.topleft = (0, 0)
-
-        self.background = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        self.background.fill("gray")
-        self.background.set_alpha(150)
-        self.background_rect = self.image.get_rect()
-        self.background_rect.topleft = (0, 0)
+        self.root = Widget((0, 0, WIDTH, HEIGHT))
+        self.background = Panel((0, 0, WIDTH, HEIGHT), (*pygame.Color("gray")[:3], 150), parent = self.root)
 
         self.w = WIDTH * 0.5
         self.h = HEIGHT * 0.8
-        self.menu_image = pygame.Surface((self.w, self.h), pygame.SRCALPHA)
-        self.menu_image.fill('white')
-        self.menu_rect = self.menu_image.get_rect(center = (WIDTH_H, HEIGHT_H))
+        menu_rect = pygame.rect.Rect(0, 0, self.w, self.h)
+        menu_rect.center = (WIDTH_H, HEIGHT_H)
+        self.menu = Panel(menu_rect, 'white', parent = self.root)
 
-        self.image.blit(self.background, self.background_rect)
-        self.image.blit(self.menu_image, self.menu_rect)
+        self.root.refresh()
+        self.image = self.root.image
+        self.rect = self.image.get_rect(topleft = (0, 0))
 
 class GameInfoPanel(pygame.sprite.Sprite):
     def __init__(self, group):
         super().__init__(group)
 
-        self.image = pygame.Surface((WIDTH, 40), pygame.SRCALPHA)
-        self.image.fill('white')
-        self.image.set_alpha(255)
-        self.rect = self.image.get_rect(topleft = (0, 0))
-
         self.money = 0
         self.suff_level = 0
         self.bierdurst = 0
 
-        self.font = pygame.font.Font(FONT_PATH, 24)
+        self.font = text_cache.get_font(FONT_PATH, 24)
 
-        self._draw_content()
-
-    def _draw_content(self):
         padding_horizontal = 10
-        self.image.fill('white')
-
-        money_text = self.font.render(f"Geld: {self.money:.2f} €", True, (0, 0, 0))
-        sufflevel_text = self.font.render(f"Suff: {self.suff_level}", True, (0, 0, 0))
-        bierdurst_text = self.font.render(f"Bierdurst: {self.bierdurst}", True, (0, 0, 0))
-
-
-        money_rect = money_text.get_rect()
-        money_rect.midleft = (padding_horizontal, 20)
-        sufflevel_rect = sufflevel_text.get_rect()
-        sufflevel_rect.midright = (WIDTH - padding_horizontal, 20)
-        bierdurst_rect = bierdurst_text.get_rect()
-        bierdurst_rect.center = (WIDTH_H, 20)
-
-        self.image.blit(money_text, money_rect)
-        self.image.blit(sufflevel_text, sufflevel_rect)
-        self.image.blit(bierdurst_text, bierdurst_rect)
+        label_w = WIDTH // 3 - padding_horizontal
+        self.root = Panel((0, 0, WIDTH, 40), 'white')
+        Label((padding_horizontal, 0, label_w, 40), self.font, anchor = "midleft", parent = self.root).bind(lambda: f"Geld: {self.money:.2f} €")
+        Label((WIDTH_H - label_w // 2, 0, label_w, 40), self.font, anchor = "center", parent = self.root).bind(lambda: f"Bierdurst: {self.bierdurst}")
+        Label((WIDTH - padding_horizontal - label_w, 0, label_w, 40), self.font, anchor = "midright", parent = self.root).bind(lambda: f"Suff: {self.suff_level}")
+
+        self._refresh()
+        self.image = self.root.image
+        self.rect = self.image.get_rect(topleft = (0, 0))
 
+    def _refresh(self) -> bool:
+        self.root.sync()
+        return len(self.root.refresh()) > 0
 
     def update(self, money, bierdurst, suff):
         self.money = money
         self.bierdurst = bierdurst
         self.suff_level = suff
-        self._draw_content()
+        self._refresh()
 
 class InteractionTextBox(pygame.sprite.Sprite):
     def __init__(self, group: pygame.sprite.GroupSingle):
@@ -94,28 +81,25 @@ class InteractionTextBox(pygame.sprite.Sprite):
         self.w = 0.5 * WIDTH
         self.h = 0.2 * HEIGHT
 
-        self.image = pygame.Surface((self.w, self.h), pygame.SRCALPHA)
-        self.rect = self.image.get_rect()
-        self.rect.midbottom = (WIDTH_H, HEIGHT - 20)
-
-        self.font = pygame.font.Font(FONT_PATH, 16)
-        self.hintfont = pygame.font.Font(FONT_PATH, 12)
+        self.font = text_cache.get_font(FONT_PATH, 16)
+        self.hintfont = text_cache.get_font(FONT_PATH, 12)
         self.msg = ""
 
-    def _draw_message(self):
-        self.image.fill(pygame.SRCALPHA)
-
-        pygame.draw.rect(self.image, 'white', pygame.rect.Rect(0, 0, self.w, self.h), 0, 20)
-
-        drawText(self.image, self.msg, (0, 0, 0), self.font, True)
+        self.root = Panel((0, 0, self.w, self.h), 'white', 20)
+        ## the message is only laid out again when it changes
+        self.text = TextBlock(text_area(self.root.image), self.font, parent = self.root).bind(lambda: self.msg)
+        ## show disappear hints:
+        hint = Label((0, 0, self.w, self.hintfont.get_height()), self.hintfont, "Drücke Enter zum Fortfahren...", anchor = "midbottom", parent = self.root)
+        hint.rect.midbottom = (self.w // 2, self.h - 20)
 
-        # show disappear hints:
-
-        text = self.hintfont.render("Drücke Enter zum Fortfahren...", True, (0, 0, 0))
-        text_rect = text.get_rect()
-        text_rect.midbottom = (self.w // 2, self.h - 20)
+        self._draw_message()
+        self.image = self.root.image
+        self.rect = self.image.get_rect()
+        self.rect.midbottom = (WIDTH_H, HEIGHT - 20)
 
-        self.image.blit(text, text_rect)
+    def _draw_message(self):
+        self.root.sync()
+        self.root.refresh()
 
     def set_msg(self, msg):
         self.msg = msg
@@ -123,6 +107,23 @@ class InteractionTextBox(pygame.sprite.Sprite):
     def update(self):
         self._draw_message()
 
+class InventoryItem(Widget):
+    ITEM_WIDTH = 150
+    ITEM_HEIGHT = 2 * INVENTORY_ICON_HEIGHT
+
+    def __init__(self, pos, subtext_str, image_path, content_font, hint_font, parent: Widget):
+        super().__init__(pygame.rect.Rect(pos, (self.ITEM_WIDTH, self.ITEM_HEIGHT)), parent)
+
+        width_h = self.ITEM_WIDTH // 2
+        image = assets.scaled_to_height(image_path, INVENTORY_ICON_HEIGHT)
+        image_rect = image.get_rect(midtop = (width_h, 0))
+        ImageWidget(image_rect, image, parent = self)
+
+        y = INVENTORY_ICON_HEIGHT + 4
+        self.value = Label((0, y, self.ITEM_WIDTH, content_font.get_height()), content_font, anchor = "midtop", parent = self)
+        y += content_font.get_height()
+        Label((0, y, self.ITEM_WIDTH, hint_font.get_height()), hint_font, subtext_str, anchor = "midtop", parent = self)
+
 class InventoryMenu(pygame.sprite.Sprite):
     def __init__(self, group: pygame.sprite.GroupSingle):
         super().__init__(group)
@@ -133,128 +134,66 @@ class InventoryMenu(pygame.sprite.Sprite):
         self.w_h = self.w // 2
         self.h_h = self.h // 2
 
-        self.image = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        self.rect = self.image.get_rect(topleft = (0, 0))
-
-        self.background = pygame.Surface((WIDTH, HEIGHT))
-        self.background.fill('white')
-        self.background.set_alpha(150)
-        self.background_rect = self.background.get_rect(topleft = (0, 0))
-
-        self.image.blit(self.background, self.background_rect)
-
-        self.content = pygame.Surface((self.w, self.h), pygame.SRCALPHA)
-        self.content_rect = self.content.get_rect(center = (WIDTH_H, HEIGHT_H))
-
         self.inventory = None
 
-        self.title_font = pygame.font.Font(FONT_PATH, 24)
-        self.content_font = pygame.font.Font(FONT_PATH, 18)
-        self.hint_font = pygame.font.Font(FONT_PATH, 14)
-
-    def _generate_item(self, text_str, subtext_str, image_path):
-        width = 150
-        width_h = width // 2
-        height = 2*96
-        surf = pygame.Surface((width, height), pygame.SRCALPHA)
-
+        self.title_font = text_cache.get_font(FONT_PATH, 24)
+        self.content_font = text_cache.get_font(FONT_PATH, 18)
+        self.hint_font = text_cache.get_font(FONT_PATH, 14)
 
-        image = pygame.image.load(image_path)
-        old_height = image.get_height()
-        target_height = 96 ## TODO: Move to params
-        scale_factor = target_height/old_height
-        image = pygame.transform.scale_by(image, scale_factor)
-        image_rect = image.get_rect()
-        image_rect.midtop = (width_h, 0)
-        y = 100
-        text = self.content_font.render(text_str, True, 'black')
-        text_rect = text.get_rect()
-        text_rect.midtop = (width_h, y)
-        y += (text.get_height())
-
-        subtext = self.hint_font.render(subtext_str, True, 'black')
-        subtext_rect = subtext.get_rect()
-        subtext_rect.midtop = (width_h, y)
-
-
-        surf.blit(image, image_rect)
-        surf.blit(text, text_rect)
-        surf.blit(subtext, subtext_rect)
-
-        return surf
+        self.root = Widget((0, 0, WIDTH, HEIGHT))
+        Panel((0, 0, WIDTH, HEIGHT), (255, 255, 255, 150), parent = self.root)
+        content_rect = pygame.rect.Rect(0, 0, self.w, self.h)
+        content_rect.center = (WIDTH_H, HEIGHT_H)
+        self.content = Panel(content_rect, 'white', 10, parent = self.root)
+        self._build_content()
 
+        self._refresh()
+        self.image = self.root.image
+        self.rect = self.image.get_rect(topleft = (0, 0))
 
-    def _render_text(self):
+    def _build_content(self):
         padding = 20
         y_start = padding
-        title_text = self.title_font.render("Inventar vom Bierdurstmann", True, 'black')
-        title_rect = title_text.get_rect()
-        title_rect.midtop = (self.w_h, y_start)
+        title = Label((0, y_start, self.w, self.title_font.get_height()), self.title_font, "Inventar vom Bierdurstmann", anchor = "midtop", parent = self.content)
 
         total_width = self.w - 2*padding
 
-        y_start += (padding + title_text.get_height())
+        y_start += (padding + title.rect.height)
 
-        money_surf = self._generate_item(f"{self.inventory.content['money']:.2f} €", "Geld", "game/assets/raw_images/coins.png")
-        beer_surf = self._generate_item(f"{self.inventory.content['beer']}", "Bier", "game/assets/raw_images/beer.png")
-        ## compute stuff
-        content_width = money_surf.get_width() + beer_surf.get_width()
-        empty_width = total_width - content_width
-        distance_width = empty_width // 3
-        x_start = padding + distance_width
-        ## create rects
-        money_rect = money_surf.get_rect()
-        money_rect.topleft = (x_start, y_start)
-        x_start += (distance_width + money_surf.get_width())
-        beer_rect = beer_surf.get_rect(topleft = (x_start, y_start))
-        
-
-        y_start += (money_surf.get_height())
-
-        bottle_surf = self._generate_item(f"{self.inventory.content['bottle']}", "Pfand Flaschen", "game/assets/raw_images/bottles.png")
-        can_surf = self._generate_item(f"{self.inventory.content['can']}", "Pfand Dosen", "game/assets/raw_images/cans.png")
-        trash_surf = self._generate_item(f"{self.inventory.content['trash']}", "Müll", "game/assets/raw_images/trash.png")
-        ## compute stuff
-        content_width = bottle_surf.get_width() + can_surf.get_width() + trash_surf.get_width()
-        empty_width = total_width - content_width
-        distance_width = empty_width // 4
+        ## first row: money and beer
+        distance_width = (total_width - 2 * InventoryItem.ITEM_WIDTH) // 3
         x_start = padding + distance_width
+        money = InventoryItem((x_start, y_start), "Geld", COINS_IMAGE, self.content_font, self.hint_font, self.content)
+        x_start += (distance_width + InventoryItem.ITEM_WIDTH)
+        beer = InventoryItem((x_start, y_start), "Bier", BEER_IMAGE, self.content_font, self.hint_font, self.content)
 
-        bottle_rect = bottle_surf.get_rect(topleft = (x_start, y_start))
-        x_start += (distance_width + bottle_surf.get_width())
+        y_start += InventoryItem.ITEM_HEIGHT
 
-        can_rect = can_surf.get_rect(topleft = (x_start, y_start))
-        x_start += (distance_width + can_surf.get_width())
-
-        trash_rect = trash_surf.get_rect(topleft = (x_start, y_start))
-
-
-        hint_text = self.hint_font.render("Drücke Escape um fortzufahren...", True, 'black')
-        hint_rect = hint_text.get_rect()
-        hint_rect.midbottom = (self.w_h, self.h - padding)
-
-        self.content.blit(title_text, title_rect)
-        self.content.blit(money_surf, money_rect)
-        self.content.blit(beer_surf, beer_rect)
-        self.content.blit(bottle_surf, bottle_rect)
-        self.content.blit(can_surf, can_rect)
-        self.content.blit(trash_surf, trash_rect)
-        self.content.blit(hint_text, hint_rect)
+        ## second row: bottles, cans and trash
+        distance_width = (total_width - 3 * InventoryItem.ITEM_WIDTH) // 4
+        x_start = padding + distance_width
+        bottle = InventoryItem((x_start, y_start), "Pfand Flaschen", BOTTLES_IMAGE, self.content_font, self.hint_font, self.content)
+        x_start += (distance_width + InventoryItem.ITEM_WIDTH)
+        can = InventoryItem((x_start, y_start), "Pfand Dosen", CANS_IMAGE, self.content_font, self.hint_font, self.content)
+        x_start += (distance_width + InventoryItem.ITEM_WIDTH)
+        trash = InventoryItem((x_start, y_start), "Müll", TRASH_IMAGE, self.content_font, self.hint_font, self.content)
 
-    def _draw_content(self):
-        self.image.fill(pygame.SRCALPHA)
-        self.image.blit(self.background, self.background_rect)
+        money.value.bind(lambda: f"{self.inventory.content['money']:.2f} €" if self.inventory else "")
+        beer.value.bind(lambda: self._item_count('beer'))
+        bottle.value.bind(lambda: self._item_count('bottle'))
+        can.value.bind(lambda: self._item_count('can'))
+        trash.value.bind(lambda: self._item_count('trash'))
 
-        self.content.fill(pygame.SRCALPHA)
-        ## draw Rect
+        hint = Label((0, 0, self.w, self.hint_font.get_height()), self.hint_font, "Drücke Escape um fortzufahren...", anchor = "midbottom", parent = self.content)
+        hint.rect.midbottom = (self.w_h, self.h - padding)
 
-        pygame.draw.rect(self.content, 'white', pygame.rect.Rect(0, 0, self.w, self.h), 0, 10)
-        ## Draw Text:
-        if self.inventory:
-            self._render_text()
+    def _item_count(self, key):
+        return f"{self.inventory.content[key]}" if self.inventory else ""
 
-        self.image.blit(self.content, self.content_rect)
+    def _refresh(self) -> bool:
+        self.root.sync()
+        return len(self.root.refresh()) > 0
 
     def update(self, inventory: BierdurstmannInventory):
         self.inventory = inventory
-        self._draw_content()
+        self._refresh()
@@ -16,7 +16,10 @@ import pygame, copy, enum, random
 from typing import List
 from .game_scene_base import *
 from ...entities.map_entity import MapEntity
-from ...entities.boxes_entity import CollisionBox, TrashBin, Portal
+from ...utils.map_cache import load_map
+from ...entities.boxes_entity import CollisionBox, TrashBin, TrashBinView, Portal
+from ...entities.trash_bin_store import TrashBinStore
+from ...entities.npc_crowd import NPC_KIND
 
 
 
@@ -26,20 +29,17 @@ class MainWorldScene(GameScene):
         super().__init__(camera, bg_music_file, map_file)
 
         self.trash_bins_group = pygame.sprite.Group()
+        self.trash_bin_store = TrashBinStore() if TRASH_BIN_STORE else None
+        self.render_groups = [self.map_group, self.interaction_object_groups, self.npc_group]
 
         self.create_world()
 
 
     def create_world(self):
-        self.tmx_data = load_pygame(self.map_file)
-        self.tmx_layers = self.tmx_data.layers
-        self.tmx_objectgroups = self.tmx_data.objectgroups
-        self.tmx_w = self.tmx_data.width
-        self.tmx_h = self.tmx_data.height
+        baked_map = load_map(self.map_file)
+        self.map = MapEntity(baked_map.chunks, baked_map.width, baked_map.height, self.map_group)
 
-        self.map = MapEntity(self.tmx_layers, self.tmx_w, self.tmx_h, self.map_group)
-
-        for group in self.tmx_objectgroups:
+        for group in baked_map.object_groups:
             if group.name == "collision_boxes":
                 for obj in group:
                     pos = (obj.x, obj.y)
@@ -49,7 +49,10 @@ class MainWorldScene(GameScene):
                 for obj in group:
                     pos = (obj.x, obj.y)
                     surf = obj.image
-                    TrashBin(pos, surf, self.interaction_object_groups)
+                    if self.trash_bin_store is not None:
+                        TrashBinView(pos, surf, self.interaction_object_groups, self.trash_bin_store)
+                    else:
+                        TrashBin(pos, surf, self.interaction_object_groups, self.scheduler)
             elif group.name == "portals":
                     for obj in group:
                         pos = (obj.x, obj.y)
@@ -61,6 +64,11 @@ class MainWorldScene(GameScene):
                     pos = pygame.Vector2(obj.x, obj.y)
                     self.last_player_pos = pos
 
+        self.build_indices()
+        self.npc_group.build_grid(baked_map.width, baked_map.height, self.collision_box_group, self.interaction_object_groups)
+        self.npc_group.spawn(NPC_MAIN_WORLD_PEDESTRIANS, NPC_KIND.PEDESTRIAN)
+        self.npc_group.spawn(NPC_MAIN_WORLD_COLLECTORS, NPC_KIND.BOTTLE_COLLECTOR)
+
     def init_scene(self, player: Bierdurstmann):
         super().init_scene(player)
 
@@ -68,16 +76,30 @@ class MainWorldScene(GameScene):
             self.player.update_pos(self.last_player_pos)
 
     def update(self, dt: float, events: List[pygame.event.Event]):
-        self.map_group.update()
-        self.interaction_object_groups.update(dt)
-        self.player.update(dt, events, [self.collision_box_group, self.interaction_object_groups], self.interaction_object_groups, self.portals_group)
+        self.map.update()
+        ## only the trash bins which are due for a refill are touched
+        if self.trash_bin_store is not None:
+            self.trash_bin_store.update(dt)
+        self.scheduler.advance(dt)
+        self.npc_group.update(dt, self.view_rect())
+        self.player.update(dt, events, [self.collision_index, self.interaction_index], self.interaction_index, self.portal_index, self.npc_group)
         destination = self.player.get_portal_destination()
         if destination:
             self.state = GAME_SCENE_STATE.TRANSITION_TO
             self.destination = destination
 
+    def catch_up(self, elapsed: float):
+        ## the refills the bins missed are sampled per bin instead of run one by one
+        if self.trash_bin_store is not None:
+            self.trash_bin_store.catch_up(elapsed)
+        else:
+            for sprite in self.interaction_object_groups:
+                if isinstance(sprite, TrashBin):
+                    sprite.catch_up(elapsed)
+        self.scheduler.advance(elapsed)
+
     def render(self, screen: pygame.Surface):
-        self.camera.custom_drawing(self.player_group, screen, self.map_group, self.interaction_object_groups)
+        self.camera.custom_drawing(self.player_group, screen, *self.render_groups)
 
     def teardown(self):
         self.last_player_pos = self.player.pos
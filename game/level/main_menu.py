@@ -12,35 +12,14 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
-import pygame, random, enum
+import pygame, enum
 from typing import List
 from .base_level import BaseLevel
 from ..utils.params import *
+from ..utils.text_cache import text_cache
+from ..utils.widgets import Widget, Panel, Label, TRANSPARENT
+from ..utils.particles import ParticleSystem
 
-class BackgroundBubbles(pygame.sprite.Sprite):
-    def __init__(self, group: pygame.sprite.Group, pos: pygame.Vector2 = None):
-        super().__init__(group)
-
-        self.radius = random.randint(BUBBLE_MIN_RADIUS, BUBBLE_MAX_RADIUS)
-        self.diameter = self.radius * 2
-        if pos:
-            self.pos = pos
-        else:
-         self.pos = pygame.Vector2(random.randint(0, WIDTH), HEIGHT + 10)
-        self.image = pygame.Surface((self.diameter, self.diameter), pygame.SRCALPHA)
-        self.rect = self.image.get_rect(center = self.pos)
-        alpha_value = min(255, 255 * (1 - (self.radius/BUBBLE_MAX_RADIUS)) + 100)
-        white = (255, 255, 255, alpha_value)
-
-        pygame.draw.circle(self.image, white, (self.radius, self.radius), self.radius)
-
-    def update(self, dt):
-        self.pos.y -= BASE_BUBBLE_SPEED * (1.0/self.radius) * dt
-        if self.pos.y < -self.radius:
-            self.kill()
-
-        self.rect.center = self.pos
-        
 class MainMenuBackground:
     def __init__(self):
 
@@ -48,23 +27,23 @@ class MainMenuBackground:
         self.image.fill(BEER_YELLOW)
         self.rect = self.image.get_rect(topleft = (0, 0))
 
-        self.bubbles = pygame.sprite.Group()
+        ## bubbles rise from just below the screen and are recycled once they left it at the top
+        self.bubbles = ParticleSystem(
+            MAX_BUBBLES,
+            pygame.rect.Rect(0, HEIGHT + 10, WIDTH, 0),
+            pygame.rect.Rect(0, 0, WIDTH, HEIGHT + 10),
+            (BUBBLE_MIN_RADIUS, BUBBLE_MAX_RADIUS),
+            BASE_BUBBLE_SPEED)
 
         margin = 20
-        for _ in range(MAX_BUBBLES):
-            pos = pygame.Vector2(random.randint(20, WIDTH-margin), random.randint(margin, HEIGHT - margin))
-            BackgroundBubbles(self.bubbles, pos)
+        self.bubbles.scatter(pygame.rect.Rect(margin, margin, WIDTH - 2 * margin, HEIGHT - 2 * margin))
+
     def update(self, dt):
         self.bubbles.update(dt)
-        
-        if len(self.bubbles) < MAX_BUBBLES:
-            BackgroundBubbles(self.bubbles)
-
 
     def render(self, screen: pygame.Surface):
-        self.image.fill(BEER_YELLOW)
-        self.bubbles.draw(self.image)
         screen.blit(self.image, self.rect)
+        self.bubbles.draw(screen)
         
 class MAIN_MENU_BUTTON(enum.Enum):
     START_GAME = 0
@@ -76,27 +55,30 @@ class MAIN_MENU_BUTTON(enum.Enum):
 
 
 
-class MainMenuButton():
-    def __init__(self, pos: pygame.Vector2, text:str, font: pygame.font.Font):
+class MainMenuButton(Widget):
+    def __init__(self, pos: pygame.Vector2, text:str, font: pygame.font.Font, parent: Widget = None):
+        rect = pygame.rect.Rect(0, 0, MENU_BTN_WIDTH, MENU_BTN_HEIGHT)
+        rect.center = pos
+        super().__init__(rect, parent)
 
         self.font = font
         self.text = text
         self.selected = False
-        self.image = pygame.Surface((MENU_BTN_WIDTH, MENU_BTN_HEIGHT), pygame.SRCALPHA)
-        self.rect = self.image.get_rect(center = pos)
-
 
     def draw(self, surface: pygame.Surface):
-
-        self.image.fill(pygame.SRCALPHA)
-        pygame.draw.rect(self.image, BTN_BACKGROUND_COLOR[self.selected], pygame.rect.Rect(0, 0, MENU_BTN_WIDTH, MENU_BTN_HEIGHT), 0, 20)
-        self.text_surf = self.font.render(self.text, True, BTN_TEXT_COLOR[self.selected])
+        surface.fill(TRANSPARENT)
+        pygame.draw.rect(surface, BTN_BACKGROUND_COLOR[self.selected], pygame.rect.Rect(0, 0, MENU_BTN_WIDTH, MENU_BTN_HEIGHT), 0, 20)
+        self.text_surf = text_cache.render(self.font, self.text, BTN_TEXT_COLOR[self.selected])
         self.text_rect = self.text_surf.get_rect(center = (MENU_BTN_WIDTH_H, MENU_BTN_HEIGHT_H))
-        self.image.blit(self.text_surf, self.text_rect)
-        surface.blit(self.image, self.rect)
+        surface.blit(self.text_surf, self.text_rect)
+
+    def on_bound_change(self, value):
+        self.update(value)
 
     def update(self, selected: bool):
-        self.selected = selected
+        if selected != self.selected:
+            self.selected = selected
+            self.invalidate()
 
 class MainMenu:
     def __init__(self, callback: callable):
@@ -104,28 +86,27 @@ class MainMenu:
         self.callback = callback
         self.selected_btn = MAIN_MENU_BUTTON.NONE
 
-        self.image = pygame.Surface((MENU_WIDTH, MENU_HEIGHT), pygame.SRCALPHA)
-        self.rect = self.image.get_rect()
+        self.root = Panel((0, 0, MENU_WIDTH, MENU_HEIGHT), 'white', 10)
+        self.rect = self.root.image.get_rect()
         self.rect.center = (WIDTH_H, HEIGHT_H)
 
-        self.font = pygame.font.Font(FONT_PATH, 30)
+        self.font = text_cache.get_font(FONT_PATH, 30)
         self.selected_btn = MAIN_MENU_BUTTON.START_GAME.value
         self.buttons = []
 
         current_y = MENU_MARGIN + MENU_BTN_HEIGHT_H
         btn_offset = BTN_MARGIN + MENU_BTN_HEIGHT
-        self.buttons.append(MainMenuButton(pygame.Vector2(MENU_WIDTH_H, current_y), "Spiel Starten", self.font))
-        current_y += btn_offset
-        self.buttons.append(MainMenuButton(pygame.Vector2(MENU_WIDTH_H, current_y), "Spiel Laden", self.font))
-        current_y += btn_offset
-        self.buttons.append(MainMenuButton(pygame.Vector2(MENU_WIDTH_H, current_y), "Einstellungen", self.font))
-        current_y += btn_offset
-        self.buttons.append(MainMenuButton(pygame.Vector2(MENU_WIDTH_H, current_y), "Hilfe", self.font))
-        current_y += btn_offset
-        self.buttons.append(MainMenuButton(pygame.Vector2(MENU_WIDTH_H, current_y), "Spiel Beenden", self.font))
+        for text in ["Spiel Starten", "Spiel Laden", "Einstellungen", "Hilfe", "Spiel Beenden"]:
+            self.buttons.append(MainMenuButton(pygame.Vector2(MENU_WIDTH_H, current_y), text, self.font, self.root))
+            current_y += btn_offset
 
+        ## buttons only redraw when the selection moves onto or away from them
+        for index, btn in enumerate(self.buttons):
+            btn.bind(lambda index=index: index == self.selected_btn)
 
-        
+        self.root.sync()
+        self.root.refresh()
+        self.image = self.root.image
 
     def update(self, dt: float, events: List[pygame.event.Event]):
         for e in events:
@@ -138,39 +119,29 @@ class MainMenu:
                     if self.selected_btn in range(MAIN_MENU_BUTTON.START_GAME.value, MAIN_MENU_BUTTON.QUIT.value + 1):
                         self.callback(self.selected_btn)
 
-        for index, btn in enumerate(self.buttons):
-            btn.update(index == self.selected_btn)
+        self.root.sync()
 
     
     def draw(self, screen):
-        self.image.lock
-
-        menu_rect = pygame.rect.Rect(0, 0, MENU_WIDTH, MENU_HEIGHT)
-        pygame.draw.rect(self.image, 'white', menu_rect,0, 10)
-
-        for btn in self.buttons:
-            btn.draw(self.image)
-
+        self.root.refresh()
         screen.blit(self.image, self.rect)
             
 class InterruptTextBox:
     def __init__(self):
-        self.image = pygame.Surface((500, 100), pygame.SRCALPHA)
-        self.rect = self.image.get_rect(center = (WIDTH_H, HEIGHT_H))
-
         self.text = ""
-        self.font = pygame.font.Font(FONT_PATH, 20)
+        self.font = text_cache.get_font(FONT_PATH, 20)
+
+        self.root = Panel((0, 0, 500, 100), 'white')
+        Label((0, 0, 500, 100), self.font, color = 'black', parent = self.root).bind(lambda: self.text)
+        self.image = self.root.image
+        self.rect = self.image.get_rect(center = (WIDTH_H, HEIGHT_H))
 
     def update_text(self, new_text: str):
         self.text = new_text
 
     def render(self, screen):
-        self.image.fill('white')
-
-        text = self.font.render(self.text, True, 'black')
-        text_rect = text.get_rect(center = (250, 50))
-
-        self.image.blit(text, text_rect)
+        self.root.sync()
+        self.root.refresh()
         screen.blit(self.image, self.rect)
 
 
@@ -180,7 +151,7 @@ class MainMenuLevel(BaseLevel):
         self.start_game = start_game
         self.stop_game = stop_game
 
-        self.font = pygame.font.Font(FONT_PATH, 24)
+        self.font = text_cache.get_font(FONT_PATH, 24)
         self.menu = MainMenu(self.menu_callback)
         self.interrupt_box = InterruptTextBox()
         self.interrupt = False
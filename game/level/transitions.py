@@ -0,0 +1,124 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+from abc import ABC, abstractmethod
+import enum, pygame
+from ..utils.params import *
+from ..utils.utils import clamp
+
+class TRANSITION_PHASE(enum.Enum):
+    IDLE = 0
+    OUT = 1     ## old scene is covered
+    IN = 2      ## new scene is revealed
+
+## A transition runs on elapsed time: the OUT phase covers the old scene, then the
+## level swaps the scene and calls begin_in(), the IN phase reveals the new one.
+## All buffers are allocated up front, draw() is a single blit per frame.
+class Transition(ABC):
+    def __init__(self, size, out_time: float, in_time: float):
+        self.size = size
+        self.out_time = out_time
+        self.in_time = in_time
+        self.phase = TRANSITION_PHASE.IDLE
+        self.elapsed = 0.0
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def start(self):
+        self.phase = TRANSITION_PHASE.OUT
+        self.elapsed = 0.0
+
+    def begin_in(self):
+        self.phase = TRANSITION_PHASE.IN
+        self.elapsed = 0.0
+
+    def stop(self):
+        self.phase = TRANSITION_PHASE.IDLE
+        self.elapsed = 0.0
+
+    def update(self, dt: float):
+        self.elapsed += dt
+
+    @property
+    def out_done(self) -> bool:
+        return self.phase == TRANSITION_PHASE.OUT and self.elapsed >= self.out_time
+
+    @property
+    def in_done(self) -> bool:
+        return self.phase == TRANSITION_PHASE.IN and self.elapsed >= self.in_time
+
+    @property
+    def coverage(self) -> float:
+        ## 0.0: scene fully visible, 1.0: scene fully covered
+        if self.phase == TRANSITION_PHASE.OUT:
+            return clamp(self.elapsed / self.out_time, 0.0, 1.0) if self.out_time > 0 else 1.0
+        elif self.phase == TRANSITION_PHASE.IN:
+            return clamp(1.0 - self.elapsed / self.in_time, 0.0, 1.0) if self.in_time > 0 else 0.0
+        return 0.0
+
+    @abstractmethod
+    def draw(self, screen: pygame.Surface):
+        pass
+
+
+class FadeTransition(Transition):
+    def __init__(self, size, out_time: float, in_time: float, color = (0, 0, 0)):
+        super().__init__(size, out_time, in_time)
+        self.buffer = pygame.Surface(size)
+        self.buffer.fill(color)
+
+    def draw(self, screen: pygame.Surface):
+        self.buffer.set_alpha(int(255 * self.coverage))
+        screen.blit(self.buffer, (0, 0))
+
+
+class CrossfadeTransition(Transition):
+    ## Keeps the last frame of the old scene and fades it out over the new one
+    def __init__(self, size, in_time: float):
+        super().__init__(size, 0.0, in_time)
+        self.buffer = pygame.Surface(size)
+
+    def draw(self, screen: pygame.Surface):
+        if self.phase == TRANSITION_PHASE.OUT:
+            self.buffer.blit(screen, (0, 0))
+        else:
+            self.buffer.set_alpha(int(255 * self.coverage))
+            screen.blit(self.buffer, (0, 0))
+
+
+class WipeTransition(Transition):
+    ## Covers the screen from left to right, then uncovers it in the same direction
+    def __init__(self, size, out_time: float, in_time: float, color = (0, 0, 0)):
+        super().__init__(size, out_time, in_time)
+        self.buffer = pygame.Surface(size)
+        self.buffer.fill(color)
+        self.area = pygame.rect.Rect((0, 0), size)
+
+    def draw(self, screen: pygame.Surface):
+        width = int(self.size[0] * self.coverage)
+        self.area.width = width
+        if self.phase == TRANSITION_PHASE.OUT:
+            screen.blit(self.buffer, (0, 0), self.area)
+        else:
+            screen.blit(self.buffer, (self.size[0] - width, 0), self.area)
+
+
+def create_transition(effect: str, size) -> Transition:
+    if effect == "crossfade":
+        return CrossfadeTransition(size, TRANSITION_IN_TIME)
+    elif effect == "wipe":
+        return WipeTransition(size, TRANSITION_OUT_TIME, TRANSITION_IN_TIME)
+    return FadeTransition(size, TRANSITION_OUT_TIME, TRANSITION_IN_TIME)
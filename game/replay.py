@@ -0,0 +1,63 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, argparse, time
+from .utils.params import *
+from .utils.replay_log import ReplayReader
+from .game import Game
+
+## Records a session or plays it back, run from the repository root:
+##     python -m game.replay record session.wcr          (play normally, everything gets recorded)
+##     python -m game.replay play session.wcr             (watch it again, in real time)
+##     python -m game.replay play session.wcr --headless  (as fast as possible, e.g. for profiling)
+## At the end of a replay the world state is compared with the one of the recording.
+
+def record(path: str, seed: int = None):
+    game = Game(record_file=path, seed=seed)
+    game.run()
+
+def play(path: str, headless: bool = False, render: bool = True):
+    replay = ReplayReader(path)
+    if replay.simulation_hz != SIMULATION_HZ:
+        print(f"warning: recorded at {replay.simulation_hz} Hz, simulating at {SIMULATION_HZ} Hz")
+
+    if not headless:
+        Game(input_source=replay, seed=replay.seed).run()
+        return
+
+    game = Game(headless=True, render=render, input_source=replay, seed=replay.seed)
+    start = time.perf_counter()
+    game.simulate(replay.length)
+    wall_time = time.perf_counter() - start
+    game.finish()
+    pygame.quit()
+    print(f"{replay.length} ticks in {wall_time:.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record or replay a game session")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record", help="play and record into a replay file")
+    record_parser.add_argument("file")
+    record_parser.add_argument("--seed", type=int, default=None, help="gameplay rng seed, random by default")
+    play_parser = subparsers.add_parser("play", help="play a replay file back")
+    play_parser.add_argument("file")
+    play_parser.add_argument("--headless", action="store_true", help="no window, no sound, no waiting")
+    play_parser.add_argument("--no-render", action="store_true", help="with --headless: skip rendering")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.file, args.seed)
+    else:
+        play(args.file, args.headless, not args.no_render)
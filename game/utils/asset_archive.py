@@ -0,0 +1,159 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import io, os, json, mmap, struct, argparse
+from .params import *
+from .atlas import asset_name
+
+## Packed asset archive: all assets in one file, read through a single mmap.
+##
+##   header:  magic "WCPK", version (uint32), index size (uint32)
+##   index:   utf-8 json, asset name -> [offset, size], offsets relative to the blob area
+##   blobs:   file contents, each aligned to ARCHIVE_ALIGNMENT bytes
+##
+## Build it with:
+##     python -m game.utils.asset_archive build game/assets -o game/assets.pak
+
+ARCHIVE_MAGIC = b"WCPK"
+ARCHIVE_VERSION = 1
+ARCHIVE_ALIGNMENT = 8
+_HEADER = struct.Struct("<4sII")
+
+
+class _BlobReader(io.RawIOBase):
+    ## Read only file object over a slice of the mapped archive, nothing is copied up front
+    def __init__(self, blob: memoryview):
+        super().__init__()
+        self.blob = blob
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        end = min(self.position + len(buffer), len(self.blob))
+        size = end - self.position
+        buffer[:size] = self.blob[self.position:end]
+        self.position = end
+        return size
+
+    def seek(self, offset, whence = io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.blob)
+        self.position = max(0, min(offset, len(self.blob)))
+        return self.position
+
+    def tell(self):
+        return self.position
+
+
+class AssetArchive:
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+
+        magic, version, index_size = _HEADER.unpack_from(self.map, 0)
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a supported asset archive")
+
+        index_start = _HEADER.size
+        self.index = json.loads(bytes(self.view[index_start:index_start + index_size]).decode("utf-8"))
+        self.data_start = index_start + index_size
+
+    def __contains__(self, name: str) -> bool:
+        return asset_name(name) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def names(self):
+        return self.index.keys()
+
+    def read(self, name: str) -> memoryview:
+        offset, size = self.index[asset_name(name)]
+        start = self.data_start + offset
+        return self.view[start:start + size]
+
+    def open(self, name: str) -> _BlobReader:
+        return _BlobReader(self.read(name))
+
+    def close(self):
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        self.map.close()
+        self.file.close()
+
+
+def build_archive(source_dir: str, output_file: str) -> str:
+    files = []
+    for root, _, filenames in os.walk(source_dir):
+        for filename in sorted(filenames):
+            path = os.path.join(root, filename)
+            if os.path.abspath(path) != os.path.abspath(output_file):
+                files.append(path)
+
+    index = {}
+    offset = 0
+    for path in files:
+        size = os.path.getsize(path)
+        index[asset_name(path)] = [offset, size]
+        offset += size + (-size % ARCHIVE_ALIGNMENT)
+
+    index_data = json.dumps(index, separators=(",", ":")).encode("utf-8")
+    ## the blob area starts aligned as well
+    index_data += b" " * (-(_HEADER.size + len(index_data)) % ARCHIVE_ALIGNMENT)
+
+    with open(output_file, "wb") as out:
+        out.write(_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, len(index_data)))
+        out.write(index_data)
+        for path in files:
+            with open(path, "rb") as f:
+                data = f.read()
+            out.write(data)
+            out.write(b"\0" * (-len(data) % ARCHIVE_ALIGNMENT))
+
+    print(f"packed {len(files)} files ({offset} bytes) -> {output_file}")
+    return output_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or inspect a packed asset archive")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="pack a directory into an archive")
+    build_parser.add_argument("source", help="asset directory, e.g. game/assets")
+    build_parser.add_argument("-o", "--output", default=ASSET_ARCHIVE_FILE)
+    list_parser = subparsers.add_parser("list", help="list the contents of an archive")
+    list_parser.add_argument("archive", nargs="?", default=ASSET_ARCHIVE_FILE)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_archive(args.source, args.output)
+    else:
+        archive = AssetArchive(args.archive)
+        for name in sorted(archive.names()):
+            print(f"{archive.index[name][1]:>10}  {name}")
+        archive.close()
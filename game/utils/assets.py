@@ -0,0 +1,215 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, os, threading
+from typing import Iterable
+from .params import *
+from .atlas import SpriteAtlas, asset_name
+from .asset_archive import AssetArchive
+
+class SilentSound:
+    ## Stands in for sounds when there is no mixer (no audio device, headless runs)
+    def play(self, *args, **kwargs):
+        return None
+
+    def stop(self):
+        pass
+
+    def get_length(self) -> float:
+        return 0.0
+
+    def set_volume(self, volume: float):
+        pass
+
+
+## Loads every image and sound once and memoizes derived image variants
+## (scaled, colorkeyed) by their parameters. Returned objects are shared.
+## Images which are packed into the sprite atlas are served from its pages.
+## If the packed asset archive exists, files are read from it instead of the disk.
+## Thread safe, the game level is loaded in the background while the menu is running.
+class AssetRegistry:
+    def __init__(self, atlas_index: str = ATLAS_INDEX_FILE, archive_file: str = ASSET_ARCHIVE_FILE):
+        self.images = {}
+        self.variants = {}
+        self.sounds = {}
+        ## reentrant, derived variants load their source image while holding it
+        self.lock = threading.RLock()
+
+        self.archive_file = archive_file
+        self.archive = None
+        self.archive_checked = False
+
+        self.atlas_index = atlas_index
+        self.atlas = None
+        self.atlas_checked = False
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def image(self, path: str, alpha: bool = True) -> pygame.Surface:
+        with self.lock:
+            key = (asset_name(path), alpha)
+            surf = self.images.get(key)
+            if surf is None:
+                atlas = self._get_atlas()
+                if atlas and path in atlas:
+                    ## atlas pages are already in the display format with alpha
+                    surf = atlas.get(path) if alpha else self._convert(atlas.get(path), False)
+                else:
+                    surf = self._convert(self._load_image(path), alpha)
+                self.images[key] = surf
+            return surf
+
+    def region(self, path: str, rect: pygame.Rect, size = None) -> pygame.Surface:
+        ## part of an image (e.g. one row of a sprite sheet), optionally scaled as a whole
+        with self.lock:
+            rect = pygame.rect.Rect(rect)
+            key = (asset_name(path), "region", tuple(rect), tuple(size) if size else None)
+            surf = self.variants.get(key)
+            if surf is None:
+                surf = self.image(path).subsurface(rect)
+                if size:
+                    surf = pygame.transform.scale(surf, size)
+                self.variants[key] = surf
+            return surf
+
+    def scaled(self, path: str, size) -> pygame.Surface:
+        with self.lock:
+            key = (asset_name(path), "scaled", tuple(size))
+            surf = self.variants.get(key)
+            if surf is None:
+                surf = pygame.transform.scale(self.image(path), size)
+                self.variants[key] = surf
+            return surf
+
+    def scaled_by(self, path: str, factor: float) -> pygame.Surface:
+        with self.lock:
+            key = (asset_name(path), "scaled_by", factor)
+            surf = self.variants.get(key)
+            if surf is None:
+                surf = pygame.transform.scale_by(self.image(path), factor)
+                self.variants[key] = surf
+            return surf
+
+    def scaled_to_height(self, path: str, height: int) -> pygame.Surface:
+        return self.scaled_by(path, height / self.image(path).get_height())
+
+    def colorkeyed(self, path: str, colorkey = (255, 255, 255)) -> pygame.Surface:
+        ## the colorkey is baked into per pixel alpha, so these match all other sprites
+        with self.lock:
+            key = (asset_name(path), "colorkeyed", tuple(colorkey))
+            surf = self.variants.get(key)
+            if surf is None:
+                surf = self.image(path, False).copy()
+                surf.set_colorkey(colorkey)
+                surf = self._convert(surf, True)
+                self.variants[key] = surf
+            return surf
+
+    def sound(self, path: str) -> pygame.mixer.Sound:
+        with self.lock:
+            sound = self.sounds.get(path)
+            if sound is None:
+                if not pygame.mixer.get_init():
+                    ## not cached, the real sound is loaded once there is a mixer
+                    return SilentSound()
+                sound = pygame.mixer.Sound(self.open_file(path) if self.is_archived(path) else path)
+                self.sounds[path] = sound
+            return sound
+
+    def is_archived(self, path: str) -> bool:
+        archive = self._get_archive()
+        return archive is not None and path in archive
+
+    def exists(self, path: str) -> bool:
+        return self.is_archived(path) or os.path.exists(path)
+
+    def open_file(self, path: str):
+        ## binary file object for an asset, a slice of the archive if it is packed
+        if self.is_archived(path):
+            return self.archive.open(path)
+        return open(path, "rb")
+
+    def preload(self, images: Iterable[str] = (), sounds: Iterable[str] = ()):
+        for path in images:
+            self.image(path)
+        for path in sounds:
+            self.sound(path)
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
+            self.variants.clear()
+            self.sounds.clear()
+            self.atlas = None
+            self.atlas_checked = False
+
+    def memory_footprint(self) -> dict:
+        ## Approximate number of bytes held by the registry
+        ## subsurfaces share the memory of their atlas page
+        images = sum(self._surface_bytes(surf) for surf in self.images.values() if surf.get_parent() is None)
+        if self.atlas:
+            images += self.atlas.memory_footprint()
+        variants = sum(self._surface_bytes(surf) for surf in self.variants.values() if surf.get_parent() is None)
+        sounds = 0
+        mixer = pygame.mixer.get_init()
+        if mixer:
+            frequency, size, channels = mixer
+            bytes_per_second = frequency * channels * abs(size) // 8
+            sounds = int(sum(sound.get_length() for sound in self.sounds.values()) * bytes_per_second)
+
+        return {
+            "images": images,
+            "variants": variants,
+            "sounds": sounds,
+            "total": images + variants + sounds
+        }
+
+    # ------------------------- #
+    # 'Private Methods'         #
+    # ------------------------- #
+
+    def _get_atlas(self):
+        with self.lock:
+            if not self.atlas_checked:
+                self.atlas_checked = True
+                if self.exists(self.atlas_index):
+                    self.atlas = SpriteAtlas(self.atlas_index, self.open_file)
+            return self.atlas
+
+    def _get_archive(self):
+        with self.lock:
+            if not self.archive_checked:
+                self.archive_checked = True
+                if os.path.exists(self.archive_file):
+                    self.archive = AssetArchive(self.archive_file)
+            return self.archive
+
+    def _load_image(self, path: str) -> pygame.Surface:
+        if self.is_archived(path):
+            return pygame.image.load(self.archive.open(path), path)
+        return pygame.image.load(path)
+
+    def _convert(self, surf: pygame.Surface, alpha: bool) -> pygame.Surface:
+        ## converting needs a display mode, without one the image stays in its file format
+        if pygame.display.get_surface() is None:
+            return surf
+        return surf.convert_alpha() if alpha else surf.convert()
+
+    def _surface_bytes(self, surf: pygame.Surface) -> int:
+        return surf.get_width() * surf.get_height() * surf.get_bytesize()
+
+
+assets = AssetRegistry()
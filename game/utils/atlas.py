@@ -0,0 +1,166 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, os, json, argparse
+from typing import Dict, List
+from .params import *
+
+## Sprite atlas: an offline packer which puts many images onto a few atlas
+## pages plus a json index, and a runtime loader which decodes every page
+## once and hands out subsurfaces by asset name.
+##
+## Build it with:
+##     python -m game.utils.atlas game/assets/sprites game/assets/raw_images
+
+ATLAS_VERSION = 1
+
+def asset_name(path: str) -> str:
+    ## normalized path, the same file always maps onto the same name
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+class SpriteAtlas:
+    def __init__(self, index_file: str, open_file: callable = None):
+        self.index_file = index_file
+        self.directory = os.path.dirname(index_file)
+        ## lets the pages come from somewhere else than the plain file system
+        self.open_file = open_file
+
+        with self._open(index_file) as f:
+            index = json.load(f)
+        if index.get("version") != ATLAS_VERSION:
+            raise ValueError(f"unsupported atlas version in {index_file}")
+
+        self.page_files = index["pages"]
+        self.frames = {name: (frame["page"], pygame.rect.Rect(frame["rect"])) for name, frame in index["frames"].items()}
+        self.pages: Dict[int, pygame.Surface] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return asset_name(name) in self.frames
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def get(self, name: str) -> pygame.Surface:
+        page, rect = self.frames[asset_name(name)]
+        return self._page(page).subsurface(rect)
+
+    def memory_footprint(self) -> int:
+        return sum(page.get_width() * page.get_height() * page.get_bytesize() for page in self.pages.values())
+
+    # ------------------------- #
+    # 'Private Methods'         #
+    # ------------------------- #
+
+    def _open(self, path: str):
+        if self.open_file:
+            return self.open_file(path)
+        return open(path, "rb")
+
+    def _page(self, index: int) -> pygame.Surface:
+        page = self.pages.get(index)
+        if page is None:
+            path = os.path.join(self.directory, self.page_files[index])
+            with self._open(path) as f:
+                page = pygame.image.load(f, path)
+            ## every sprite shares one pixel format: per pixel alpha in the display format
+            if pygame.display.get_surface() is not None:
+                page = page.convert_alpha()
+            self.pages[index] = page
+        return page
+
+
+# ------------------------- #
+# 'Atlas Packer'            #
+# ------------------------- #
+
+def _collect_images(source_dirs: List[str]) -> Dict[str, pygame.Surface]:
+    images = {}
+    for source_dir in source_dirs:
+        for root, _, files in os.walk(source_dir):
+            for filename in sorted(files):
+                if filename.lower().endswith(".png"):
+                    path = os.path.join(root, filename)
+                    images[asset_name(path)] = pygame.image.load(path)
+    return images
+
+def pack(images: Dict[str, pygame.Surface], page_size: int = ATLAS_PAGE_SIZE, padding: int = 1):
+    ## Shelf packing, tallest images first. Returns the page sizes and name -> (page, rect)
+    pages = []
+    frames = {}
+    x = y = shelf_h = 0
+    page = -1
+
+    for name in sorted(images, key=lambda n: (images[n].get_height(), images[n].get_width()), reverse=True):
+        w, h = images[name].get_size()
+        if w + padding > page_size or h + padding > page_size:
+            ## too big for a shared page, gets a page on its own
+            pages.append([w, h])
+            frames[name] = (len(pages) - 1, pygame.rect.Rect(0, 0, w, h))
+            page = -1
+            continue
+
+        if page == -1 or x + w + padding > page_size:
+            x = 0
+            y += shelf_h
+            shelf_h = 0
+        if page == -1 or y + h + padding > page_size:
+            pages.append([0, 0])
+            page = len(pages) - 1
+            x = y = shelf_h = 0
+
+        frames[name] = (page, pygame.rect.Rect(x, y, w, h))
+        pages[page][0] = max(pages[page][0], x + w)
+        pages[page][1] = max(pages[page][1], y + h)
+        x += w + padding
+        shelf_h = max(shelf_h, h + padding)
+
+    return pages, frames
+
+def build_atlas(source_dirs: List[str], output_dir: str, page_size: int = ATLAS_PAGE_SIZE, padding: int = 1) -> str:
+    images = _collect_images(source_dirs)
+    pages, frames = pack(images, page_size, padding)
+
+    os.makedirs(output_dir, exist_ok=True)
+    page_files = []
+    for index, size in enumerate(pages):
+        surf = pygame.Surface(size, pygame.SRCALPHA)
+        for name, (page, rect) in frames.items():
+            if page == index:
+                surf.blit(images[name], rect)
+        page_file = f"atlas_{index}.png"
+        pygame.image.save(surf, os.path.join(output_dir, page_file))
+        page_files.append(page_file)
+
+    index_file = os.path.join(output_dir, "atlas.json")
+    with open(index_file, "w") as f:
+        json.dump({
+            "version": ATLAS_VERSION,
+            "pages": page_files,
+            "frames": {name: {"page": page, "rect": [rect.x, rect.y, rect.w, rect.h]} for name, (page, rect) in sorted(frames.items())}
+        }, f, indent=1)
+
+    print(f"packed {len(frames)} images onto {len(page_files)} pages -> {index_file}")
+    return index_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack sprites and images into atlas pages")
+    parser.add_argument("sources", nargs="+", help="directories with png files")
+    parser.add_argument("-o", "--output", default=ATLAS_DIR)
+    parser.add_argument("--page-size", type=int, default=ATLAS_PAGE_SIZE)
+    parser.add_argument("--padding", type=int, default=1)
+    args = parser.parse_args()
+    build_atlas(args.sources, args.output, args.page_size, args.padding)
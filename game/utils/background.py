@@ -0,0 +1,60 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import threading
+
+## Runs one function on a worker thread. The game loop polls `done` every frame
+## and picks up the result once it is there, it never blocks on the worker.
+## Exceptions raised by the worker are re-raised by result() on the main thread.
+class BackgroundTask:
+    def __init__(self, target: callable, *args, **kwargs):
+        self.target = target
+        self.args = args
+        self.kwargs = kwargs
+
+        self.value = None
+        self.error = None
+        self.finished = threading.Event()
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    @property
+    def done(self) -> bool:
+        return self.finished.is_set()
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.finished.wait(timeout)
+
+    def result(self):
+        self.finished.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    # ------------------------- #
+    # 'Private Methods'         #
+    # ------------------------- #
+
+    def _run(self):
+        try:
+            self.value = self.target(*self.args, **self.kwargs)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished.set()
@@ -0,0 +1,76 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import math
+from typing import List, Sequence, Tuple
+from .params import *
+from .rng import rng
+
+## Sampling helpers to advance a suspended scene by a long time span in one step
+## instead of replaying it frame by frame. Small counts are sampled exactly, large
+## ones from their normal approximation, so the cost doesn't grow with the time span.
+
+def sample_renewals(elapsed: float, first_due: float, interval_min: int, interval_max: int) -> Tuple[int, int, float]:
+    ## Events of a timer which is `first_due` away and then restarts with a random
+    ## integer interval in [interval_min, interval_max], like the trash bin refills.
+    ## Returns how many fire within `elapsed`, the interval which is running at the end
+    ## (None if nothing fired) and the time until its next event.
+    if elapsed < first_due:
+        return 0, None, first_due - elapsed
+
+    count = 1
+    remaining = elapsed - first_due
+    mean = (interval_min + interval_max) / 2
+    if remaining / mean > CATCH_UP_EXACT_EVENTS:
+        ## renewal theorem: the count is about normal, the running interval follows the
+        ## length biased interval distribution and the time left on it is uniform. With
+        ## integer intervals all events stay on the grid first_due + k, so is the time left.
+        variance = ((interval_max - interval_min + 1) ** 2 - 1) / 12
+        expected = remaining / mean + (variance - mean ** 2) / (2 * mean ** 2)
+        count += max(0, round(rng.gauss(expected, math.sqrt(remaining * variance / mean ** 3))))
+        lengths = range(interval_min, interval_max + 1)
+        interval = rng.choices(lengths, weights = lengths)[0]
+        offset = -remaining % 1.0 or 1.0
+        return count, interval, offset + rng.randint(0, interval - 1)
+
+    interval = rng.randint(interval_min, interval_max)
+    while remaining >= interval:
+        remaining -= interval
+        count += 1
+        interval = rng.randint(interval_min, interval_max)
+    return count, interval, interval - remaining
+
+def binomial(n: int, p: float) -> int:
+    if n <= CATCH_UP_EXACT_EVENTS:
+        return sum(1 for _ in range(n) if rng.random() < p)
+    k = round(rng.gauss(n * p, math.sqrt(n * p * (1 - p))))
+    return min(max(k, 0), n)
+
+def multinomial(n: int, probabilities: Sequence[float]) -> List[int]:
+    ## as a chain of binomials, each conditioned on the draws left over by the ones before
+    counts = []
+    left = 1.0
+    for p in probabilities[:-1]:
+        k = binomial(n, min(p / left, 1.0)) if left > 0 else 0
+        counts.append(k)
+        n -= k
+        left -= p
+    counts.append(n)
+    return counts
+
+def sum_uniform(n: int, high: float) -> float:
+    ## sum of n uniform draws from [0, high]
+    if n <= CATCH_UP_EXACT_EVENTS:
+        return sum(rng.uniform(0, high) for _ in range(n))
+    return max(0.0, rng.gauss(n * high / 2, high * math.sqrt(n / 12)))
@@ -0,0 +1,126 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, math
+from typing import List, Optional, Tuple
+from .params import *
+
+## Swept AABB collision for a moving box (given by its center and half size, in
+## float coordinates) against static pygame rects. The box is moved along its
+## displacement up to the first contact and then slides along the contact plane,
+## so it can't tunnel through thin boxes no matter how long the frame was.
+
+X_AXIS = 0
+Y_AXIS = 1
+
+def swept_bounds(center: pygame.Vector2, half_size, delta: pygame.Vector2) -> pygame.Rect:
+    ## everything the box can touch while moving by delta, sliding included
+    hw, hh = half_size
+    left = min(center.x, center.x + delta.x) - hw
+    top = min(center.y, center.y + delta.y) - hh
+    right = max(center.x, center.x + delta.x) + hw
+    bottom = max(center.y, center.y + delta.y) + hh
+    return pygame.rect.Rect(math.floor(left) - 1, math.floor(top) - 1, math.ceil(right - left) + 3, math.ceil(bottom - top) + 3)
+
+def sweep_aabb(center: pygame.Vector2, half_size, delta: pygame.Vector2, rect: pygame.Rect) -> Optional[Tuple[float, int]]:
+    ## Time of impact in [0, 1) and the blocked axis, or None if the box doesn't hit rect.
+    ## The rect is grown by the half size, so only the center has to be traced (as a ray).
+    hw, hh = half_size
+    left, right = rect.left - hw, rect.right + hw
+    top, bottom = rect.top - hh, rect.bottom + hh
+
+    if delta.x == 0:
+        ## touching a side doesn't block moving along it
+        if not left < center.x < right:
+            return None
+        x_entry, x_exit = -math.inf, math.inf
+    else:
+        t1 = (left - center.x) / delta.x
+        t2 = (right - center.x) / delta.x
+        x_entry, x_exit = min(t1, t2), max(t1, t2)
+
+    if delta.y == 0:
+        if not top < center.y < bottom:
+            return None
+        y_entry, y_exit = -math.inf, math.inf
+    else:
+        t1 = (top - center.y) / delta.y
+        t2 = (bottom - center.y) / delta.y
+        y_entry, y_exit = min(t1, t2), max(t1, t2)
+
+    entry = max(x_entry, y_entry)
+    exit = min(x_exit, y_exit)
+    if entry >= exit or entry >= 1.0 or exit <= 0.0 or entry < 0.0:
+        return None
+    return entry, X_AXIS if x_entry >= y_entry else Y_AXIS
+
+def resolve_overlaps(center: pygame.Vector2, half_size, rects: List[pygame.Rect]) -> int:
+    ## Pushes the box out of every rect it overlaps, each along its shallowest axis.
+    ## Returns the number of contacts which were resolved.
+    hw, hh = half_size
+    contacts = 0
+    for rect in rects:
+        left = rect.right - (center.x - hw)
+        right = (center.x + hw) - rect.left
+        up = rect.bottom - (center.y - hh)
+        down = (center.y + hh) - rect.top
+        if left <= 0 or right <= 0 or up <= 0 or down <= 0:
+            continue
+
+        depth = min(left, right, up, down)
+        if depth == right:
+            center.x = rect.left - hw
+        elif depth == left:
+            center.x = rect.right + hw
+        elif depth == down:
+            center.y = rect.top - hh
+        else:
+            center.y = rect.bottom + hh
+        contacts += 1
+    return contacts
+
+def move_and_slide(center: pygame.Vector2, half_size, delta: pygame.Vector2, rects: List[pygame.Rect], iterations: int = MAX_SLIDE_ITERATIONS) -> pygame.Vector2:
+    ## Moves center (in place) by delta. On a contact the box stops there, the blocked
+    ## component of the remaining displacement is dropped and the rest is slid along.
+    hw, hh = half_size
+    resolve_overlaps(center, half_size, rects)
+
+    delta = pygame.Vector2(delta)
+    for _ in range(iterations):
+        if delta.x == 0 and delta.y == 0:
+            break
+
+        hit_time, hit_axis, hit_rect = 1.0, None, None
+        for rect in rects:
+            hit = sweep_aabb(center, half_size, delta, rect)
+            if hit is not None and hit[0] < hit_time:
+                hit_time, hit_axis = hit
+                hit_rect = rect
+
+        if hit_axis is None:
+            center += delta
+            break
+
+        remaining = 1.0 - hit_time
+        ## the blocked axis is snapped onto the contact plane, so the box never ends
+        ## up a rounding error inside the rect and slides cleanly along its side
+        if hit_axis == X_AXIS:
+            center.x = hit_rect.left - hw if delta.x > 0 else hit_rect.right + hw
+            center.y += delta.y * hit_time
+            delta.update(0, delta.y * remaining)
+        else:
+            center.y = hit_rect.top - hh if delta.y > 0 else hit_rect.bottom + hh
+            center.x += delta.x * hit_time
+            delta.update(delta.x * remaining, 0)
+    return center
@@ -0,0 +1,106 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame
+from typing import Dict, List, Tuple
+
+## Keyboard state for the simulation. Normally it is the real keyboard, in headless
+## runs the held keys come from an InputScript instead. Entities read held keys
+## through `keyboard.get_pressed()` and never from pygame.key directly.
+
+class ScriptedKeys:
+    ## Indexable by key code like the sequence returned by pygame.key.get_pressed()
+    def __init__(self):
+        self.held = set()
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self.held
+
+
+class Keyboard:
+    def __init__(self):
+        self.scripted = None
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def get_pressed(self):
+        if self.scripted is not None:
+            return self.scripted
+        return pygame.key.get_pressed()
+
+    def use_script(self):
+        self.scripted = ScriptedKeys()
+        return self.scripted
+
+    def use_device(self):
+        self.scripted = None
+
+
+keyboard = Keyboard()
+
+
+## Scripted input, one command per line:
+##     <tick> down <key>     key is pressed (KEYDOWN) and held
+##     <tick> up <key>       key is released (KEYUP)
+##     <tick> press <key>    pressed on <tick>, released on the next tick
+## Keys use pygame's key names ("w", "left shift", "space", "return"), '#' starts a comment.
+class InputScript:
+    def __init__(self, commands: List[Tuple[int, str, int]] = ()):
+        self.commands: Dict[int, List[Tuple[str, int]]] = {}
+        for tick, action, key in commands:
+            self.add(tick, action, key)
+
+    @classmethod
+    def load(cls, path: str) -> "InputScript":
+        script = cls()
+        with open(path) as f:
+            for number, line in enumerate(f, 1):
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                tick, action, key_name = line.split(None, 2)
+                if action not in ("down", "up", "press"):
+                    raise ValueError(f"{path}:{number}: unknown action '{action}'")
+                script.add(int(tick), action, pygame.key.key_code(key_name))
+        return script
+
+    @property
+    def length(self) -> int:
+        ## ticks until the last command has been applied
+        return max(self.commands) + 2 if self.commands else 0
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def add(self, tick: int, action: str, key: int):
+        if action == "press":
+            self.add(tick, "down", key)
+            self.add(tick + 1, "up", key)
+            return
+        self.commands.setdefault(tick, []).append((action, key))
+
+    def apply(self, tick: int, keys: ScriptedKeys) -> List[pygame.event.Event]:
+        ## updates the held keys for this tick and returns the matching key events
+        events = []
+        for action, key in self.commands.get(tick, ()):
+            if action == "down":
+                keys.held.add(key)
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0))
+            else:
+                keys.held.discard(key)
+                events.append(pygame.event.Event(pygame.KEYUP, key=key, mod=0, unicode="", scancode=0))
+        return events
@@ -0,0 +1,197 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, os, json, hashlib
+import xml.etree.ElementTree as ElementTree
+from typing import List
+from .params import *
+from ..entities.map_entity import BakedChunk, bake_map_chunks
+
+## On-disk cache of baked tmx maps. For every map it stores the raw RGBA pixels of
+## the baked chunks and of the object images in one blob, next to a json manifest
+## with the object groups (collision boxes, trash bins, portals, spawn points...).
+## The cache is keyed by the hash of the .tmx, the manifest also records the hashes
+## of all tilesets and images it depends on, so any change invalidates it.
+## Warm loads neither parse xml nor composite tiles.
+
+MAP_CACHE_VERSION = 1
+
+_tobytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+
+class MapObject:
+    def __init__(self, x, y, width, height, name, image: pygame.Surface = None):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.name = name
+        self.image = image
+
+class MapObjectGroup(list):
+    def __init__(self, name: str, objects = ()):
+        super().__init__(objects)
+        self.name = name
+
+class BakedMap:
+    def __init__(self, width: int, height: int, chunks: List[BakedChunk], object_groups: List[MapObjectGroup]):
+        self.width = width
+        self.height = height
+        self.chunks = chunks
+        self.object_groups = object_groups
+
+
+def load_map(map_file: str, cache_dir: str = MAP_CACHE_DIR, use_cache: bool = MAP_CACHE_ENABLED) -> BakedMap:
+    if not use_cache:
+        return bake_map(map_file)
+
+    with open(map_file, "rb") as f:
+        map_hash = hashlib.sha1(f.read()).hexdigest()
+    name = os.path.splitext(os.path.basename(map_file))[0]
+    manifest_file = os.path.join(cache_dir, f"{name}-{map_hash[:16]}.json")
+    blob_file = os.path.join(cache_dir, f"{name}-{map_hash[:16]}.bin")
+
+    baked = _load_cached(manifest_file, blob_file)
+    if baked is None:
+        baked = bake_map(map_file)
+        try:
+            _save(baked, map_file, name, manifest_file, blob_file)
+        except OSError as e:
+            print(f"could not write map cache for {map_file}: {e}")
+    return baked
+
+def bake_map(map_file: str) -> BakedMap:
+    ## pytmx is only needed when a map really has to be parsed
+    from pytmx.util_pygame import load_pygame
+
+    tmx_data = load_pygame(map_file)
+    chunks = bake_map_chunks(tmx_data.layers, tmx_data.width, tmx_data.height)
+    object_groups = []
+    for group in tmx_data.objectgroups:
+        objects = [MapObject(obj.x, obj.y, obj.width, obj.height, obj.name, obj.image) for obj in group]
+        object_groups.append(MapObjectGroup(group.name, objects))
+
+    return BakedMap(tmx_data.width * TILE_SIZE, tmx_data.height * TILE_SIZE, chunks, object_groups)
+
+# ------------------------- #
+# 'Private Functions'       #
+# ------------------------- #
+
+def _hash_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def _dependencies(map_file: str) -> List[str]:
+    ## external tilesets, templates and all images referenced by the map
+    dependencies = set()
+    pending = [map_file]
+    while pending:
+        path = pending.pop()
+        base = os.path.dirname(path)
+        for element in ElementTree.parse(path).getroot().iter():
+            source = element.get("source")
+            if source is None:
+                continue
+            dependency = os.path.normpath(os.path.join(base, source))
+            if element.tag in ("tileset", "template") and dependency not in dependencies:
+                pending.append(dependency)
+            dependencies.add(dependency)
+    return sorted(dependencies)
+
+def _surface_from_bytes(blob: bytes, offset: int, size) -> pygame.Surface:
+    length = size[0] * size[1] * 4
+    return pygame.image.frombuffer(blob[offset:offset + length], size, "RGBA")
+
+def _load_cached(manifest_file: str, blob_file: str):
+    if not os.path.exists(manifest_file) or not os.path.exists(blob_file):
+        return None
+
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+    if (manifest.get("version") != MAP_CACHE_VERSION or manifest.get("tile_size") != TILE_SIZE
+            or manifest.get("chunk_size") != MAP_CHUNK_SIZE):
+        return None
+    for dependency, digest in manifest["dependencies"].items():
+        if not os.path.exists(dependency) or _hash_file(dependency) != digest:
+            return None
+
+    with open(blob_file, "rb") as f:
+        blob = f.read()
+
+    chunks = [BakedChunk(tuple(chunk["pos"]), _surface_from_bytes(blob, chunk["offset"], chunk["size"]), chunk["opaque"]) for chunk in manifest["chunks"]]
+
+    images = []
+    for image in manifest["images"]:
+        surf = _surface_from_bytes(blob, image["offset"], image["size"])
+        images.append(surf.convert_alpha() if pygame.display.get_surface() else surf)
+
+    object_groups = []
+    for group in manifest["object_groups"]:
+        objects = []
+        for obj in group["objects"]:
+            image = images[obj["image"]] if obj["image"] is not None else None
+            objects.append(MapObject(obj["x"], obj["y"], obj["width"], obj["height"], obj["name"], image))
+        object_groups.append(MapObjectGroup(group["name"], objects))
+
+    return BakedMap(manifest["width"], manifest["height"], chunks, object_groups)
+
+def _save(baked: BakedMap, map_file: str, name: str, manifest_file: str, blob_file: str):
+    blob = bytearray()
+
+    chunks = []
+    for chunk in baked.chunks:
+        chunks.append({"pos": list(chunk.pos), "size": list(chunk.surface.get_size()), "opaque": chunk.opaque, "offset": len(blob)})
+        blob += _tobytes(chunk.surface, "RGBA")
+
+    ## objects sharing one tile image share one stored image
+    images = []
+    image_indices = {}
+    object_groups = []
+    for group in baked.object_groups:
+        objects = []
+        for obj in group:
+            image_index = None
+            if obj.image is not None:
+                image_index = image_indices.get(id(obj.image))
+                if image_index is None:
+                    image_index = image_indices[id(obj.image)] = len(images)
+                    images.append({"size": list(obj.image.get_size()), "offset": len(blob)})
+                    blob += _tobytes(obj.image, "RGBA")
+            objects.append({"x": obj.x, "y": obj.y, "width": obj.width, "height": obj.height, "name": obj.name, "image": image_index})
+        object_groups.append({"name": group.name, "objects": objects})
+
+    dependencies = [map_file] + _dependencies(map_file)
+    manifest = {
+        "version": MAP_CACHE_VERSION,
+        "tile_size": TILE_SIZE,
+        "chunk_size": MAP_CHUNK_SIZE,
+        "dependencies": {dependency: _hash_file(dependency) for dependency in dependencies if os.path.exists(dependency)},
+        "width": baked.width,
+        "height": baked.height,
+        "chunks": chunks,
+        "images": images,
+        "object_groups": object_groups
+    }
+
+    cache_dir = os.path.dirname(manifest_file)
+    os.makedirs(cache_dir, exist_ok=True)
+    ## entries of older versions of this map are stale now
+    for filename in os.listdir(cache_dir):
+        if filename.startswith(f"{name}-") and os.path.join(cache_dir, filename) not in (manifest_file, blob_file):
+            os.remove(os.path.join(cache_dir, filename))
+
+    ## the manifest is written last, a cache entry without one is never used
+    with open(blob_file, "wb") as f:
+        f.write(blob)
+    with open(manifest_file, "w") as f:
+        json.dump(manifest, f)
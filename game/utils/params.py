@@ -17,15 +17,71 @@
 WIDTH, HEIGHT = 800, 600
 WIDTH_H, HEIGHT_H = WIDTH // 2, HEIGHT // 2
 FPS = 120
+## the simulation runs at a fixed rate, independent of the render rate (FPS)
+SIMULATION_HZ = 60
+SIMULATION_DT = 1.0 / SIMULATION_HZ
+## after a long frame at most this many steps are caught up, the rest of the time is dropped
+MAX_CATCHUP_STEPS = 5
+
+## Startup
+## warm the game level up in the background while the main menu is shown
+FAST_STARTUP = True
+PRINT_STARTUP_TIMELINE = True
+
+## Profiler: F3 toggles the overlay (and starts recording), F4 writes a chrome trace
+PROFILER_ENABLED = False
+PROFILER_FRAMES = 600
+PROFILER_TRACE_FILE = "profiler_trace_{}.json"
+
+## Rendering
+SPATIAL_HASH_CELL_SIZE = 256
+## broadphase for collision and interaction boxes, which are a lot smaller than the screen
+COLLISION_CELL_SIZE = 64
+TILE_SIZE = 16
+MAP_CHUNK_SIZE = 256
+## baked maps are cached here, keyed by the hash of the .tmx
+MAP_CACHE_DIR = ".cache/maps"
+MAP_CACHE_ENABLED = True
+## only push changed screen regions to the display instead of flipping every frame
+DIRTY_RECT_RENDERING = False
+## portal transitions: "fade", "crossfade" or "wipe", times in seconds
+TRANSITION_EFFECT = "fade"
+TRANSITION_OUT_TIME = 0.25
+TRANSITION_IN_TIME = 0.25
 
 ## Sprite Params
 PLAYER_SIZE = 48
 PLAYER_SIZE_H = PLAYER_SIZE // 2
 PLAYER_SPEED = 200
 PLAYER_FRAME_FACTOR = 20
+## half size of the player's collision box, smaller than the sprite
+COLLISION_HALF_SIZE = (PLAYER_SIZE - 20) // 2
+## how often a move can slide along another contact within one step
+MAX_SLIDE_ITERATIONS = 3
 
 ## Fonts:
 FONT_PATH = "game/assets/fonts/Ubuntu-Regular.ttf"
+TEXT_CACHE_SIZE = 256
+
+## Images and Sounds
+## packed archive with all assets, used instead of the loose files if it exists
+ASSET_ARCHIVE_FILE = "game/assets.pak"
+ATLAS_DIR = "game/assets/atlas"
+ATLAS_INDEX_FILE = ATLAS_DIR + "/atlas.json"
+ATLAS_PAGE_SIZE = 2048
+
+COINS_IMAGE = "game/assets/raw_images/coins.png"
+BEER_IMAGE = "game/assets/raw_images/beer.png"
+BOTTLES_IMAGE = "game/assets/raw_images/bottles.png"
+CANS_IMAGE = "game/assets/raw_images/cans.png"
+TRASH_IMAGE = "game/assets/raw_images/trash.png"
+INVENTORY_IMAGES = [COINS_IMAGE, BEER_IMAGE, BOTTLES_IMAGE, CANS_IMAGE, TRASH_IMAGE]
+INVENTORY_ICON_HEIGHT = 96
+
+BEER_SOUND_FILES = [
+    "game/assets/sounds/durscht_bierdurscht.mp3",
+    "game/assets/sounds/dann_sauf_i_mi_voll.mp3"
+]
 
 
 ## Map 
@@ -38,6 +94,23 @@ TRASH_BIN_MAX_MONEY = 1.0
 TRASH_BIN_MAX_CANS_BOTTLES_RANDOM = 2
 TRASH_BIN_MAX_CANS_BOTTLES = 10
 TRASH_BIN_MAX_TRASH = 10
+## keep the state of all trash bins in numpy arrays and refill them in batches, see TrashBinStore
+TRASH_BIN_STORE = False
+
+## Scenes which are not active are advanced in one step when they are entered again,
+## counts up to this many events are sampled one by one, larger ones approximated
+CATCH_UP_EXACT_EVENTS = 32
+
+## NPCs, see NpcCrowd
+NPC_MAIN_WORLD_PEDESTRIANS = 60
+NPC_MAIN_WORLD_COLLECTORS = 15
+NPC_SPEED = 80
+NPC_FRAME_FACTOR = PLAYER_FRAME_FACTOR * NPC_SPEED / PLAYER_SPEED
+NPC_GRID_CELL_SIZE = 16
+NPC_OFFSCREEN_UPDATE_INTERVAL = 8
+NPC_WALK_TIME_MIN = 1.0
+NPC_WALK_TIME_MAX = 4.0
+NPC_IDLE_CHANCE = 0.3
 
 
 
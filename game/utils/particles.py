@@ -0,0 +1,94 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame
+import numpy as np
+
+## Pooled particle system: positions, radii and speeds live in flat arrays and are
+## stepped in one vectorized operation. Particles leaving bounds are respawned in
+## place, nothing is allocated after construction. Every radius is pre-rendered once.
+class ParticleSystem:
+    def __init__(
+            self,
+            capacity: int,
+            spawn_rect: pygame.Rect,
+            bounds: pygame.Rect,
+            radius_range,
+            base_speed: float,
+            color = (255, 255, 255),
+            direction = (0, -1),
+            seed = None):
+        self.capacity = capacity
+        self.spawn_rect = pygame.rect.Rect(spawn_rect)
+        self.bounds = pygame.rect.Rect(bounds)
+        self.min_radius, self.max_radius = radius_range
+        self.base_speed = base_speed
+        self.direction = direction
+        self.rng = np.random.default_rng(seed)
+
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.radius = np.ones(capacity, dtype=np.int32)
+        self.speed = np.zeros(capacity, dtype=np.float32)
+
+        self.sprite_cache = {radius: self._render_sprite(radius, color) for radius in range(self.min_radius, self.max_radius + 1)}
+        self.images = [None] * capacity
+
+        self.spawn(np.arange(capacity))
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def spawn(self, indices: np.ndarray, area: pygame.Rect = None):
+        area = area if area else self.spawn_rect
+        n = len(indices)
+        self.x[indices] = self.rng.uniform(area.left, area.right, n)
+        self.y[indices] = self.rng.uniform(area.top, area.bottom, n) if area.height > 0 else area.top
+        radius = self.rng.integers(self.min_radius, self.max_radius + 1, n)
+        self.radius[indices] = radius
+        self.speed[indices] = self.base_speed / radius
+        for index, r in zip(indices.tolist(), radius.tolist()):
+            self.images[index] = self.sprite_cache[r]
+
+    def scatter(self, area: pygame.Rect):
+        ## distribute all particles over area, e.g. so the screen isn't empty at start
+        self.spawn(np.arange(self.capacity), area)
+
+    def update(self, dt: float):
+        step = self.speed * dt
+        self.x += step * self.direction[0]
+        self.y += step * self.direction[1]
+
+        dead = ((self.x + self.radius < self.bounds.left) | (self.x - self.radius > self.bounds.right) |
+                (self.y + self.radius < self.bounds.top) | (self.y - self.radius > self.bounds.bottom))
+        indices = np.flatnonzero(dead)
+        if len(indices) > 0:
+            self.spawn(indices)
+
+    def draw(self, surface: pygame.Surface, offset = (0, 0)):
+        xs = (self.x - self.radius - offset[0]).astype(np.int32).tolist()
+        ys = (self.y - self.radius - offset[1]).astype(np.int32).tolist()
+        surface.blits(list(zip(self.images, zip(xs, ys))), False)
+
+    # ------------------------- #
+    # 'Private Methods'         #
+    # ------------------------- #
+
+    def _render_sprite(self, radius: int, color) -> pygame.Surface:
+        image = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        ## smaller particles are more opaque
+        alpha_value = min(255, 255 * (1 - (radius / self.max_radius)) + 100)
+        pygame.draw.circle(image, (*color[:3], alpha_value), (radius, radius), radius)
+        return image
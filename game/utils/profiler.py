@@ -0,0 +1,227 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, os, json, time, threading, functools
+from typing import Dict, List
+from .params import *
+from .text_cache import text_cache
+
+## Frame profiler. Code is instrumented with zones:
+##
+##     with profiler.zone("scene.update"):
+##         ...
+##     @profiler.profile("collision")
+##     def _check_collision(...):
+##
+## The timings of the last PROFILER_FRAMES frames are kept in a ring buffer. F3 shows
+## the overlay (per zone ms, frame time graph, p50/p99), F4 dumps the buffer as a
+## Chrome trace (chrome://tracing or ui.perfetto.dev). While the profiler is
+## disabled, a zone costs one attribute check.
+
+class _NullZone:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_ZONE = _NullZone()
+
+
+class _Zone:
+    ## one object per zone name, reused for every measurement
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.starts = []
+
+    def __enter__(self):
+        self.starts.append(time.perf_counter_ns())
+        self.profiler.depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        profiler = self.profiler
+        profiler.depth -= 1
+        profiler.events.append((self.name, self.starts.pop(), end, profiler.depth))
+        return False
+
+
+class Profiler:
+    def __init__(self, capacity: int = PROFILER_FRAMES):
+        self.enabled = PROFILER_ENABLED
+        self.capacity = capacity
+        ## ring buffer of (frame start ns, frame end ns, [(zone, start ns, end ns, depth)])
+        self.frames = [None] * capacity
+        self.frame_index = 0
+        self.frame_count = 0
+
+        self.zones: Dict[str, _Zone] = {}
+        self.events = []
+        self.depth = 0
+        self.frame_start = 0
+        self.thread_id = threading.get_ident()
+
+        self.overlay = None
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def zone(self, name: str):
+        ## zones are only recorded on the main thread
+        if not self.enabled or threading.get_ident() != self.thread_id:
+            return _NULL_ZONE
+        zone = self.zones.get(name)
+        if zone is None:
+            zone = self.zones[name] = _Zone(self, name)
+        return zone
+
+    def profile(self, name: str):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.zone(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def begin_frame(self):
+        if self.enabled:
+            self.frame_start = time.perf_counter_ns()
+            self.events = []
+            self.depth = 0
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start == 0:
+            return
+        self.frames[self.frame_index] = (self.frame_start, time.perf_counter_ns(), self.events)
+        self.frame_index = (self.frame_index + 1) % self.capacity
+        self.frame_count += 1
+        self.frame_start = 0
+
+    def last_frames(self, count: int = None) -> List[tuple]:
+        ## oldest first
+        stored = min(self.frame_count, self.capacity)
+        count = stored if count is None else min(count, stored)
+        return [self.frames[(self.frame_index - count + i) % self.capacity] for i in range(count)]
+
+    def toggle_overlay(self):
+        if self.overlay is None:
+            self.overlay = ProfilerOverlay(self)
+            self.enabled = True
+        else:
+            self.overlay = None
+
+    def draw_overlay(self, screen: pygame.Surface):
+        if self.overlay is not None:
+            self.overlay.draw(screen)
+
+    def dump_trace(self, path: str = None) -> str:
+        if path is None:
+            path = PROFILER_TRACE_FILE.format(time.strftime("%Y%m%d-%H%M%S"))
+        frames = self.last_frames()
+        origin = frames[0][0] if frames else 0
+        trace_events = []
+        for number, (frame_start, frame_end, events) in enumerate(frames):
+            trace_events.append({"name": "frame", "cat": "frame", "ph": "X", "pid": 0, "tid": 0,
+                                 "ts": (frame_start - origin) / 1000.0, "dur": (frame_end - frame_start) / 1000.0,
+                                 "args": {"frame": self.frame_count - len(frames) + number}})
+            for name, start, end, depth in events:
+                trace_events.append({"name": name, "cat": "zone", "ph": "X", "pid": 0, "tid": 0,
+                                     "ts": (start - origin) / 1000.0, "dur": (end - start) / 1000.0})
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+        print(f"profiler: wrote {len(frames)} frames to {path}")
+        return path
+
+
+class ProfilerOverlay:
+    ## Panel in the top right corner, its content is redrawn a few times per second
+    WIDTH = 280
+    GRAPH_HEIGHT = 60
+    GRAPH_FRAMES = 240
+    REFRESH_TIME = 0.25
+
+    def __init__(self, profiler: Profiler):
+        self.profiler = profiler
+        self.font = text_cache.get_font(FONT_PATH, 12)
+        self.line_height = self.font.get_linesize()
+        self.budget_ms = 1000.0 / FPS
+        self.surface = None
+        self.last_refresh = 0.0
+
+    def draw(self, screen: pygame.Surface):
+        now = time.perf_counter()
+        if self.surface is None or now - self.last_refresh >= self.REFRESH_TIME:
+            self.last_refresh = now
+            self.surface = self._compose()
+        screen.blit(self.surface, (screen.get_width() - self.surface.get_width(), 0))
+
+    # ------------------------- #
+    # 'Private Methods'         #
+    # ------------------------- #
+
+    def _compose(self) -> pygame.Surface:
+        frames = self.profiler.last_frames(self.GRAPH_FRAMES)
+        frame_ms = [(end - start) / 1e6 for start, end, _ in frames]
+
+        ## per zone average over the last second of frames, in first seen order
+        zone_ms = {}
+        zone_depth = {}
+        recent = frames[-FPS:]
+        for _, _, events in recent:
+            for name, start, end, depth in events:
+                zone_ms[name] = zone_ms.get(name, 0.0) + (end - start) / 1e6
+                zone_depth.setdefault(name, depth)
+
+        lines = []
+        if frame_ms:
+            ordered = sorted(frame_ms)
+            p50 = ordered[len(ordered) // 2]
+            p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+            lines.append(f"frame {frame_ms[-1]:5.2f} ms  p50 {p50:5.2f}  p99 {p99:5.2f}  budget {self.budget_ms:.1f}")
+        for name, total in zone_ms.items():
+            lines.append(f"{'  ' * zone_depth[name]}{name:<20} {total / len(recent):6.2f} ms")
+
+        height = (len(lines) + 1) * self.line_height + self.GRAPH_HEIGHT + 10
+        surface = pygame.Surface((self.WIDTH, height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 180))
+
+        with text_cache.lock:
+            for i, line in enumerate(lines):
+                surface.blit(self.font.render(line, True, "white"), (5, 5 + i * self.line_height))
+
+        ## frame time graph, the line marks the frame budget
+        graph_top = height - self.GRAPH_HEIGHT - 5
+        scale = self.GRAPH_HEIGHT / (2 * self.budget_ms)
+        bar_w = max(1, (self.WIDTH - 10) // self.GRAPH_FRAMES)
+        for i, ms in enumerate(frame_ms):
+            bar_h = min(self.GRAPH_HEIGHT, int(ms * scale))
+            color = (220, 60, 60) if ms > self.budget_ms else (80, 200, 80)
+            x = 5 + i * bar_w
+            pygame.draw.line(surface, color, (x, graph_top + self.GRAPH_HEIGHT), (x, graph_top + self.GRAPH_HEIGHT - bar_h), bar_w)
+        budget_y = graph_top + self.GRAPH_HEIGHT - int(self.budget_ms * scale)
+        pygame.draw.line(surface, (255, 255, 255), (5, budget_y), (self.WIDTH - 5, budget_y))
+        return surface
+
+
+profiler = Profiler()
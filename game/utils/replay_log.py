@@ -0,0 +1,122 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, struct
+from typing import List
+from .input import ScriptedKeys
+
+## Binary log of a session: everything the simulation consumes, per tick.
+##
+##   header:  magic "WCRP", version (uint16), simulation rate (uint16), rng seed (uint32)
+##   ticks:   dt (float64), held keys bitmask (uint16), number of key presses (uint8),
+##            followed by the pressed key codes (uint32 each)
+##   footer:  magic "WEND", number of ticks (uint32), sha1 digest of the world state
+##
+## The held keys are the ones the simulation polls, see RECORDED_KEYS.
+
+REPLAY_MAGIC = b"WCRP"
+REPLAY_END_MAGIC = b"WEND"
+REPLAY_VERSION = 1
+_HEADER = struct.Struct("<4sHHI")
+_TICK = struct.Struct("<dHB")
+_KEY = struct.Struct("<I")
+_FOOTER = struct.Struct("<4sI20s")
+
+RECORDED_KEYS = (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d, pygame.K_LSHIFT)
+
+
+class ReplayRecorder:
+    def __init__(self, path: str, seed: int, simulation_hz: int):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, simulation_hz, seed))
+        self.ticks = 0
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def record(self, dt: float, keys, events: List[pygame.event.Event]):
+        held = 0
+        for bit, key in enumerate(RECORDED_KEYS):
+            if keys[key]:
+                held |= 1 << bit
+        pressed = [e.key for e in events if e.type == pygame.KEYDOWN]
+        self.file.write(_TICK.pack(dt, held, len(pressed)))
+        for key in pressed:
+            self.file.write(_KEY.pack(key))
+        self.ticks += 1
+
+    def close(self, digest: bytes = b"\0" * 20):
+        if self.file.closed:
+            return
+        self.file.write(_FOOTER.pack(REPLAY_END_MAGIC, self.ticks, digest))
+        self.file.close()
+
+
+class ReplayReader:
+    ## Input source for Game: hands out the recorded keys, key presses and dt per tick
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            data = f.read()
+
+        if len(data) < _HEADER.size:
+            raise ValueError(f"{path} is not a supported replay")
+        magic, version, self.simulation_hz, self.seed = _HEADER.unpack_from(data, 0)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a supported replay")
+
+        ## the footer is missing if the recording game didn't shut down properly
+        self.digest = None
+        recorded_ticks = None
+        end = len(data)
+        if end - _HEADER.size >= _FOOTER.size and data[end - _FOOTER.size:end - _FOOTER.size + 4] == REPLAY_END_MAGIC:
+            end -= _FOOTER.size
+            _, recorded_ticks, self.digest = _FOOTER.unpack_from(data, end)
+
+        self.ticks = []
+        offset = _HEADER.size
+        while offset < end:
+            if offset + _TICK.size > end:
+                raise ValueError(f"{path} is truncated")
+            dt, held, count = _TICK.unpack_from(data, offset)
+            offset += _TICK.size
+            if offset + count * _KEY.size > end:
+                raise ValueError(f"{path} is truncated")
+            pressed = [_KEY.unpack_from(data, offset + i * _KEY.size)[0] for i in range(count)]
+            offset += count * _KEY.size
+            self.ticks.append((dt, held, pressed))
+
+        if recorded_ticks is not None and recorded_ticks != len(self.ticks):
+            raise ValueError(f"{path} has {len(self.ticks)} ticks, its footer says {recorded_ticks}")
+
+    @property
+    def length(self) -> int:
+        return len(self.ticks)
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def dt(self, tick: int) -> float:
+        return self.ticks[tick][0]
+
+    def apply(self, tick: int, keys: ScriptedKeys) -> List[pygame.event.Event]:
+        if tick >= len(self.ticks):
+            keys.held.clear()
+            return []
+        _, held, pressed = self.ticks[tick]
+        keys.held = {key for bit, key in enumerate(RECORDED_KEYS) if held & (1 << bit)}
+        return [pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0) for key in pressed]
@@ -0,0 +1,27 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import random
+
+## Random numbers for everything which changes the game world (trash bin content,
+## refill times, beer bottles...). Its seed is set once per session and stored in
+## recordings, so a replay draws exactly the same numbers. Purely visual effects
+## like the menu particles use their own generators.
+rng = random.Random()
+
+def seed_gameplay(seed: int = None) -> int:
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(32)
+    rng.seed(seed)
+    return seed
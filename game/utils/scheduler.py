@@ -0,0 +1,63 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import heapq
+from typing import Callable
+
+## Min-heap of callbacks keyed by their due time in scene time. advance() only
+## touches the entries which are due, so thousands of sleeping timers cost nothing
+## per tick. Entries due in the same tick fire in due time order, ties in the order
+## they were scheduled.
+class Scheduler:
+    def __init__(self):
+        self.now = 0.0
+        self.heap = []
+        self.counter = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> list:
+        ## returns the entry, which can be passed to cancel()
+        entry = [self.now + delay, self.counter, callback]
+        self.counter += 1
+        heapq.heappush(self.heap, entry)
+        return entry
+
+    def cancel(self, entry: list):
+        ## removed lazily once it comes up
+        entry[2] = None
+
+    def advance(self, dt: float) -> int:
+        ## moves scene time on by dt and runs everything which is due, returns how many ran.
+        ## The clock is at each entry's due time while it runs, so callbacks which
+        ## reschedule themselves fire as often within dt as they would in smaller steps.
+        target = self.now + dt
+        fired = 0
+        heap = self.heap
+        while heap and heap[0][0] <= target:
+            due, _, callback = heapq.heappop(heap)
+            if callback is not None:
+                self.now = due
+                callback()
+                fired += 1
+        self.now = target
+        return fired
+
+    def clear(self):
+        self.heap.clear()
@@ -0,0 +1,125 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame
+from typing import Dict, List, Tuple
+from .params import *
+
+## Uniform grid over sprite rects: queries only touch the cells a rect overlaps,
+## so their cost depends on the queried area and not on the number of sprites.
+class SpatialHash:
+    def __init__(self, cell_size: int = SPATIAL_HASH_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[pygame.sprite.Sprite]] = {}
+        self.sprite_cells: Dict[pygame.sprite.Sprite, List[Tuple[int, int]]] = {}
+        ## insertion order, used to keep the draw order of the source groups
+        self.order: Dict[pygame.sprite.Sprite, int] = {}
+        self.counter = 0
+
+    def __len__(self):
+        return len(self.sprite_cells)
+
+    def __contains__(self, sprite):
+        return sprite in self.sprite_cells
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def build(self, *groups):
+        self.clear()
+        for group in groups:
+            for sprite in group:
+                self.insert(sprite)
+
+    def clear(self):
+        self.cells.clear()
+        self.sprite_cells.clear()
+        self.order.clear()
+        self.counter = 0
+
+    def insert(self, sprite: pygame.sprite.Sprite):
+        if sprite in self.sprite_cells:
+            self.move(sprite)
+            return
+        keys = self._cell_keys(sprite.rect)
+        self._add_to_cells(sprite, keys)
+        self.sprite_cells[sprite] = keys
+        self.order[sprite] = self.counter
+        self.counter += 1
+
+    def remove(self, sprite: pygame.sprite.Sprite):
+        keys = self.sprite_cells.pop(sprite, None)
+        if keys is None:
+            return
+        del self.order[sprite]
+        self._remove_from_cells(sprite, keys)
+
+    def move(self, sprite: pygame.sprite.Sprite):
+        ## For moving sprites, call after sprite.rect changed. Only touches
+        ## the cells when the sprite crossed a cell border, keeps its order.
+        old_keys = self.sprite_cells.get(sprite)
+        if old_keys is None:
+            self.insert(sprite)
+            return
+        keys = self._cell_keys(sprite.rect)
+        if keys == old_keys:
+            return
+        self._remove_from_cells(sprite, old_keys)
+        self._add_to_cells(sprite, keys)
+        self.sprite_cells[sprite] = keys
+
+    def query(self, rect: pygame.Rect) -> List[pygame.sprite.Sprite]:
+        found = []
+        seen = set()
+        for key in self._cell_keys(rect):
+            cell = self.cells.get(key)
+            if cell is None:
+                continue
+            for sprite in cell:
+                if sprite in seen:
+                    continue
+                seen.add(sprite)
+                if rect.colliderect(sprite.rect):
+                    found.append(sprite)
+        if len(found) > 1:
+            found.sort(key=self.order.__getitem__)
+        return found
+
+    # ------------------------- #
+    # 'Private Methods'         #
+    # ------------------------- #
+
+    def _add_to_cells(self, sprite: pygame.sprite.Sprite, keys: List[Tuple[int, int]]):
+        for key in keys:
+            cell = self.cells.get(key)
+            if cell is None:
+                self.cells[key] = [sprite]
+            else:
+                cell.append(sprite)
+
+    def _remove_from_cells(self, sprite: pygame.sprite.Sprite, keys: List[Tuple[int, int]]):
+        for key in keys:
+            cell = self.cells[key]
+            cell.remove(sprite)
+            if not cell:
+                del self.cells[key]
+
+    def _cell_keys(self, rect: pygame.Rect) -> List[Tuple[int, int]]:
+        size = self.cell_size
+        x0, y0 = rect.left // size, rect.top // size
+        ## right/bottom are exclusive, a zero sized rect still occupies its cell
+        x1 = max(rect.right - 1, rect.left) // size
+        y1 = max(rect.bottom - 1, rect.top) // size
+        return [(x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
@@ -13,10 +13,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 import pygame
+from .assets import assets
+
+## Both loaders decode a sheet only once (through the asset registry, which also
+## serves it from the sprite atlas if one was built) and return per pixel alpha frames.
 
 def load_sprite(file, start_col, start_row, num_cols, num_rows, total_rows, total_cols, size = None):
-    sheet = pygame.image.load(file).convert()
-    sheet.set_colorkey((255, 255, 255))
+    ## white is the transparent color of these sheets
+    sheet = assets.colorkeyed(file, (255, 255, 255))
 
     sheet_w, sheet_h = sheet.get_size()
     sprite_w = sheet_w // total_cols
@@ -30,27 +34,23 @@ def load_sprite(file, start_col, start_row, num_cols, num_rows, total_rows, tota
             current_w = sprite_w * (col + start_col)
             image = sheet.subsurface(pygame.rect.Rect(current_w, current_h, sprite_w, sprite_h))
             if size:
-                image = pygame.transform.scale(image, size).convert()
-                image.set_colorkey((255, 255, 255))
+                image = pygame.transform.scale(image, size)
             sprites.append(image)
 
     return sprites
 
 
 def load_sprite_with_sprite_size(file, start_col, start_row, num_cols, num_rows, sprite_w, sprite_h, size = None):
-    sheet = pygame.image.load(file).convert_alpha()
-
     sprites = []
 
-    current_h = 0
-    current_w = 0
     for row in range(num_rows):
         current_h = sprite_h * (row + start_row)
+        ## scale a whole row at once and cut the frames out of it
+        row_rect = pygame.rect.Rect(sprite_w * start_col, current_h, sprite_w * num_cols, sprite_h)
+        row_size = (size[0] * num_cols, size[1]) if size else None
+        strip = assets.region(file, row_rect, row_size)
+        frame_w, frame_h = size if size else (sprite_w, sprite_h)
         for col in range(num_cols):
-            current_w = sprite_w * (col + start_col)
-            image = sheet.subsurface(pygame.rect.Rect(current_w, current_h, sprite_w, sprite_h))
-            if size:
-                image = pygame.transform.scale(image, size).convert_alpha()
-            sprites.append(image)
+            sprites.append(strip.subsurface(pygame.rect.Rect(frame_w * col, 0, frame_w, frame_h)))
 
     return sprites
\ No newline at end of file
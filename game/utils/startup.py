@@ -0,0 +1,44 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import time, threading
+from .params import *
+
+## Startup timeline: milliseconds since this module was imported (the first thing
+## main.py does) for every milestone, e.g. "import", "display init", "first frame"
+## and "game ready". Each milestone is recorded once, later marks are ignored.
+class StartupTimeline:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = {}
+        self.verbose = PRINT_STARTUP_TIMELINE
+        self.lock = threading.Lock()
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def mark(self, name: str) -> float:
+        with self.lock:
+            if name not in self.marks:
+                self.marks[name] = (time.perf_counter() - self.start) * 1000.0
+                if self.verbose:
+                    print(f"[startup] {name:<14} {self.marks[name]:8.1f} ms")
+            return self.marks[name]
+
+    def elapsed(self, name: str) -> float:
+        return self.marks.get(name)
+
+
+startup = StartupTimeline()
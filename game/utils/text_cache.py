@@ -0,0 +1,95 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, threading
+from collections import OrderedDict
+from .params import *
+from .assets import assets
+
+## Shared cache for rendered text surfaces, keyed by
+## (font file, font size, text, color, antialias, background) with LRU eviction.
+## The returned surfaces are shared, callers must not draw onto them.
+## SDL_ttf is not thread safe, every font access goes through the lock.
+class TextCache:
+    def __init__(self, max_entries: int = TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.fonts = {}
+        self.font_keys = {}
+        self.surfaces = OrderedDict()
+        self.lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def get_font(self, path: str, size: int) -> pygame.font.Font:
+        with self.lock:
+            font = self.fonts.get((path, size))
+            if font is None:
+                font = pygame.font.Font(assets.open_file(path) if assets.is_archived(path) else path, size)
+                self.fonts[(path, size)] = font
+                self.font_keys[font] = (path, size)
+            return font
+
+    def render(self, font: pygame.font.Font, text: str, color, aa: bool = True, bkg = None) -> pygame.Surface:
+        with self.lock:
+            path, size = self.font_keys.get(font, (font, None))
+            key = (path, size, text, self._color_key(color), bool(aa), self._color_key(bkg))
+
+            surf = self.surfaces.get(key)
+            if surf is not None:
+                self.hits += 1
+                self.surfaces.move_to_end(key)
+                return surf
+
+            self.misses += 1
+            if bkg is None:
+                surf = font.render(text, aa, color)
+            else:
+                surf = font.render(text, aa, color, bkg)
+            self.surfaces[key] = surf
+            if len(self.surfaces) > self.max_entries:
+                self.surfaces.popitem(last=False)
+            return surf
+
+    def clear(self):
+        with self.lock:
+            self.surfaces.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.surfaces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total > 0 else 0.0
+        }
+
+    # ------------------------- #
+    # 'Private Methods'         #
+    # ------------------------- #
+
+    def _color_key(self, color):
+        ## pygame.Color is mutable and can't be used as a dict key
+        if isinstance(color, pygame.Color):
+            return tuple(color)
+        return color
+
+
+text_cache = TextCache()
@@ -0,0 +1,132 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame, enum, bisect, itertools
+from typing import List
+from .text_cache import text_cache
+
+class TEXT_ALIGN(enum.Enum):
+    LEFT = 0
+    CENTER = 1
+    RIGHT = 2
+
+## Measuring goes through SDL_ttf, which has to be serialized with rendering.
+
+def glyph_advances(font: pygame.font.Font, text: str) -> List[int]:
+    ## advance of every character, all measured in one call. Their sum ignores kerning,
+    ## so it is only an estimate of the rendered width, see text_width
+    with text_cache.lock:
+        metrics = font.metrics(text)
+        return [m[4] if m else font.size(char)[0] for char, m in zip(text, metrics)]
+
+def text_width(font: pygame.font.Font, text: str) -> int:
+    ## width of text as font.render draws it
+    with text_cache.lock:
+        return font.size(text)[0]
+
+
+class TextLayout:
+    def __init__(self, font: pygame.font.Font, text: str, rect: pygame.Rect, align: TEXT_ALIGN = TEXT_ALIGN.CENTER, line_spacing: int = 5):
+        self.font = font
+        self.text = text
+        self.rect = pygame.rect.Rect(rect)
+        self.align = align
+        self.line_spacing = line_spacing
+        with text_cache.lock:
+            self.line_height = font.size("Tg")[1]
+
+        ## [(line text, (x, y))], positions relative to the target surface
+        self.lines = []
+        ## text which didn't fit into rect anymore
+        self.remaining = ""
+
+        self._layout()
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def draw(self, surface: pygame.Surface, color, aa: bool = True, bkg = None, clip: bool = True):
+        if clip:
+            old_clip = surface.get_clip()
+            surface.set_clip(self.rect.clip(old_clip))
+
+        blit_sequence = []
+        for line, pos in self.lines:
+            image = text_cache.render(self.font, line, color, aa, bkg)
+            if bkg:
+                image.set_colorkey(bkg)
+            blit_sequence.append((image, pos))
+        surface.blits(blit_sequence, False)
+
+        if clip:
+            surface.set_clip(old_clip)
+
+    # ------------------------- #
+    # 'Private Methods'         #
+    # ------------------------- #
+
+    def _layout(self):
+        text = self.text
+        n = len(text)
+        ## prefix[i] is the estimated width of text[:i], of text[a:b] it is prefix[b] - prefix[a]
+        prefix = list(itertools.accumulate(glyph_advances(self.font, text), initial=0))
+        max_width = self.rect.width
+
+        start = 0
+        y = self.rect.top
+        while start < n:
+            if y + self.line_height > self.rect.bottom:
+                break
+
+            ## an explicit newline ends the line, it isn't drawn
+            stop = text.find("\n", start)
+            if stop < 0:
+                stop = n
+
+            ## first end index where the line reaches the full width, a line has to
+            ## stay narrower than the rect (as with the old drawText)
+            end = bisect.bisect_left(prefix, prefix[start] + max_width, start + 1, stop + 1)
+            end = min(end, stop)
+
+            ## wrap at the last word boundary, or hard break a word that is too long
+            if end < stop:
+                space = text.rfind(" ", start, end)
+                if space >= start:
+                    end = space + 1
+                else:
+                    end = max(end - 1, start + 1)
+
+            ## the estimate ignores kerning, the line has to fit as it is rendered
+            ## (without the space it was wrapped at)
+            line = text[start:end]
+            width = text_width(self.font, line.rstrip(" "))
+            while width >= max_width and end - start > 1:
+                space = text.rfind(" ", start, end - 1)
+                end = space + 1 if space >= start else end - 1
+                line = text[start:end]
+                width = text_width(self.font, line.rstrip(" "))
+
+            self.lines.append((line, (self._line_x(width), y)))
+            y += self.line_height + self.line_spacing
+            start = end + 1 if end == stop < n else end
+
+        self.remaining = text[start:]
+
+    def _line_x(self, width: int) -> int:
+        if self.align == TEXT_ALIGN.LEFT:
+            return self.rect.left
+        elif self.align == TEXT_ALIGN.RIGHT:
+            return self.rect.right - width
+        return self.rect.left + self.rect.width // 2 - width // 2
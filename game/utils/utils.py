@@ -13,6 +13,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 import pygame, copy
+from .text_layout import TextLayout, TEXT_ALIGN
 
 def clamp(value, lower, upper):
     if value > upper:
@@ -29,46 +30,27 @@ def interpolate(x, x1, x2, y1, y2):
     else:
         return None # Error Case
     
-def drawText(surface: pygame.Surface, text, color, font, aa=False, bkg=None):
+def merge_rects(rects):
+    ## Merge overlapping rects, so no screen region gets redrawn twice
+    merged = []
+    for rect in rects:
+        rect = pygame.rect.Rect(rect)
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+def text_area(surface: pygame.Surface) -> pygame.Rect:
     PADDING = 20
     width = surface.get_width() - 2 * PADDING
     height = surface.get_height() - 3 * PADDING
-    width_h, height_h = width // 2, height // 2
-    rect = pygame.rect.Rect(PADDING, PADDING, width, height)
-    y = rect.top
-    lineSpacing = 5
-
-    # get the height of the font
-    fontHeight = font.size("Tg")[1]
-
-    while text:
-        i = 1
-
-        # determine if the row of text will be outside our area
-        if y + fontHeight > rect.bottom:
-            break
-
-        # determine maximum width of line
-        while font.size(text[:i])[0] < rect.width and i < len(text):
-            i += 1
+    return pygame.rect.Rect(PADDING, PADDING, width, height)
 
-        # if we've wrapped the text, then adjust the wrap to the last word      
-        if i < len(text): 
-            i = text.rfind(" ", 0, i) + 1
-
-        # render the line and blit it to the surface
-        if bkg:
-            image = font.render(text[:i], 1, color, bkg)
-            image.set_colorkey(bkg)
-        else:
-            image = font.render(text[:i], aa, color)
-
-        image_rect = image.get_rect(midtop = (width_h + PADDING, y))
-        surface.blit(image, image_rect)
-        # surface.blit(image, (rect.centerx, y))
-        y += fontHeight + lineSpacing
-
-        # remove the text we just blitted
-        text = text[i:]
+def drawText(surface: pygame.Surface, text, color, font, aa=False, bkg=None):
+    ## one shot wrapper around TextLayout, keep the layout around to redraw the same text
+    layout = TextLayout(font, text, text_area(surface), TEXT_ALIGN.CENTER, 5)
+    layout.draw(surface, color, aa, bkg)
 
-    return text
\ No newline at end of file
+    return layout.remaining
\ No newline at end of file
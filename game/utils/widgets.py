@@ -0,0 +1,226 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pygame
+from typing import List
+from .text_cache import text_cache
+from .text_layout import TextLayout, TEXT_ALIGN
+
+## Small retained-mode widget tree:
+##  - every widget keeps its own surface and only redraws it after invalidate()
+##  - widgets can be bound to a getter, sync() polls it and invalidates on change
+##  - refresh() recomposites only the regions of the children which changed, and
+##    reports them to the parent, so a changed label doesn't redraw the whole tree
+## Widget rects are relative to the parent widget.
+
+_UNBOUND = object()
+TRANSPARENT = (0, 0, 0, 0)
+
+class Widget:
+    def __init__(self, rect, parent: "Widget" = None):
+        self.rect = pygame.rect.Rect(rect)
+        self.image = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        ## own content without the children, used to restore regions of changed children
+        self.background = None
+
+        self.parent = None
+        self.children = []
+        self.visible = True
+        self.needs_redraw = True
+        self.child_dirty = False
+
+        self.binding = None
+        self.bound_value = _UNBOUND
+
+        if parent:
+            parent.add(self)
+
+    # ------------------------- #
+    # 'Public Methods'          #
+    # ------------------------- #
+
+    def add(self, child: "Widget") -> "Widget":
+        child.parent = self
+        self.children.append(child)
+        self.invalidate()
+        return child
+
+    def bind(self, getter: callable) -> "Widget":
+        self.binding = getter
+        self.bound_value = _UNBOUND
+        return self
+
+    def invalidate(self):
+        self.needs_redraw = True
+        parent = self.parent
+        while parent and not parent.child_dirty:
+            parent.child_dirty = True
+            parent = parent.parent
+
+    def set_visible(self, visible: bool):
+        if visible != self.visible:
+            self.visible = visible
+            self.invalidate()
+
+    def sync(self):
+        if self.binding:
+            value = self.binding()
+            if value != self.bound_value:
+                self.bound_value = value
+                self.on_bound_change(value)
+        for child in self.children:
+            child.sync()
+
+    def refresh(self) -> List[pygame.Rect]:
+        ## Brings self.image up to date, returns the regions which changed (relative to
+        ## this widget), an empty list if nothing did
+        if self.needs_redraw:
+            self.needs_redraw = False
+            self.child_dirty = False
+            self.draw(self.image)
+            if self.children:
+                if self.background is None:
+                    self.background = self.image.copy()
+                else:
+                    ## exact copy into the existing buffer, no new allocation
+                    self.background.fill(TRANSPARENT)
+                    self.background.blit(self.image, (0, 0), None, pygame.BLEND_RGBA_MAX)
+                for child in self.children:
+                    child.refresh()
+                    if child.visible:
+                        self.image.blit(child.image, child.rect)
+            return [self.image.get_rect()]
+
+        if self.child_dirty:
+            self.child_dirty = False
+            changed = []
+            for child in self.children:
+                for rect in child.refresh():
+                    changed.append(rect.move(child.rect.topleft))
+            for rect in changed:
+                self._recomposite(rect)
+            return changed
+
+        return []
+
+    # ------------------------- #
+    # 'Overridables'            #
+    # ------------------------- #
+
+    def draw(self, surface: pygame.Surface):
+        surface.fill(TRANSPARENT)
+
+    def on_bound_change(self, value):
+        self.invalidate()
+
+    # ------------------------- #
+    # 'Private Methods'         #
+    # ------------------------- #
+
+    def _recomposite(self, rect: pygame.Rect):
+        ## restore the own content under rect, then every child overlapping it
+        self.image.fill(TRANSPARENT, rect)
+        self.image.blit(self.background, rect, rect, pygame.BLEND_RGBA_MAX)
+        old_clip = self.image.get_clip()
+        self.image.set_clip(rect)
+        for child in self.children:
+            if child.visible and child.rect.colliderect(rect):
+                self.image.blit(child.image, child.rect)
+        self.image.set_clip(old_clip)
+
+
+class Panel(Widget):
+    def __init__(self, rect, color, radius: int = 0, parent: Widget = None):
+        self.color = color
+        self.radius = radius
+        super().__init__(rect, parent)
+
+    def draw(self, surface: pygame.Surface):
+        surface.fill(TRANSPARENT)
+        if self.radius > 0:
+            pygame.draw.rect(surface, self.color, surface.get_rect(), 0, self.radius)
+        else:
+            surface.fill(self.color)
+
+    def set_color(self, color):
+        if color != self.color:
+            self.color = color
+            self.invalidate()
+
+
+class ImageWidget(Widget):
+    def __init__(self, rect, image: pygame.Surface, anchor: str = "center", parent: Widget = None):
+        self.source = image
+        self.anchor = anchor
+        super().__init__(rect, parent)
+
+    def draw(self, surface: pygame.Surface):
+        surface.fill(TRANSPARENT)
+        anchor_pos = getattr(surface.get_rect(), self.anchor)
+        surface.blit(self.source, self.source.get_rect(**{self.anchor: anchor_pos}))
+
+
+class Label(Widget):
+    ## Single line of text, placed at the given anchor of the label rect
+    def __init__(self, rect, font: pygame.font.Font, text: str = "", color = (0, 0, 0), anchor: str = "center", parent: Widget = None):
+        self.font = font
+        self.text = text
+        self.color = color
+        self.anchor = anchor
+        super().__init__(rect, parent)
+
+    def set_text(self, text: str):
+        if text != self.text:
+            self.text = text
+            self.invalidate()
+
+    def set_color(self, color):
+        if color != self.color:
+            self.color = color
+            self.invalidate()
+
+    def on_bound_change(self, value):
+        self.set_text(value)
+
+    def draw(self, surface: pygame.Surface):
+        surface.fill(TRANSPARENT)
+        if self.text:
+            text = text_cache.render(self.font, self.text, self.color)
+            anchor_pos = getattr(surface.get_rect(), self.anchor)
+            surface.blit(text, text.get_rect(**{self.anchor: anchor_pos}))
+
+
+class TextBlock(Widget):
+    ## Wrapped multi line text, laid out with TextLayout
+    def __init__(self, rect, font: pygame.font.Font, text: str = "", color = (0, 0, 0), align: TEXT_ALIGN = TEXT_ALIGN.CENTER, parent: Widget = None):
+        self.font = font
+        self.text = text
+        self.color = color
+        self.align = align
+        self.layout = None
+        super().__init__(rect, parent)
+
+    def set_text(self, text: str):
+        if text != self.text:
+            self.text = text
+            self.invalidate()
+
+    def on_bound_change(self, value):
+        self.set_text(value)
+
+    def draw(self, surface: pygame.Surface):
+        surface.fill(TRANSPARENT)
+        if self.layout is None or self.layout.text != self.text:
+            self.layout = TextLayout(self.font, self.text, surface.get_rect(), self.align)
+        self.layout.draw(surface, self.color, True)
@@ -13,7 +13,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+from game.utils.startup import startup
 from game.game import Game
+startup.mark("import")
 
 
 
@@ -0,0 +1,65 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import math, statistics
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from game.utils.rng import seed_gameplay
+from game.utils.scheduler import Scheduler
+from game.entities.boxes_entity import TrashBin
+
+## Catching up a bin in one step has to give the same distribution of content and
+## time until the next refill as running every refill through the scheduler.
+
+FIELDS = ("bottle", "can", "trash", "money")
+
+def _run(elapsed, count, catch_up):
+    surf = pygame.Surface((32, 32))
+    samples = []
+    for _ in range(count):
+        scheduler = Scheduler()
+        trash_bin = TrashBin((0, 0), surf, pygame.sprite.Group(), scheduler)
+        if catch_up:
+            trash_bin.catch_up(elapsed)
+        scheduler.advance(elapsed)
+        next_refill = trash_bin.refill_entry[0] - scheduler.now
+        samples.append([trash_bin.content[field] for field in FIELDS] + [next_refill])
+    return samples
+
+def _assert_same_means(expected, actual):
+    ## within five standard errors of the difference
+    for column in range(len(expected[0])):
+        a = [sample[column] for sample in expected]
+        b = [sample[column] for sample in actual]
+        error = math.sqrt(statistics.pvariance(a) / len(a) + statistics.pvariance(b) / len(b))
+        assert abs(statistics.fmean(a) - statistics.fmean(b)) <= 5 * error + 1e-9, column
+
+@pytest.mark.parametrize("elapsed, count", [(30.5, 3000), (200.25, 2000), (3000.5, 500)])
+def test_catch_up_matches_scheduler(elapsed, count):
+    seed_gameplay(7)
+    expected = _run(elapsed, count, catch_up = False)
+    actual = _run(elapsed, count, catch_up = True)
+    _assert_same_means(expected, actual)
+
+def test_catch_up_without_refill_only_moves_the_timer():
+    seed_gameplay(7)
+    scheduler = Scheduler()
+    trash_bin = TrashBin((0, 0), pygame.Surface((32, 32)), pygame.sprite.Group(), scheduler)
+    due = trash_bin.refill_entry[0]
+    trash_bin.catch_up(1.0)
+    scheduler.advance(1.0)
+    assert trash_bin.refill_entry[0] == due
+    assert trash_bin.content == {"bottle": 0, "can": 0, "trash": 0, "money": 0}
@@ -0,0 +1,81 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from game.utils.collision import move_and_slide, sweep_aabb, swept_bounds, resolve_overlaps, X_AXIS, Y_AXIS
+
+HALF = (10, 10)
+
+def _overlaps(center, rect):
+    hw, hh = HALF
+    return center.x + hw > rect.left and center.x - hw < rect.right and center.y + hh > rect.top and center.y - hh < rect.bottom
+
+
+def test_fast_mover_does_not_tunnel_through_a_thin_box():
+    wall = pygame.rect.Rect(100, 0, 2, 100)
+    center = move_and_slide(pygame.Vector2(0, 50), HALF, pygame.Vector2(1000, 0), [wall])
+    assert center == pygame.Vector2(90, 50)
+
+def test_fast_mover_stops_at_the_first_of_several_boxes():
+    walls = [pygame.rect.Rect(300, 0, 2, 100), pygame.rect.Rect(100, 0, 2, 100)]
+    center = move_and_slide(pygame.Vector2(0, 50), HALF, pygame.Vector2(1000, 0), walls)
+    assert center == pygame.Vector2(90, 50)
+
+def test_slides_along_a_wall():
+    wall = pygame.rect.Rect(100, 0, 20, 200)
+    center = move_and_slide(pygame.Vector2(50, 50), HALF, pygame.Vector2(100, 20), [wall])
+    assert center.x == 90
+    assert center.y == pytest.approx(70)
+
+def test_moving_along_a_touching_wall_is_not_blocked():
+    wall = pygame.rect.Rect(100, 0, 10, 300)
+    center = move_and_slide(pygame.Vector2(90, 50), HALF, pygame.Vector2(0, 100), [wall])
+    assert center == pygame.Vector2(90, 150)
+
+def test_outer_corner_contact():
+    ## exactly diagonal onto the corner: stops on one side and slides past the corner
+    block = pygame.rect.Rect(100, 100, 50, 50)
+    center = move_and_slide(pygame.Vector2(80, 80), HALF, pygame.Vector2(20, 20), [block])
+    assert not _overlaps(center, block)
+    assert center == pygame.Vector2(90, 100)
+
+def test_inner_corner_stops_in_the_corner():
+    right = pygame.rect.Rect(100, 0, 20, 120)
+    below = pygame.rect.Rect(0, 100, 120, 20)
+    center = move_and_slide(pygame.Vector2(50, 60), HALF, pygame.Vector2(200, 200), [right, below])
+    assert center == pygame.Vector2(90, 90)
+    assert not _overlaps(center, right) and not _overlaps(center, below)
+
+def test_sweep_reports_time_and_axis():
+    rect = pygame.rect.Rect(100, 0, 20, 100)
+    assert sweep_aabb(pygame.Vector2(0, 50), HALF, pygame.Vector2(180, 0), rect) == (0.5, X_AXIS)
+    assert sweep_aabb(pygame.Vector2(110, 150), HALF, pygame.Vector2(0, -80), rect) == (0.5, Y_AXIS)
+    assert sweep_aabb(pygame.Vector2(0, 50), HALF, pygame.Vector2(50, 0), rect) is None
+    assert sweep_aabb(pygame.Vector2(0, 50), HALF, pygame.Vector2(-180, 0), rect) is None
+
+def test_resolve_overlaps_pushes_out_along_the_shallowest_axis():
+    rect = pygame.rect.Rect(100, 0, 100, 100)
+    center = pygame.Vector2(95, 50)
+    assert resolve_overlaps(center, HALF, [rect]) == 1
+    assert center == pygame.Vector2(90, 50)
+
+def test_swept_bounds_cover_start_and_end():
+    center = pygame.Vector2(50.5, 40.25)
+    delta = pygame.Vector2(-30.5, 70)
+    bounds = swept_bounds(center, HALF, delta)
+    for point in (center, center + delta):
+        assert bounds.contains(pygame.rect.Rect(point.x - 10, point.y - 10, 20, 20))
@@ -0,0 +1,53 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import os
+import pytest
+
+pygame = pytest.importorskip("pygame")
+pytest.importorskip("pytmx")
+pytest.importorskip("numpy")
+
+from game.utils.params import *
+from game.utils.input import InputScript, keyboard
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+pytestmark = pytest.mark.skipif(not os.path.isdir(os.path.join(REPO_ROOT, "game", "assets")), reason = "needs the game assets")
+
+
+def _run_through_portal(seed):
+    from game.game import Game
+    from game.level.game_level import GAME_WORLDS
+    ## the player is put right on a portal and interacts with it on tick 2
+    script = InputScript([(2, "press", pygame.K_SPACE)])
+    game = Game(headless=True, render=False, skip_menu=True, input_source=script, seed=seed)
+    level = game.current_level
+    portal = next(iter(level.scenes[GAME_WORLDS.NORMAL_WORLD].portals_group))
+    level.player.update_pos(pygame.Vector2(portal.rect.center))
+    level.player.interaction_box.rect.center = portal.rect.center
+
+    game.simulate(SIMULATION_HZ * 5)
+    return level.current_world, game.finish()
+
+def test_scripted_runs_through_a_portal_are_reproducible(monkeypatch):
+    from game.level.game_level import GAME_WORLDS
+    monkeypatch.chdir(REPO_ROOT)
+    try:
+        world_a, digest_a = _run_through_portal(1234)
+        world_b, digest_b = _run_through_portal(1234)
+    finally:
+        keyboard.use_device()
+        pygame.quit()
+    assert world_a != GAME_WORLDS.NORMAL_WORLD
+    assert (world_a, digest_a) == (world_b, digest_b)
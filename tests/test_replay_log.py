@@ -0,0 +1,103 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import struct
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from game.utils.input import ScriptedKeys
+from game.utils.replay_log import ReplayRecorder, ReplayReader
+
+## A recording read back has to hand out exactly the keys, key presses and dt it was fed.
+
+DIGEST = bytes(range(20))
+
+def _keys(*held):
+    keys = ScriptedKeys()
+    keys.held = set(held)
+    return keys
+
+def _keydown(key):
+    return pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0)
+
+## (dt, held keys, events)
+TICKS = [
+    (1 / 60, (), []),
+    (1 / 60, (pygame.K_w,), [_keydown(pygame.K_e)]),
+    (0.02, (pygame.K_w, pygame.K_LSHIFT), [_keydown(pygame.K_i), pygame.event.Event(pygame.KEYUP, key=pygame.K_e), _keydown(pygame.K_RETURN)]),
+    (1 / 30, (pygame.K_a, pygame.K_s, pygame.K_d), []),
+    (1 / 60, (pygame.K_SPACE,), [_keydown(pygame.K_ESCAPE)]),
+]
+
+def _record(path, close = True):
+    recorder = ReplayRecorder(str(path), seed=1234, simulation_hz=60)
+    for dt, held, events in TICKS:
+        recorder.record(dt, _keys(*held), events)
+    if close:
+        recorder.close(DIGEST)
+    else:
+        recorder.file.close()
+    return path
+
+
+def test_round_trip(tmp_path):
+    replay = ReplayReader(str(_record(tmp_path / "session.wcr")))
+    assert replay.seed == 1234
+    assert replay.simulation_hz == 60
+    assert replay.length == len(TICKS)
+    assert replay.digest == DIGEST
+
+    keys = ScriptedKeys()
+    for tick, (dt, held, events) in enumerate(TICKS):
+        assert replay.dt(tick) == dt
+        pressed = replay.apply(tick, keys)
+        ## only the polled keys are recorded, space isn't one of them
+        assert keys.held == set(held) - {pygame.K_SPACE}
+        assert [e.key for e in pressed] == [e.key for e in events if e.type == pygame.KEYDOWN]
+        assert all(e.type == pygame.KEYDOWN for e in pressed)
+
+    ## past the end nothing is held anymore
+    assert replay.apply(len(TICKS), keys) == []
+    assert keys.held == set()
+
+def test_missing_footer(tmp_path):
+    replay = ReplayReader(str(_record(tmp_path / "crashed.wcr", close=False)))
+    assert replay.length == len(TICKS)
+    assert replay.digest is None
+
+def test_truncated_file_is_rejected(tmp_path):
+    data = _record(tmp_path / "session.wcr", close=False).read_bytes()
+    ## cut inside the last key press and inside the header
+    for length in (len(data) - 2, 5):
+        path = tmp_path / f"truncated-{length}.wcr"
+        path.write_bytes(data[:length])
+        with pytest.raises(ValueError):
+            ReplayReader(str(path))
+
+def test_footer_tick_count_is_checked(tmp_path):
+    data = _record(tmp_path / "session.wcr").read_bytes()
+    path = tmp_path / "dropped.wcr"
+    ## the first tick (no key presses) is missing
+    path.write_bytes(data[:12] + data[12 + struct.calcsize("<dHB"):])
+    with pytest.raises(ValueError):
+        ReplayReader(str(path))
+
+def test_bad_header_is_rejected(tmp_path):
+    data = _record(tmp_path / "session.wcr").read_bytes()
+    for name, header in (("magic", b"XXXX" + data[4:12]), ("version", data[:4] + struct.pack("<H", 99) + data[6:12])):
+        path = tmp_path / f"{name}.wcr"
+        path.write_bytes(header + data[12:])
+        with pytest.raises(ValueError):
+            ReplayReader(str(path))
@@ -0,0 +1,38 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+from game.utils.scheduler import Scheduler
+
+
+def test_periodic_callback_fires_every_period_within_one_advance():
+    scheduler = Scheduler()
+    fired = []
+    def tick():
+        fired.append(scheduler.now)
+        scheduler.schedule(2.0, tick)
+    scheduler.schedule(2.0, tick)
+
+    assert scheduler.advance(9.0) == 4
+    assert fired == [2.0, 4.0, 6.0, 8.0]
+    assert scheduler.now == 9.0
+    assert scheduler.heap[0][0] == 10.0
+
+def test_cancelled_entries_do_not_fire():
+    scheduler = Scheduler()
+    fired = []
+    entry = scheduler.schedule(1.0, lambda: fired.append("cancelled"))
+    scheduler.schedule(2.0, lambda: fired.append("kept"))
+    scheduler.cancel(entry)
+    assert scheduler.advance(5.0) == 1
+    assert fired == ["kept"]
@@ -0,0 +1,102 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import random
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from game.utils.spatial_hash import SpatialHash
+
+## Every query has to return what a brute force colliderect scan over the indexed
+## sprites returns, in insertion order.
+
+class Box(pygame.sprite.Sprite):
+    def __init__(self, rect):
+        super().__init__()
+        self.rect = pygame.rect.Rect(rect)
+
+def _random_rect(rand, max_size = 200):
+    ## sizes up to several cells, also partly at negative coordinates
+    return pygame.rect.Rect(rand.randint(-300, 1000), rand.randint(-300, 1000), rand.randint(1, max_size), rand.randint(1, max_size))
+
+def _brute_force(sprites, rect):
+    return [sprite for sprite in sprites if rect.colliderect(sprite.rect)]
+
+def _check_queries(index, sprites, rand, count = 200):
+    for _ in range(count):
+        rect = _random_rect(rand, 400)
+        assert index.query(rect) == _brute_force(sprites, rect)
+
+
+def test_query_matches_brute_force():
+    rand = random.Random(1)
+    sprites = [Box(_random_rect(rand)) for _ in range(300)]
+    index = SpatialHash(64)
+    index.build(sprites)
+    assert len(index) == 300
+    _check_queries(index, sprites, rand)
+
+def test_sprites_spanning_cells_are_found_once():
+    big = Box((10, 10, 300, 300))
+    index = SpatialHash(64)
+    index.insert(big)
+    assert index.query(pygame.rect.Rect(0, 0, 400, 400)) == [big]
+    assert index.query(pygame.rect.Rect(250, 250, 5, 5)) == [big]
+    assert index.query(pygame.rect.Rect(310, 310, 5, 5)) == []
+
+def test_moves_keep_queries_and_order():
+    rand = random.Random(2)
+    sprites = [Box(_random_rect(rand)) for _ in range(200)]
+    index = SpatialHash(64)
+    index.build(sprites)
+    for _ in range(5):
+        for sprite in rand.sample(sprites, 80):
+            sprite.rect.move_ip(rand.randint(-150, 150), rand.randint(-150, 150))
+            index.move(sprite)
+        _check_queries(index, sprites, rand, 50)
+
+def test_removals_and_reinsertion_order():
+    rand = random.Random(3)
+    sprites = [Box(_random_rect(rand)) for _ in range(200)]
+    index = SpatialHash(64)
+    index.build(sprites)
+    removed = rand.sample(sprites, 60)
+    for sprite in removed:
+        index.remove(sprite)
+    remaining = [sprite for sprite in sprites if sprite not in removed]
+    assert len(index) == len(remaining)
+    _check_queries(index, remaining, rand, 100)
+
+    ## inserted again, they come after everything which stayed
+    for sprite in removed[:20]:
+        index.insert(sprite)
+    _check_queries(index, remaining + removed[:20], rand, 100)
+
+def test_insert_twice_keeps_one_entry():
+    box = Box((0, 0, 10, 10))
+    index = SpatialHash(64)
+    index.insert(box)
+    box.rect.topleft = (500, 500)
+    index.insert(box)
+    assert len(index) == 1
+    assert index.query(pygame.rect.Rect(0, 0, 20, 20)) == []
+    assert index.query(pygame.rect.Rect(495, 495, 20, 20)) == [box]
+
+def test_query_order_follows_insertion_order():
+    boxes = [Box((x * 7, 0, 100, 100)) for x in range(10)]
+    index = SpatialHash(16)
+    for box in reversed(boxes):
+        index.insert(box)
+    assert index.query(pygame.rect.Rect(70, 50, 10, 10)) == list(reversed(boxes))
@@ -0,0 +1,115 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import random
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from game.utils.text_layout import TextLayout, TEXT_ALIGN
+
+## TextLayout has to break lines where the old drawText did, which measured every
+## prefix of the remaining text with font.size.
+
+WORDS = "a bb ccc Wurst Bierdurstmann Pfandflasche Mülleimer Straßenbahn ist gut, oder? Tja.".split()
+
+@pytest.fixture(scope = "module")
+def font():
+    pygame.font.init()
+    return pygame.font.Font(None, 20)
+
+def _greedy_wrap(font, text, rect, line_spacing = 5):
+    ## The loop of the old drawText. Different on purpose: a word wider than the rect is
+    ## broken (the old loop emitted empty lines for it), the last line is wrapped too
+    ## (the old loop let its last character overflow) and newlines end a line.
+    lines = []
+    line_height = font.size("Tg")[1]
+    y = rect.top
+    while text:
+        if y + line_height > rect.bottom:
+            break
+
+        stop = text.find("\n")
+        if stop < 0:
+            stop = len(text)
+
+        i = 1
+        while i <= stop and font.size(text[:i])[0] < rect.width:
+            i += 1
+
+        if i <= stop:
+            space = text.rfind(" ", 0, i)
+            i = space + 1 if space >= 0 else max(i - 1, 1)
+        else:
+            i = stop
+
+        lines.append(text[:i])
+        y += line_height + line_spacing
+        text = text[i + 1:] if i == stop < len(text) else text[i:]
+    return lines, text
+
+def _wrap(font, text, rect):
+    layout = TextLayout(font, text, rect, TEXT_ALIGN.CENTER, 5)
+    return [line for line, pos in layout.lines], layout.remaining
+
+def _random_text(rand, separators = (" ",)):
+    words = [rand.choice(WORDS) for _ in range(rand.randint(1, 40))]
+    return "".join(word + rand.choice(separators) for word in words)[:-1]
+
+
+def test_breaks_match_greedy_wrapping(font):
+    rand = random.Random(0)
+    for _ in range(300):
+        text = _random_text(rand)
+        rect = pygame.rect.Rect(20, 20, rand.randint(90, 400), rand.randint(30, 300))
+        assert _wrap(font, text, rect) == _greedy_wrap(font, text, rect)
+
+def test_lines_are_narrower_than_the_rect(font):
+    rand = random.Random(1)
+    for _ in range(100):
+        rect = pygame.rect.Rect(0, 0, rand.randint(60, 300), 1000)
+        layout = TextLayout(font, _random_text(rand), rect)
+        for line, pos in layout.lines:
+            assert font.size(line.rstrip(" "))[0] < rect.width
+            assert rect.left <= pos[0]
+
+def test_word_wider_than_the_rect_is_broken(font):
+    rect = pygame.rect.Rect(0, 0, 60, 1000)
+    lines, remaining = _wrap(font, "a Bierdurstmannmülleimer b", rect)
+    assert (lines, remaining) == _greedy_wrap(font, "a Bierdurstmannmülleimer b", rect)
+    assert "".join(lines) == "a Bierdurstmannmülleimer b"
+    assert len(lines) > 3
+    assert all(font.size(line.rstrip(" "))[0] < rect.width for line in lines)
+
+def test_explicit_newlines(font):
+    rect = pygame.rect.Rect(0, 0, 400, 1000)
+    assert _wrap(font, "Bier\n\nWurst ist gut\nTja.", rect) == (["Bier", "", "Wurst ist gut", "Tja."], "")
+
+    rand = random.Random(2)
+    for _ in range(200):
+        text = _random_text(rand, (" ", " ", " ", "\n"))
+        rect = pygame.rect.Rect(0, 0, rand.randint(90, 400), rand.randint(30, 300))
+        assert _wrap(font, text, rect) == _greedy_wrap(font, text, rect)
+
+def test_height_cutoff_returns_the_rest(font):
+    line_height = font.size("Tg")[1]
+    ## room for exactly two lines and their spacing, the third one doesn't fit
+    rect = pygame.rect.Rect(0, 0, 60, 2 * line_height + 5 + line_height - 1)
+    text = "Bier Wurst Tja. Bier Wurst Tja."
+    lines, remaining = _wrap(font, text, rect)
+    assert len(lines) == 2
+    assert "".join(lines) + remaining == text
+    assert (lines, remaining) == _greedy_wrap(font, text, rect)
+
+    assert _wrap(font, text, pygame.rect.Rect(0, 0, 60, line_height - 1)) == ([], text)
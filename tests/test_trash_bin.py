@@ -0,0 +1,48 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from game.utils.params import *
+from game.utils.rng import seed_gameplay
+from game.utils.scheduler import Scheduler
+from game.entities.boxes_entity import TrashBin
+
+
+def _bins(count, scheduler):
+    surf = pygame.Surface((32, 32))
+    group = pygame.sprite.Group()
+    return [TrashBin((32 * i, 0), surf, group, scheduler) for i in range(count)]
+
+def _items(trash_bin):
+    content = trash_bin.content
+    return content["bottle"] + content["can"] + content["trash"] + content["money"]
+
+
+def test_bins_register_on_a_fresh_scheduler():
+    seed_gameplay(1)
+    scheduler = Scheduler()
+    bins = _bins(3, scheduler)
+    assert len(scheduler) == 3
+    assert all(trash_bin.refill_entry is not None for trash_bin in bins)
+
+def test_scheduled_bins_refill():
+    seed_gameplay(1)
+    scheduler = Scheduler()
+    bins = _bins(20, scheduler)
+    for _ in range(int(10 * TRASH_BIN_CONTENT_UPDATE_MAX / SIMULATION_DT)):
+        scheduler.advance(SIMULATION_DT)
+    assert sum(_items(trash_bin) for trash_bin in bins) > 0
@@ -0,0 +1,78 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pytest
+
+pygame = pytest.importorskip("pygame")
+pytest.importorskip("numpy")
+
+from game.utils.params import *
+from game.utils.rng import seed_gameplay
+from game.entities.boxes_entity import TrashBinView
+from game.entities.trash_bin_store import TrashBinStore
+
+EMPTY = {"bottle": 0, "can": 0, "trash": 0, "money": 0.0}
+
+
+def _views(count):
+    store = TrashBinStore()
+    surf = pygame.Surface((32, 32))
+    group = pygame.sprite.Group()
+    return store, [TrashBinView((32 * i, 0), surf, group, store) for i in range(count)]
+
+
+def test_view_catch_up_before_the_refill_only_moves_the_timer():
+    seed_gameplay(3)
+    store, (view,) = _views(1)
+    view.catch_up(1.0)
+    assert view.time == 1.0
+    assert view.content == EMPTY
+
+def test_view_catch_up_refills():
+    seed_gameplay(3)
+    store, views = _views(20)
+    for view in views:
+        view.catch_up(10 * TRASH_BIN_CONTENT_UPDATE_MAX)
+        assert 0 <= view.time < view.renew_time
+    assert any(view.content != EMPTY for view in views)
+
+def test_view_refill_restarts_its_timer():
+    seed_gameplay(3)
+    store, views = _views(20)
+    store.update(3.0)
+    for view in views:
+        view._refill()
+        assert view.time == 0.0
+        assert TRASH_BIN_CONTENT_UPDATE_MIN <= view.renew_time <= TRASH_BIN_CONTENT_UPDATE_MAX
+
+def test_interact_empties_the_view():
+    seed_gameplay(3)
+    store, views = _views(20)
+    for view in views:
+        for _ in range(5):
+            view._update_content()
+    full = [view for view in views if view.content != EMPTY]
+    assert full
+    content, msg = full[0].interact()
+    assert content != EMPTY
+    assert full[0].content == EMPTY
+
+def test_store_grows_past_its_capacity():
+    store = TrashBinStore(capacity = 2)
+    store.add()
+    store.add()
+    store.time[1] = 5.0
+    store.add()
+    assert len(store) == 3
+    assert store.time[1] == 5.0
@@ -0,0 +1,63 @@
+# Copyright 2023-2024 Christoph Rohnert
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from game.utils.widgets import Panel, Label
+
+## Incremental refreshes have to end up with the same pixels as building the tree anew.
+
+@pytest.fixture(scope = "module")
+def font():
+    pygame.font.init()
+    return pygame.font.Font(None, 20)
+
+def _tree(font, text, color):
+    root = Panel((0, 0, 400, 300), (200, 200, 200, 255))
+    content = Panel((50, 40, 300, 200), (255, 255, 255, 255), radius = 8, parent = root)
+    label = Label((20, 20, 120, 30), font, text, parent = content)
+    box = Panel((150, 100, 60, 60), color, parent = content)
+    root.refresh()
+    return root, label, box
+
+def _pixels(widget):
+    return pygame.image.tobytes(widget.image, "RGBA")
+
+
+def test_changed_label_only_reports_its_rect(font):
+    root, label, box = _tree(font, "3", "red")
+    label.set_text("12")
+    assert root.refresh() == [pygame.rect.Rect(70, 60, 120, 30)]
+    assert _pixels(root) == _pixels(_tree(font, "12", "red")[0])
+
+def test_nothing_changed(font):
+    root, label, box = _tree(font, "3", "red")
+    label.set_text("3")
+    assert root.refresh() == []
+
+def test_several_changes_and_visibility(font):
+    root, label, box = _tree(font, "3", "red")
+    label.set_text("7")
+    box.set_color("blue")
+    assert len(root.refresh()) == 2
+    assert _pixels(root) == _pixels(_tree(font, "7", "blue")[0])
+
+    box.set_visible(False)
+    root.refresh()
+    expected, _, hidden = _tree(font, "7", "blue")
+    hidden.set_visible(False)
+    expected.refresh()
+    assert _pixels(root) == _pixels(expected)